@@ -0,0 +1,51 @@
+# ----------------------------------------------------------------------
+# DispatchTable {
+#   name      what the table is for, in error messages
+#   handlers  node class -> handler
+#   default   handler for classes without one (None: an error)
+# }
+# One table per pass over the AST (evaluation, folding, printing, ...),
+# whose handlers all take the state of the pass and then the node:
+# handler(context, node), e.g. eval handlers are (EnvTable, ast.Expr).
+# A handler registered for a class also serves its subclasses; those
+# are resolved on first use and then found with a single dict lookup,
+# so callers can dispatch inline:
+#
+#     handler = table.handlers.get(node.__class__) or table.resolve(node)
+#     return handler(context, node)
+#
+# ----------------------------------------------------------------------
+class DispatchTable:
+    def __init__(self, name, default=None):
+        self.name = name
+        self.handlers = {}
+        self.default = default
+
+    def register(self, node_class, handler):
+        self.handlers[node_class] = handler
+        return handler
+
+    # Decorator form of register()
+    def handles(self, *node_classes):
+        def register_all(handler):
+            for node_class in node_classes:
+                self.register(node_class, handler)
+            return handler
+        return register_all
+
+    # node -> handler, for a class without an entry of its own
+    def resolve(self, node):
+        node_class = node.__class__
+        for base in node_class.__mro__[1:]:
+            handler = self.handlers.get(base)
+            if handler != None:
+                self.handlers[node_class] = handler
+                return handler
+        if self.default == None:
+            raise TypeError("No %s handler for %s" % (self.name, node_class.__name__))
+        self.handlers[node_class] = self.default
+        return self.default
+
+    def dispatch(self, context, node):
+        handler = self.handlers.get(node.__class__) or self.resolve(node)
+        return handler(context, node)
@@ -1,90 +1,136 @@
 from ast.interfaces import Expr
 
-from parser.symbols import SymToken 
-
+from parser.symbols import (
+    SymbolType,
+    operator_texts,
+    symbol_type_name,
+)
+
+from tokenizer.names import (
+    intern_name,
+    name_for_id,
+)
+
+# ----------------------------------------------------------------------
+# The nodes keep what they use of their token (value, name id,
+# operator type) and its position in their own slots: the SymTokens
+# the parser read are not referenced by the tree once it is built.
+# ----------------------------------------------------------------------
+
+# _value: native value of the literal
+# _line : source line number
+# _col  : source column number
 class BaseExpr:
-    def __init__(self, sym):
-        self._sym = sym
-        # TODO:
-        # if not isinstance(sym, SymToken):
-        #     raise Exception("Only SymTokens can be BaseExpr's")
+    __slots__ = ('_value', '_line', '_col')
+    symbol_type = None
 
-    @property
-    def symbol(self):
-        return self._sym
+    def __init__(self, value, line, col):
+        self._value = value
+        self._line = line
+        self._col = col
 
     @property
     def line(self):
-        return self._sym.line
+        return self._line
 
     @property
     def col(self):
-        return self._left.col
-        
+        return self._col
+
     @property
     def exprvalue(self):
-        return self._sym.symvalue
+        return self._value
 
     @property
     def exprtype(self):
-        return self._sym.symtype
+        return self.symbol_type
 
-    @property
-    def exprsym(self):
-        return self._sym
+    def shift_line(self, line_delta):
+        self._line = self._line + line_delta
 
 
 class NilExpr(BaseExpr):
-    def __init__(self, sym):
-        super().__init__(sym)
+    __slots__ = ()
+    symbol_type = SymbolType.LITERAL_NIL
+
+    def __init__(self, line, col):
+        super().__init__(None, line, col)
 
     def __str__(self):
         return "NilLiteral"
 
 class IntegerExpr(BaseExpr):
-    def __init__(self, sym):
-        super().__init__(sym)
+    __slots__ = ()
+    symbol_type = SymbolType.LITERAL_INTEGER
 
     def __str__(self):
         return "IntegerLiteral(%d)" % self.exprvalue
 
 class FloatExpr(BaseExpr):
-    def __init__(self, sym):
-        super().__init__(sym)
+    __slots__ = ()
+    symbol_type = SymbolType.LITERAL_FLOAT
 
     def __str__(self):
         return "FloatLiteral(%g)" % self.exprvalue
 
 class BoolExpr(BaseExpr):
-    def __init__(self, sym):
-        super().__init__(sym)
+    __slots__ = ()
+    symbol_type = SymbolType.LITERAL_BOOL
 
     def __str__(self):
-        return "BoolLiteral(%b)" % self.exprvalue
+        return "BoolLiteral(%s)" % self.exprvalue
 
 class StringExpr(BaseExpr):
-    def __init__(self, sym):
-        super().__init__(sym)
+    __slots__ = ()
+    symbol_type = SymbolType.LITERAL_STRING
 
     def __str__(self):
         return "StringLiteral('%s')" % self.exprvalue
 
+# _name_id: interned id of the name (see tokenizer.names)
+# _line   : source line number
+# _col    : source column number
 class IdentifierExpr:
-    def __init__(self, name):
-        self._name = name
+    __slots__ = ('_name_id', '_line', '_col')
+
+    def __init__(self, name_id, line, col):
+        self._name_id = name_id
+        self._line = line
+        self._col = col
+
+    # Pickled with the name, the id is only valid in this process
+    def __reduce__(self):
+        return (restore_identifier, (self.name, self._line, self._col))
 
     @property
     def name(self):
-        return self._name
+        return name_for_id(self._name_id)
+
+    @property
+    def name_id(self):
+        return self._name_id
 
     def __str__(self):
-        return "Identifier(%s)" % self._name
+        return "Identifier(%s)" % self.name
 
     @property
     def line(self):
-        return self._name.line
+        return self._line
+
+    @property
+    def col(self):
+        return self._col
+
+    def shift_line(self, line_delta):
+        self._line = self._line + line_delta
+
+# name -> line -> col -> IdentifierExpr, interning the name again
+def restore_identifier(name, line, col):
+    return IdentifierExpr(intern_name(name), line, col)
 
 class AssignmentExpr:
+    __slots__ = ('_ident', '_rhs')
+
     def __init__(self, ident, rhs):
         self._ident = ident
         self._rhs = rhs
@@ -104,20 +150,42 @@ class AssignmentExpr:
     def line(self):
         return self._ident.line
 
+    @property
+    def col(self):
+        return self._ident.col
 
+    def shift_line(self, line_delta):
+        self._ident.shift_line(line_delta)
+        self._rhs.shift_line(line_delta)
+
+
+# _op  : SymbolType of the operator
+# _lhs, _rhs: operands
+# _line, _col: position of the operator
 class BinaryExpr:
-    def __init__(self, op, lhs, rhs):
+    __slots__ = ('_op', '_lhs', '_rhs', '_line', '_col')
+
+    def __init__(self, op, lhs, rhs, line, col):
         self._op = op
         self._lhs = lhs
         self._rhs = rhs
+        self._line = line
+        self._col = col
 
     def __str__(self):
-        return "BinaryExpr(OP:'%s', Left: %s, Right: %s)" % (self._op.symvalue, self._lhs, self._rhs)
+        return "BinaryExpr(OP:'%s', Left: %s, Right: %s)" % (self.operator_text, self._lhs, self._rhs)
 
     @property
     def operator(self):
         return self._op
 
+    @property
+    def operator_text(self):
+        text = operator_texts.get(self._op)
+        if text == None:
+            return symbol_type_name(self._op)
+        return text
+
     @property
     def lhs(self):
         return self._lhs
@@ -128,4 +196,13 @@ class BinaryExpr:
 
     @property
     def line(self):
-        return self._op.line
+        return self._line
+
+    @property
+    def col(self):
+        return self._col
+
+    def shift_line(self, line_delta):
+        self._line = self._line + line_delta
+        self._lhs.shift_line(line_delta)
+        self._rhs.shift_line(line_delta)
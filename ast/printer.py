@@ -0,0 +1,83 @@
+from ast.expressions import (
+    BaseExpr,
+    IdentifierExpr,
+    AssignmentExpr,
+    BinaryExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from ast.dispatch import (
+    DispatchTable,
+)
+
+# ----------------------------------------------------------------------
+# TreePrinter {
+#   _lines  output so far, one node per line
+#   _depth  indentation of the node being printed
+# }
+# The multi-line counterpart of str(node), with one node per line:
+#
+#     [17] Assignment y4
+#     [17]   Binary +
+#     [17]     FloatExpr 12.7
+#     ...
+# ----------------------------------------------------------------------
+class TreePrinter:
+    def __init__(self):
+        self._lines = []
+        self._depth = 0
+
+    def add_line(self, node, text):
+        self._lines.append("[%2d] %s%s" % (node.line, "  " * self._depth, text))
+
+    def print_node(self, node):
+        print_table.dispatch(self, node)
+
+    def print_children(self, *nodes):
+        self._depth = self._depth + 1
+        for node in nodes:
+            self.print_node(node)
+        self._depth = self._depth - 1
+
+    def text(self):
+        return "\n".join(self._lines)
+
+# ----------------------------------------------------------------------
+# Printing handlers: TreePrinter -> node
+# ----------------------------------------------------------------------
+
+def print_other(printer, node):
+    printer.add_line(node, str(node))
+
+print_table = DispatchTable("print", print_other)
+
+@print_table.handles(BaseExpr)
+def print_literal(printer, expr):
+    printer.add_line(expr, "%s %r" % (expr.__class__.__name__, expr.exprvalue))
+
+@print_table.handles(IdentifierExpr)
+def print_identifier(printer, expr):
+    printer.add_line(expr, "Identifier %s" % expr.name)
+
+@print_table.handles(AssignmentExpr)
+def print_assignment(printer, expr):
+    printer.add_line(expr, "Assignment %s" % expr.ident.name)
+    printer.print_children(expr.rhs)
+
+@print_table.handles(BinaryExpr)
+def print_binary(printer, expr):
+    printer.add_line(expr, "Binary %s" % expr.operator_text)
+    printer.print_children(expr.lhs, expr.rhs)
+
+@print_table.handles(ExpressionStmt)
+def print_expression_stmt(printer, stmt):
+    printer.print_node(stmt.expression)
+
+# node -> multi-line text
+def format_tree(node):
+    printer = TreePrinter()
+    printer.print_node(node)
+    return printer.text()
@@ -1,10 +1,14 @@
 from ast.interfaces import Expr
 
 class BlockStmt:
+    __slots__ = ('_stmts',)
+
     def __init__(self, stmts):
         self._stmts = stmts
 
 class ExpressionStmt:
+    __slots__ = ('_expression',)
+
     def __init__(self, expression):
         self._expression = expression
 
@@ -18,3 +22,6 @@ class ExpressionStmt:
     @property
     def line(self):
         return self._expression.line
+
+    def shift_line(self, line_delta):
+        self._expression.shift_line(line_delta)
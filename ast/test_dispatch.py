@@ -0,0 +1,111 @@
+import io
+import pytest
+
+from tokenizer.tokens import (
+    iter_tokens,
+)
+
+from parser.driver import (
+    FileParser,
+)
+
+from ast.dispatch import (
+    DispatchTable,
+)
+
+from ast.printer import (
+    format_tree,
+)
+
+class Node:
+    pass
+
+class Leaf(Node):
+    pass
+
+class RedLeaf(Leaf):
+    pass
+
+class Other:
+    pass
+
+def node_handler(context, node):
+    return "node"
+
+def leaf_handler(context, node):
+    return "leaf"
+
+def default_handler(context, node):
+    return "default"
+
+#  Test handler lookup of the AST passes
+class TestDispatchTable:
+    def test_resolve_through_mro(self):
+        table = DispatchTable("test")
+        table.register(Node, node_handler)
+        table.register(Leaf, leaf_handler)
+        assert table.dispatch(None, Node()) == "node"
+        # the closest base class wins
+        assert table.dispatch(None, RedLeaf()) == "leaf"
+
+    def test_resolved_handler_cached(self):
+        table = DispatchTable("test")
+        table.register(Node, node_handler)
+        assert RedLeaf not in table.handlers
+        table.dispatch(None, RedLeaf())
+        assert table.handlers[RedLeaf] is node_handler
+        # a later handler for a base class does not change the cached entry
+        table.register(Leaf, leaf_handler)
+        assert table.dispatch(None, RedLeaf()) == "node"
+
+    def test_handles_decorator(self):
+        table = DispatchTable("test")
+
+        @table.handles(Leaf, Other)
+        def handler(context, node):
+            return context
+
+        assert handler(1, None) == 1
+        assert table.dispatch("ctx", Other()) == "ctx"
+        assert table.dispatch("ctx", RedLeaf()) == "ctx"
+
+    def test_default_handler(self):
+        table = DispatchTable("test", default_handler)
+        table.register(Leaf, leaf_handler)
+        assert table.dispatch(None, Other()) == "default"
+        assert table.handlers[Other] is default_handler
+        assert table.dispatch(None, RedLeaf()) == "leaf"
+
+    def test_no_handler_type_error(self):
+        table = DispatchTable("test")
+        table.register(Leaf, leaf_handler)
+        with pytest.raises(TypeError, match="No test handler for Node"):
+            table.dispatch(None, Node())
+        assert Node not in table.handlers
+
+#  Test the multi-line tree printer
+class TestFormatTree:
+    def test_format_tree(self):
+        text = "a = 1\n\ny4 = x + 12.7 * 's'\n"
+        statements = FileParser("tree.goji", list(iter_tokens(io.StringIO(text)))).parse()
+        assert format_tree(statements[0]) == "\n".join([
+            "[ 1] Assignment a",
+            "[ 1]   IntegerExpr 1",
+        ])
+        assert format_tree(statements[1]) == "\n".join([
+            "[ 3] Assignment y4",
+            "[ 3]   Binary +",
+            "[ 3]     Identifier x",
+            "[ 3]     Binary *",
+            "[ 3]       FloatExpr 12.7",
+            "[ 3]       StringExpr 's'",
+        ])
+
+    def test_unknown_node_uses_str(self):
+        class Note:
+            line = 12
+
+            def __str__(self):
+                return "Note"
+
+        assert format_tree(Note()) == "[12] Note"
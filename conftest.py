@@ -0,0 +1,46 @@
+import sys
+
+# pytest has imported the stdlib ast module before any test module; the
+# Goji ast package of this repo has the same name and takes its place,
+# pytest itself keeps the module it imported
+if not hasattr(sys.modules.get('ast'), '__path__'):
+    del sys.modules['ast']
+    import ast
+
+import io
+import pytest
+
+from tokenizer.tokens import (
+    iter_tokens,
+)
+
+from parser.driver import (
+    FileParser,
+)
+
+from program import (
+    run_program,
+)
+
+# -> (text -> statements of the Pratt parser)
+@pytest.fixture
+def parse_text():
+    def parse(text):
+        return FileParser("test.goji", list(iter_tokens(io.StringIO(text)))).parse()
+    return parse
+
+# -> (EnvTable -> (name, value) of its bindings, in table order)
+@pytest.fixture
+def bindings():
+    def env_bindings(env):
+        return [(item.name, item.value) for item in env.items()]
+    return env_bindings
+
+# -> (program file -> options of run_program() -> what it prints),
+# without the AST cache
+@pytest.fixture
+def program_output(capsys):
+    def run(program_file, **options):
+        run_program(program_file, use_cache=False, **options)
+        return capsys.readouterr().out
+    return run
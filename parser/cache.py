@@ -0,0 +1,275 @@
+import os
+import pickle
+import hashlib
+
+from tracing import (
+    tr,
+    ERROR,
+    INFO,
+    DEBUG,
+)
+
+# Directory of the current user's caches, under $XDG_CACHE_HOME (or
+# ~/.cache); each directory of programs gets its own subdirectory
+CACHE_DIR_NAME = 'goji'
+
+# Entries are evicted, least recently used first, beyond this size
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# In each cache directory: the directory of programs it caches
+SOURCE_DIR_FILE = 'source_dir'
+
+# Bumped whenever the pickled layout of the AST changes
+CACHE_FORMAT = 3
+
+CACHE_SUFFIX = '.ast'
+
+# ----------------------------------------------------------------------
+# AstCache {
+#   _dir            where entries are stored
+#   _engine_version tag of the front end that produced the statements
+#   _max_bytes      size bound of all entries together
+#   _root           directory of cache directories sharing _max_bytes
+#                   (entries of any suffix), None for _dir alone
+# }
+# One entry per program: "<file name>.<key>.ast", the key being the
+# sha256 of the engine version, the cache format and the source text.
+# An edited source gets a new key, and the stale entry of the same
+# file is removed when the new one is stored, and so are the entries
+# of programs (or whole directories of programs) that were deleted
+# since. Under a _root, each cache directory records the directory of
+# programs it caches in SOURCE_DIR_FILE for that. Subclasses cache other
+# things per program by overriding suffix, read_entry and write_entry.
+#
+# Loading an entry runs whatever it holds (pickle, marshal), so entries
+# are only read from a directory that belongs to the current user and
+# that nobody else can write to; see is_trusted().
+# ----------------------------------------------------------------------
+class AstCache:
+    suffix = CACHE_SUFFIX
+
+    def __init__(self, cache_dir, engine_version, max_bytes=MAX_CACHE_BYTES, root=None):
+        self._dir = cache_dir
+        self._engine_version = str(engine_version)
+        self._max_bytes = max_bytes
+        self._root = root
+
+    @property
+    def directory(self):
+        return self._dir
+
+    def key_for(self, source_bytes):
+        h = hashlib.sha256()
+        h.update(("%s:%d:" % (self._engine_version, CACHE_FORMAT)).encode('utf-8'))
+        h.update(source_bytes)
+        return h.hexdigest()
+
+    def entry_path(self, file_path, key):
+        return os.path.join(self._dir, "%s.%s%s" % (os.path.basename(file_path), key, self.suffix))
+
+    def read_entry(self, fo):
+        return pickle.load(fo)
+
+    def write_entry(self, fo, statements):
+        pickle.dump(statements, fo, pickle.HIGHEST_PROTOCOL)
+
+    def describe(self, statements):
+        return "%d statement(s)" % len(statements)
+
+    # path -> True when path is owned by the current user and cannot be
+    # written by anyone else (always True where there are no user ids)
+    def is_trusted(self, path):
+        if not hasattr(os, 'getuid'):
+            return True
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return False
+        return st.st_uid == os.getuid() and (st.st_mode & 0o022) == 0
+
+    # file path -> source bytes -> statement[] or None
+    def load(self, file_path, source_bytes):
+        path = self.entry_path(file_path, self.key_for(source_bytes))
+        if not os.path.exists(path):
+            return None
+        if not self.is_trusted(self._dir) or not self.is_trusted(path):
+            if tr.program >= ERROR:
+                tr.log('Ignoring cache entry "%s": it could have been written by another user' % path)
+            return None
+        try:
+            with open(path, 'rb') as fo:
+                statements = self.read_entry(fo)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            if tr.program >= ERROR:
+                tr.log('Dropping unreadable cache entry "%s": %s' % (path, e))
+            self.remove(path)
+            return None
+        # Mark as recently used, where the cache can be written to
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if tr.program >= INFO:
+            tr.log('Loaded %s from "%s"' % (self.describe(statements), path))
+        return statements
+
+    # file path -> source bytes -> statement[] -> entry path or None
+    def store(self, file_path, source_bytes, statements):
+        key = self.key_for(source_bytes)
+        path = self.entry_path(file_path, key)
+        # Written aside and renamed, so readers never see half an entry
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            os.makedirs(self._dir, mode=0o700, exist_ok=True)
+            if not self.is_trusted(self._dir):
+                raise PermissionError('"%s" could be written by another user' % self._dir)
+            with open(tmp_path, 'wb') as fo:
+                self.write_entry(fo, statements)
+            os.replace(tmp_path, path)
+            if self._root != None:
+                self.record_source_dir(file_path)
+        except (OSError, pickle.PicklingError, RecursionError, ValueError) as e:
+            if tr.program >= ERROR:
+                tr.log('Could not cache "%s": %s' % (file_path, e))
+            self.remove(tmp_path)
+            return None
+        if tr.program >= INFO:
+            tr.log('Cached %s in "%s"' % (self.describe(statements), path))
+        self.drop_stale(file_path, key)
+        self.evict()
+        return path
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Removes the entries of file_path other than the one for key
+    def drop_stale(self, file_path, key):
+        prefix = os.path.basename(file_path) + '.'
+        keep = os.path.basename(self.entry_path(file_path, key))
+        for name in self.entry_names():
+            # Same length: the rest of the name is a key, not another file name
+            if name.startswith(prefix) and len(name) == len(keep) and name != keep:
+                if tr.program >= DEBUG:
+                    tr.log('Dropping stale cache entry "%s"' % name)
+                self.remove(os.path.join(self._dir, name))
+
+    # Writes SOURCE_DIR_FILE, the first time an entry is stored
+    def record_source_dir(self, file_path):
+        path = os.path.join(self._dir, SOURCE_DIR_FILE)
+        if os.path.exists(path):
+            return
+        with open(path, 'w', encoding='utf-8') as fo:
+            fo.write(os.path.dirname(os.path.abspath(file_path)))
+
+    def entry_names(self):
+        try:
+            names = os.listdir(self._dir)
+        except OSError:
+            return []
+        return [name for name in names if name.endswith(self.suffix)]
+
+    # Cache directories whose entries share _max_bytes
+    def cache_dirs(self):
+        if self._root == None:
+            return [self._dir]
+        try:
+            names = os.listdir(self._root)
+        except OSError:
+            return []
+        return [os.path.join(self._root, name) for name in names]
+
+    # Removes the entries of deleted programs (and the cache directories
+    # of deleted directories of programs), then least recently used
+    # entries of all cache directories until they fit in _max_bytes
+    def evict(self):
+        entries = []
+        total = 0
+        evicted = 0
+        for cache_dir in self.cache_dirs():
+            if not os.path.isdir(cache_dir) or not self.is_trusted(cache_dir):
+                continue
+            source_dir = read_source_dir(cache_dir)
+            try:
+                names = os.listdir(cache_dir)
+            except OSError:
+                continue
+            for name in names:
+                # Temporary files belong to a store() in progress
+                if name == SOURCE_DIR_FILE or name.endswith('.tmp'):
+                    continue
+                path = os.path.join(cache_dir, name)
+                program = program_name(name)
+                if source_dir != None and program != None and not os.path.exists(os.path.join(source_dir, program)):
+                    self.remove(path)
+                    evicted = evicted + 1
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total = total + st.st_size
+            if source_dir != None and not os.path.isdir(source_dir):
+                self.remove(os.path.join(cache_dir, SOURCE_DIR_FILE))
+                try:
+                    os.rmdir(cache_dir)
+                except OSError:
+                    pass
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            self.remove(path)
+            total = total - size
+            evicted = evicted + 1
+        if evicted > 0 and tr.program >= INFO:
+            where = self._root
+            if where == None:
+                where = self._dir
+            tr.log('Evicted %d cache entries from "%s"' % (evicted, where))
+        return evicted
+
+# cache directory -> directory of programs it caches, or None
+def read_source_dir(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, SOURCE_DIR_FILE), 'r', encoding='utf-8') as fo:
+            return fo.read()
+    except (OSError, ValueError):
+        return None
+
+# entry name -> file name of its program, or None
+def program_name(entry_name):
+    parts = entry_name.rsplit('.', 2)
+    if len(parts) != 3 or len(parts[1]) != 64:
+        return None
+    return parts[0]
+
+# -> $XDG_CACHE_HOME/goji, or ~/.cache/goji
+def user_cache_root():
+    root = os.environ.get('XDG_CACHE_HOME')
+    if not root:
+        root = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, CACHE_DIR_NAME)
+
+# One subdirectory of the user's cache per directory of programs, so
+# that programs of the same name in different directories keep
+# their own entries
+def cache_dir_for(file_path):
+    source_dir = os.path.dirname(os.path.abspath(file_path))
+    dir_key = hashlib.sha256(os.fsencode(source_dir)).hexdigest()[:16]
+    return os.path.join(user_cache_root(), "%s-%s" % (os.path.basename(source_dir), dir_key))
+
+# Bytes of a readable program file, None for stdin or anything else
+def read_program_bytes(file_path):
+    if not isinstance(file_path, str) or file_path == '-' or not os.path.isfile(file_path):
+        return None
+    try:
+        with open(file_path, 'rb') as fo:
+            return fo.read()
+    except OSError:
+        return None
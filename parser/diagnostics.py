@@ -0,0 +1,37 @@
+# ------------------------------------------------------------
+# Diagnostic {
+#   line    source line of the offending token (0 if unknown)
+#   col     source column of the offending token
+#   message what was expected or found
+# }
+# ------------------------------------------------------------
+class Diagnostic:
+    def __init__(self, line, col, message):
+        self.line = line
+        self.col = col
+        self.message = message
+
+    def __str__(self):
+        return "[%d:%d] %s" % (self.line, self.col, self.message)
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.__dict__ == other.__dict__
+        else:
+            return False
+
+    def format(self, filename):
+        return "%s:%d:%d: %s" % (filename, self.line, self.col, self.message)
+
+# symtok (SymToken, TokenView or None) -> message -> Diagnostic
+def diagnostic_at(symtok, message):
+    if symtok == None:
+        return Diagnostic(0, 0, message)
+    return Diagnostic(symtok.line, symtok.col, message)
+
+# Raised by the parser at a syntax error; the statement being parsed
+# is abandoned and parsing resumes after its LINE_END
+class ParseError(Exception):
+    def __init__(self, diagnostic):
+        super().__init__(str(diagnostic))
+        self.diagnostic = diagnostic
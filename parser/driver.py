@@ -1,7 +1,27 @@
+import gc
+from bisect import bisect_left, bisect_right
+from functools import partial
+
 from tokenizer.tokens import (
+    Token,
+    TokenItem,
+    LexerEngine,
+    iter_tokens,
     tokenize_program,
 )
 
+from tokenizer.spans import (
+    iter_mapped_tokens,
+    tokenize_mapped,
+)
+
+from tokenizer.parallel import (
+    lex_chunk,
+    read_all_lines,
+    split_into_chunks,
+    run_chunks,
+)
+
 from parser.rules import (
     BindingPower,
     RuleProvider,
@@ -12,7 +32,22 @@ from parser.rules import (
 
 from parser.symbols import (
     SymbolType,
+    SymToken,
     symbolized,
+    iter_symbolized,
+    iter_symbol_tokens,
+    symbolize_program,
+    make_symtoken,
+)
+
+from parser.packed import (
+    TokenBuffer,
+    pack_program,
+    pack_parallel,
+)
+
+from parser.vectorized import (
+    pack_vectorized,
 )
 
 from parser.expressions import (
@@ -27,12 +62,81 @@ from parser.statements import (
     parse_statement,
 )
 
+from parser.diagnostics import (
+    ParseError,
+    diagnostic_at,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    INFO,
+    DEBUG,
+    TRACE,
+)
+
+# Iterator of TokenItems or SymTokens (TokenViews) -> iterator of SymTokens
+def symtoken_stream(tokens):
+    tokens = iter(tokens)
+    first = next(tokens, None)
+    if first == None:
+        return
+    if isinstance(first, TokenItem):
+        yield SymToken(first)
+        yield from iter_symbolized(tokens)
+    else:
+        yield first
+        yield from tokens
+
+# ------------------------------------------------------------
+# StatementEdit {
+#   first   index of the first statement that was parsed again
+#   removed number of statements that were replaced
+#   added   number of statements that replaced them
+# }
+# Indexes count every statement, including those with a syntax error.
+# ------------------------------------------------------------
+class StatementEdit:
+    def __init__(self, first, removed, added):
+        self.first = first
+        self.removed = removed
+        self.added = added
+
+    def __str__(self):
+        return "StatementEdit(%d: -%d +%d)" % (self.first, self.removed, self.added)
+
 class FileParser:
+    # tokens: TokenItem[], or SymToken[] / a TokenBuffer used as they are,
+    # or an iterator of either (which only iter_statements() can parse)
     def __init__(self, filename, tokens):
         self._filename = filename
         self._line = 0
-        self._symtokens = symbolized(tokens)
-        self._rule_provider = create_rule_provider()
+        self._report = True
+        self._diagnostics = []
+        # set by reparse(): _diagnostics is rebuilt from _stmt_diags
+        self._diagnostics_stale = False
+        # Statement index, filled by parse(). Statement i spans the
+        # tokens [_stmt_starts[i], _stmt_ends[i]) and parsed to
+        # _stmt_nodes[i], or to None and the Diagnostic _stmt_diags[i].
+        # From statement _shift_from on, starts and ends are short by
+        # _token_shift and the lines of their tokens by _line_shift
+        # (see reparse())
+        self._stmt_starts = []
+        self._stmt_ends = []
+        self._stmt_nodes = []
+        self._stmt_diags = []
+        self._shift_from = 0
+        self._token_shift = 0
+        self._line_shift = 0
+        if isinstance(tokens, TokenBuffer):
+            self._symtokens = tokens
+        elif not isinstance(tokens, list):
+            self._symtokens = symtoken_stream(tokens)
+        elif len(tokens) > 0 and isinstance(tokens[0], SymToken):
+            self._symtokens = tokens
+        else:
+            self._symtokens = symbolized(tokens)
+        self._rules = frozen_rule_table()
 
     def show_symtokens(self):
         print("")
@@ -61,6 +165,40 @@ class FileParser:
     def has_line_numbers(self):
         return self._line > 0
 
+    # Whether syntax errors are logged as they are found; when not, the
+    # caller reports the diagnostics
+    @property
+    def report(self):
+        return self._report
+
+    @report.setter
+    def report(self, value):
+        self._report = value
+
+    # Diagnostic[] of the syntax errors found by the last parse
+    @property
+    def diagnostics(self):
+        if self._diagnostics_stale:
+            self.move_shift_to(len(self._stmt_starts))
+            self._diagnostics = [d for d in self._stmt_diags if d != None]
+            self._diagnostics_stale = False
+        return self._diagnostics
+
+    def add_diagnostic(self, diagnostic):
+        if self._report and tr.parser >= ERROR:
+            tr.log(diagnostic.format(self._filename))
+        self._diagnostics.append(diagnostic)
+
+    # Parser -> ast.Stmt, or None after a syntax error: the error is
+    # recorded and the parser skips to the start of the next statement
+    def parse_one(self, p):
+        try:
+            return parse_statement(p)
+        except ParseError as e:
+            self.add_diagnostic(e.diagnostic)
+            p.synchronize()
+            return None
+
     #----------------------------------------------------------------------
     # Top-level function
     #----------------------------------------------------------------------
@@ -79,36 +217,206 @@ class FileParser:
     # 4. return st.BlockStatement(body)
     # p.parse_stmt()
     #----------------------------------------------------------------------
+    # A statement with a syntax error is left out of body (see parse_one)
     def parse(self):
         # parsed_result = parseInfo.parse_expr(self.tokens)
-        body = []
-        self._rule_provider.show_all_rules()
-        p = Parser(self._symtokens, self._rule_provider)
+        self._diagnostics = []
+        self._diagnostics_stale = False
+        if tr.rules >= DEBUG:
+            self._rules.show_all_rules()
+        p = Parser(self._symtokens, self._rules)
+        starts, ends, nodes, diags = self.parse_indexed(p, 0)
+        self._stmt_starts = starts
+        self._stmt_ends = ends
+        self._stmt_nodes = nodes
+        self._stmt_diags = diags
+        self._shift_from = len(starts)
+        self._token_shift = 0
+        self._line_shift = 0
+        return self.statements()
+
+    # Statements of the last parse() (and reparse()) without errors
+    def statements(self):
+        self.move_shift_to(len(self._stmt_starts))
+        return [st for st in self._stmt_nodes if st != None]
+
+    # Parser -> offset of its first token -> (starts, ends, nodes, diags)
+    # for the statement index
+    def parse_indexed(self, p, offset):
+        starts = []
+        ends = []
+        nodes = []
+        diags = []
         while p.has_tokens():
-            st = parse_statement(p)
-            body.append(st)
-        return body
+            start = p.position
+            n_diags = len(self._diagnostics)
+            st = self.parse_one(p)
+            starts.append(offset + start)
+            ends.append(offset + p.position)
+            nodes.append(st)
+            if len(self._diagnostics) > n_diags:
+                diags.append(self._diagnostics[-1])
+            else:
+                diags.append(None)
+        return starts, ends, nodes, diags
+
+    # Parses the tokens [start, end) -> statement index entries
+    def parse_region(self, start, end):
+        region = self._symtokens[start:end]
+        region.append(make_symtoken(SymbolType.INPUT_END, '', 0, 0))
+        return self.parse_indexed(Parser(region, self._rules), start)
+
+    # Token index -> index of the first statement whose start (or end)
+    # is past it, as bisect_right() over the statement index would
+    def stmt_after(self, positions, token_idx, find=bisect_right):
+        idx = find(positions, token_idx, 0, self._shift_from)
+        if idx < self._shift_from:
+            return idx
+        return find(positions, token_idx - self._token_shift, self._shift_from)
+
+    def stmt_start(self, idx):
+        if idx >= self._shift_from:
+            return self._stmt_starts[idx] + self._token_shift
+        return self._stmt_starts[idx]
+
+    def stmt_end(self, idx):
+        if idx >= self._shift_from:
+            return self._stmt_ends[idx] + self._token_shift
+        return self._stmt_ends[idx]
+
+    # Moves statement idx, its tokens and its AST nodes, by line_delta lines
+    def shift_lines(self, idx, line_delta):
+        symtokens = self._symtokens
+        for pos in range(self._stmt_starts[idx], self._stmt_ends[idx]):
+            symtokens[pos].shift_line(line_delta)
+        st = self._stmt_nodes[idx]
+        if st != None:
+            st.shift_line(line_delta)
+
+    # Makes the pending shift apply from statement idx on. Statements
+    # between the old and the new boundary are shifted (or unshifted)
+    # now, so this costs the tokens between two consecutive edits. A
+    # Diagnostic carries its line in its message too: the statements
+    # with a syntax error are parsed again once they are in place.
+    def move_shift_to(self, idx):
+        starts = self._stmt_starts
+        ends = self._stmt_ends
+        token_shift = self._token_shift
+        line_shift = self._line_shift
+        if self._shift_from < idx:
+            for pos in range(self._shift_from, idx):
+                starts[pos] = starts[pos] + token_shift
+                ends[pos] = ends[pos] + token_shift
+                if line_shift != 0:
+                    self.shift_lines(pos, line_shift)
+                if self._stmt_diags[pos] != None:
+                    self._stmt_diags[pos] = self.parse_region(starts[pos], ends[pos])[3][0]
+        elif token_shift != 0 or line_shift != 0:
+            for pos in range(idx, self._shift_from):
+                if line_shift != 0:
+                    self.shift_lines(pos, -line_shift)
+                starts[pos] = starts[pos] - token_shift
+                ends[pos] = ends[pos] - token_shift
+        self._shift_from = idx
+
+    # Applies a TokenEdit (see tokenizer.incremental) to the tokens that
+    # were parsed, new_tokens being the TokenItem[] that replace tokens
+    # [edit.start, edit.old_end) (IncrementalTokenizer.edited_tokens()).
+    # Statements end at a LINE_END and edits cover whole lines, so only
+    # the statements overlapping the edited tokens are parsed again; the
+    # others keep their AST nodes. The statements that follow the edit
+    # only get their new token indexes and lines (see move_shift_to())
+    # when they are needed: by the next edit as far as it reaches, or
+    # by statements() and diagnostics.
+    def reparse(self, edit, new_tokens):
+        symtokens = self._symtokens
+        if not isinstance(symtokens, list):
+            symtokens = list(symtokens)
+            self._symtokens = symtokens
+
+        # Statements [first, last) overlap the tokens [edit.start, edit.old_end)
+        first = self.stmt_after(self._stmt_ends, edit.start)
+        last = self.stmt_after(self._stmt_starts, edit.old_end, bisect_left)
+        self.move_shift_to(last)
+        lo = edit.start
+        hi = edit.old_end
+        if first < last:
+            lo = min(lo, self.stmt_start(first))
+            hi = max(hi, self.stmt_end(last - 1))
+        delta = edit.delta
+
+        # Only the statements that follow move to other lines
+        line_delta = 0
+        if edit.old_end < len(symtokens) and symtokens[edit.old_end].symtype != SymbolType.INPUT_END:
+            line_delta = edit.line_delta
+
+        symtokens[edit.start:edit.old_end] = symbolized(new_tokens)
+        new_starts, new_ends, nodes, diags = self.parse_region(lo, hi + delta)
+
+        self._stmt_starts[first:last] = new_starts
+        self._stmt_ends[first:last] = new_ends
+        self._stmt_nodes[first:last] = nodes
+        self._stmt_diags[first:last] = diags
+        self._shift_from = first + len(nodes)
+        self._token_shift = self._token_shift + delta
+        self._line_shift = self._line_shift + line_delta
+        self._diagnostics_stale = True
+        if tr.parser >= INFO:
+            tr.log("Parsed %d statement(s) again for %s" % (len(nodes), edit))
+        return StatementEdit(first, last - first, len(nodes))
+
+    # Same statements as parse(), each one yielded as soon as it has
+    # been parsed. Only the tokens of the statement being parsed are
+    # kept, so with a streaming token source memory use does not grow
+    # with the input.
+    def iter_statements(self):
+        self._diagnostics = []
+        if tr.rules >= DEBUG:
+            self._rules.show_all_rules()
+        p = StreamParser(self._symtokens, self._rules)
+        while p.has_tokens():
+            st = self.parse_one(p)
+            p.release()
+            if st != None:
+                yield st
 
 class Parser:
-    def __init__(self, symtokens, rule_provider):
+    # rules: RuleTable
+    def __init__(self, symtokens, rules):
         self._symtokens = symtokens
         self._pos = 0
         self._ntx = len(symtokens)
-        self._rule_provider = rule_provider
+        self._rules = rules
         self._eof = False
 
+    @property
+    def rules(self):
+        return self._rules
+
     @property
     def rule_provider(self):
-        return self._rule_provider
+        return self._rules.provider
+
+    # Index of the current token
+    @property
+    def position(self):
+        return self._pos
 
     def has_tokens(self):
         if self._eof:
             return False
-        return self._pos < self._ntx
+        if self._pos >= self._ntx:
+            return False
+        # Only the INPUT_END left, as in an empty program
+        if self._symtokens[self._pos].symtype == SymbolType.INPUT_END:
+            self._eof = True
+            return False
+        return True
 
     def current_token(self):
         if not self.has_tokens:
-            print("current_token() -> None")
+            if tr.parser >= TRACE:
+                tr.log("current_token() -> None")
             return None
         symtok = self._symtokens[self._pos]
         # print("pos: %d  current_token() -> %s" % (self._pos, symtok))
@@ -133,11 +441,23 @@ class Parser:
         if symtok.symtype != type_to_skip:
             if err_msg == '':
                 err_msg = "Expected %s - saw %s" % (type_to_skip.name, symtok)
-            raise Exception(err_msg)
-        print("skipping: %s" % symtok)
-        print("")
+            raise ParseError(diagnostic_at(symtok, err_msg))
+        if tr.parser >= TRACE:
+            tr.log("skipping: %s\n" % symtok)
         self.advance()
 
+    # Panic mode: skips what is left of the statement after a syntax
+    # error, up to and including its LINE_END
+    def synchronize(self):
+        while self.has_tokens():
+            symtype = self.current_token().symtype
+            if symtype == SymbolType.INPUT_END:
+                self._eof = True
+                return
+            self.advance()
+            if symtype == SymbolType.LINE_END:
+                return
+
     def advance(self):
         idx = self._pos + 1
         if idx <= self._ntx:
@@ -145,12 +465,97 @@ class Parser:
             symtok = self._symtokens[self._pos]
             if symtok.symtype == SymbolType.INPUT_END:
                 self._eof = True
+            if tr.parser >= TRACE:
+                if self._eof:
+                    tr.log("reached eof\n")
+                else:
+                    tr.log("advanced to: %s" % symtok)
+        return
+
+# ----------------------------------------------------------------------
+# StreamParser {
+#   _source  iterator the SymTokens are read from
+#   _window  SymTokens read but not yet released, from index _base on
+#   _base    index (in the whole stream) of _window[0]
+#   _ended   whether _source is exhausted
+# }
+# A Parser that reads its SymTokens on demand; release() drops the
+# tokens that were consumed (all but the one before the current one,
+# for peek_prev_token)
+# ----------------------------------------------------------------------
+class StreamParser(Parser):
+    def __init__(self, symtokens, rules):
+        # The Parser's own token list stays empty: tokens are read
+        # through token_at()
+        super().__init__([], rules)
+        self._source = iter(symtokens)
+        self._window = []
+        self._base = 0
+        self._ended = False
+
+    # Number of SymTokens held right now
+    @property
+    def buffered(self):
+        return len(self._window)
+
+    # Reads up to token idx; False when the input ends before it
+    def fill(self, idx):
+        window = self._window
+        while idx - self._base >= len(window):
+            if self._ended:
+                return False
+            symtok = next(self._source, None)
+            if symtok == None:
+                self._ended = True
+                return False
+            window.append(symtok)
+        return True
+
+    def token_at(self, idx):
+        if idx < self._base or not self.fill(idx):
+            return None
+        return self._window[idx - self._base]
+
+    def has_tokens(self):
+        if self._eof:
+            return False
+        symtok = self.token_at(self._pos)
+        if symtok == None or symtok.symtype == SymbolType.INPUT_END:
+            self._eof = True
+            return False
+        return True
+
+    def current_token(self):
+        return self.token_at(self._pos)
+
+    def peek_prev_token(self):
+        return self.token_at(self._pos - 1)
+
+    def peek_next_token(self):
+        return self.token_at(self._pos + 1)
+
+    def advance(self):
+        idx = self._pos + 1
+        if not self.fill(idx):
+            # No INPUT_END at the end of the stream
+            self._pos = idx
+            self._eof = True
+            return
+        self._pos = idx
+        symtok = self._window[idx - self._base]
+        if symtok.symtype == SymbolType.INPUT_END:
+            self._eof = True
+        if tr.parser >= TRACE:
             if self._eof:
-                print("reached eof")
-                print("")
+                tr.log("reached eof\n")
             else:
-                print("advanced to: %s" % symtok)
-        return
+                tr.log("advanced to: %s" % symtok)
+
+    def release(self):
+        keep_from = self._pos - 1
+        if keep_from > self._base:
+            del self._window[:keep_from - self._base]
+            self._base = keep_from
 
 # ---------------------------------------------------------------------- 
 # Literals
@@ -254,12 +659,110 @@ def create_rule_provider():
 
     return rule_provider
 
-def pratt_parse_program(file_path):
-    tokens = tokenize_program(file_path)
+# The rules never change while running, so they are registered and
+# frozen into a RuleTable once per process
+process_rule_table = None
+
+def frozen_rule_table():
+    global process_rule_table
+    if process_rule_table == None:
+        process_rule_table = create_rule_provider().freeze()
+    return process_rule_table
+
+# jobs > 1 packs PACKED on that many processes
+def tokens_for_program(file_path, engine=LexerEngine.CLASSIC, jobs=1):
+    if engine == LexerEngine.MAPPED:
+        return tokenize_mapped(file_path)
+    if engine == LexerEngine.PACKED:
+        if jobs > 1:
+            return pack_parallel(file_path, jobs)
+        return pack_program(file_path)
+    if engine == LexerEngine.FUSED:
+        return symbolize_program(file_path)
+    if engine == LexerEngine.VECTOR:
+        return pack_vectorized(file_path)
+    return tokenize_program(file_path, engine)
+
+# Same tokens as tokens_for_program(), read as they are lexed where
+# the engine allows it (all but PACKED and VECTOR)
+def token_stream_for_program(file_path, engine=LexerEngine.CLASSIC, jobs=1):
+    if engine == LexerEngine.MAPPED:
+        return iter_mapped_tokens(file_path)
+    if engine == LexerEngine.FUSED:
+        return iter_symbol_tokens(file_path)
+    if engine == LexerEngine.PACKED or engine == LexerEngine.VECTOR:
+        return iter(tokens_for_program(file_path, engine, jobs))
+    return iter_tokens(file_path, engine)
+
+# Yields the statements of the program one at a time, while reading it
+def iter_pratt_program(file_path, engine=LexerEngine.CLASSIC, jobs=1):
+    parseInfo = FileParser(file_path, token_stream_for_program(file_path, engine, jobs))
+    yield from parseInfo.iter_statements()
+
+# ------------------------------------------------------------
+# Parallel parsing: a top-level statement ends at its LINE_END and
+# every line with tokens ends with one, so a chunk of whole lines
+# parses on its own. Workers lex and parse their chunk and send back
+# the statements, whose SymTokens are interned again in the parent,
+# and their diagnostics, which the parent reports in source order.
+# ------------------------------------------------------------
+
+# Worker: file path -> first_lno -> line[] -> entry ScanContext
+#   -> ((statement[], Diagnostic[]), exit ScanContext)
+def parse_chunk(file_path, first_lno, lines, entry_state):
+    tokens, exit_state = lex_chunk(first_lno, lines, entry_state)
+    tokens.append(TokenItem(Token.INPUT_END))
+    parseInfo = FileParser(file_path, tokens)
+    parseInfo.report = False
+    statements = parseInfo.parse()
+    return (statements, parseInfo.diagnostics), exit_state
+
+# Same as parse_program_file(file_path, LexerEngine.REGEX), the chunks
+# being parsed on a process pool and merged back in source order
+def parse_parallel(file_path, jobs):
+    lines = read_all_lines(file_path)
+    # Receiving the statements allocates many objects that all live on,
+    # which the cyclic collector would keep scanning for nothing
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        parts = run_chunks(partial(parse_chunk, file_path), split_into_chunks(lines, jobs), jobs)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    statements = []
+    diagnostics = []
+    for part_statements, part_diagnostics in parts:
+        statements.extend(part_statements)
+        diagnostics.extend(part_diagnostics)
+    if tr.parser >= INFO:
+        tr.log('Parsed %d line(s) from "%s" on %d worker(s)' % (len(lines), file_path, jobs))
+    return statements, diagnostics
+
+# -> (statement[], Diagnostic[]): every statement that parsed, plus
+# one Diagnostic per statement that did not.
+# jobs > 1 with the REGEX engine lexes and parses on that many processes
+def parse_program_file(file_path, engine=LexerEngine.CLASSIC, jobs=1):
+    if engine == LexerEngine.REGEX and jobs > 1:
+        parsed_result, diagnostics = parse_parallel(file_path, jobs)
+        if len(diagnostics) > 0 and tr.parser >= ERROR:
+            for diagnostic in diagnostics:
+                tr.log(diagnostic.format(file_path))
+            tr.log('%d syntax error(s) in "%s"' % (len(diagnostics), file_path))
+        return parsed_result, diagnostics
+    tokens = tokens_for_program(file_path, engine, jobs)
     tk_count = len(tokens)
-    if tk_count > 0:
-        print('%i <Pratt> tokens found in "%s"' % (tk_count, file_path))
+    if tk_count > 0 and tr.lexer >= INFO:
+        tr.log('%i <Pratt> tokens found in "%s"' % (tk_count, file_path))
     parseInfo = FileParser(file_path, tokens)
-    parseInfo.show_symtokens()
+    if tr.symbols >= DEBUG:
+        parseInfo.show_symtokens()
     parsed_result = parseInfo.parse()
+    diagnostics = parseInfo.diagnostics
+    if len(diagnostics) > 0 and tr.parser >= ERROR:
+        tr.log('%d syntax error(s) in "%s"' % (len(diagnostics), file_path))
+    return parsed_result, diagnostics
+
+def pratt_parse_program(file_path, engine=LexerEngine.CLASSIC, jobs=1):
+    parsed_result, diagnostics = parse_program_file(file_path, engine, jobs)
     return parsed_result
@@ -1,11 +1,16 @@
 from parser.rules import (
-    BindingPower,
+    DEFAULT_BP,
 )
 
 from parser.symbols import (
     SymbolType,
 )
 
+from parser.diagnostics import (
+    ParseError,
+    diagnostic_at,
+)
+
 from ast.expressions import (
     IntegerExpr,
     FloatExpr,
@@ -21,35 +26,32 @@ from ast.expressions import (
 def parse_primary_expr(p):
     symtok = p.current_token()
     expr = None
-    if symtok.symtype == SymbolType.LITERAL_INTEGER:
-        expr = IntegerExpr(symtok)
-    elif symtok.symtype == SymbolType.LITERAL_FLOAT:
-        expr = FloatExpr(symtok)
-    elif symtok.symtype == SymbolType.LITERAL_BOOL:
-        expr = BoolExpr(symtok)
-    elif symtok.symtype == SymbolType.LITERAL_STRING:
-        expr = StringExpr(symtok)
-    elif symtok.symtype == SymbolType.IDENTIFIER:
-        expr = IdentifierExpr(symtok)
+    symtype = symtok.symtype
+    if symtype == SymbolType.LITERAL_INTEGER:
+        expr = IntegerExpr(symtok.symvalue, symtok.line, symtok.col)
+    elif symtype == SymbolType.LITERAL_FLOAT:
+        expr = FloatExpr(symtok.symvalue, symtok.line, symtok.col)
+    elif symtype == SymbolType.LITERAL_BOOL:
+        expr = BoolExpr(symtok.symvalue, symtok.line, symtok.col)
+    elif symtype == SymbolType.LITERAL_STRING:
+        expr = StringExpr(symtok.symvalue, symtok.line, symtok.col)
+    elif symtype == SymbolType.IDENTIFIER:
+        expr = IdentifierExpr(symtok.symid, symtok.line, symtok.col)
     else:
         expr = None
     p.advance()
     return expr
 
-# Parser -> ast.Expr -> BindingPower -> ast.Expr
+# Parser -> ast.Expr -> int bp -> ast.Expr
 # and advances the parser position
 def parse_binary_expr(p, left_expr, left_bp):
     operator = p.current_token()
-    rp = p.rule_provider
-    operator_bp = rp.bp_for_token_type(operator.symtype)
+    operator_bp = p.rules.bps[operator.symcode]
     p.advance()
     right_expr = parse_expr(p, operator_bp) # PH - was left_bp
-    if right_expr is None:
-        print("Unable to parse_expr() to deliver right_expr")
-        return None
-    return BinaryExpr(operator, left_expr, right_expr)
+    return BinaryExpr(operator.symtype, left_expr, right_expr, operator.line, operator.col)
 
-# Parser -> BindingPower -> ast.Expr
+# Parser -> int bp -> ast.Expr
 # bp is highest value bp seen so far
 def parse_expr(p, overall_bp):
 
@@ -57,11 +59,10 @@ def parse_expr(p, overall_bp):
 
     # Check if there is a NullDenoted handler for
     # this type of token
-    rp = p.rule_provider
-    null_rule = rp.null_rule_for_token_type(symtok.symtype)
+    rt = p.rules
+    null_rule = rt.null_handlers[symtok.symcode]
     if null_rule == None:
-        print("ERROR: Expected a symbol with a NullDenoted handler - %s" % symtok)
-        return None
+        raise ParseError(diagnostic_at(symtok, "Expected a symbol with a NullDenoted handler - %s" % symtok))
 
     # Use the null_rule to parse this as the left node
     # (which also will advance the parser pos)
@@ -69,17 +70,18 @@ def parse_expr(p, overall_bp):
     left_node = null_rule(p)
 
     symtok = p.current_token()
-    next_bp = rp.bp_for_token_type(symtok.symtype)
+    bps = rt.bps
+    next_bp = bps[symtok.symcode]
 
     # Fast-forward to the right, within this expr to find the
     # operator with the highest binding power seen so far
     # for something like "10 + 4" this will fast forward to the 4, 
     # but 
-    while next_bp != None and (next_bp.value > overall_bp.value):
-        left_rule = rp.left_rule_for_token_type(symtok.symtype)
+    # (tokens without a binding power have NO_BP, below any overall_bp)
+    while next_bp > overall_bp:
+        left_rule = rt.left_handlers[symtok.symcode]
         if left_rule == None:
-            print("ERROR: Expected a symbol with a LeftDenoted handler - %s" % symtok)
-            return None
+            raise ParseError(diagnostic_at(symtok, "Expected a symbol with a LeftDenoted handler - %s" % symtok))
 
         # Use the left_rule to parse this as the 
         # new left node (which incorporates the previous left node)
@@ -90,11 +92,11 @@ def parse_expr(p, overall_bp):
         # Since the parser has been advanced,
         # get the new current_token
         symtok = p.current_token()
-        next_bp = rp.bp_for_token_type(symtok.symtype)
+        next_bp = bps[symtok.symcode]
 
     return left_node
 
-# Parser -> ast.Expr -> BindingPower -> ast.Expr
+# Parser -> ast.Expr -> int bp -> ast.Expr
 def parse_assignment_expr(p, left_expr, bp):
     p.advance()
     rhs = parse_expr(p, bp)
@@ -104,7 +106,7 @@ def parse_assignment_expr(p, left_expr, bp):
 # Parser -> ast.Expr
 def parse_grouping_expr(p):
     p.skip_one(SymbolType.LEFT_PAREN)
-    grouped_expr = parse_expr(p, BindingPower.DEFAULT_BP)
+    grouped_expr = parse_expr(p, DEFAULT_BP)
     p.skip_one(SymbolType.RIGHT_PAREN)
     return grouped_expr
 
@@ -0,0 +1,489 @@
+from array import array
+from bisect import bisect_right
+
+from tokenizer.tokens import (
+    Token,
+    LexerEngine,
+    ScanContext,
+    escaped_char_regex,
+    scan_line,
+    scan_line_texts,
+)
+
+from tokenizer.spans import (
+    SpanForm,
+)
+
+from tokenizer.tools import (
+    open_source,
+    iter_lines,
+)
+
+from tokenizer.names import (
+    intern_name,
+)
+
+from tokenizer.incremental import (
+    lex_line,
+)
+
+from tokenizer.parallel import (
+    read_all_lines,
+    split_into_chunks,
+    run_chunks,
+    default_workers,
+)
+
+from parser.symbols import (
+    SymbolType,
+    symbol_types,
+    symbol_codes,
+    operator_symbols,
+    keyword_symbols,
+    numeric_type,
+    classify_token_item,
+    restore_symtoken,
+    symbol_type_name,
+)
+
+from tracing import (
+    tr,
+    INFO,
+)
+
+# line -> offset of the opening quote -> (offset in line, length, SpanForm)
+# of the quoted text, up to where the Tokenizer stopped
+def quoted_span(line, off):
+    quote = line[off]
+    off = off + 1
+    end = off
+    n = len(line)
+    while end < n and line[end] != quote:
+        if line[end] == '\\':
+            if end + 1 >= n:
+                break
+            end = end + 1
+        end = end + 1
+    form = SpanForm.RAW
+    if line.find('\\', off, end) >= 0:
+        form = SpanForm.ESCAPED
+    return off, end - off, form
+
+# line -> offset of the '0x' -> NUMERIC text -> (offset in line, length,
+# SpanForm) of the hex digits
+def hex_span(line, off, text):
+    off = off + 1
+    while line[off] == 'x':
+        off = off + 1
+    return off, len(text) - 1, SpanForm.HEX
+
+# line -> TokenItem -> (offset in line, length, SpanForm)
+def span_in_line(line, tk_item):
+    off = tk_item.col - 1
+    tk = tk_item.t
+    if tk == Token.QTEXT:
+        return quoted_span(line, off)
+    if tk == Token.NUMERIC:
+        if line.startswith('0x', off):
+            return hex_span(line, off, tk_item.v)
+        return off, len(tk_item.v), SpanForm.DECIMAL
+    if tk == Token.LIST_BEGIN or tk == Token.LIST_END:
+        return off, 1, SpanForm.RAW
+    return off, len(tk_item.v), SpanForm.RAW
+
+# name_ids entry of a token that is not an identifier
+NO_NAME = 0
+
+# Dense codes of the kinds pack_texts() sets most often
+IDENTIFIER_CODE = symbol_codes[SymbolType.IDENTIFIER]
+STRING_CODE = symbol_codes[SymbolType.LITERAL_STRING]
+LEFT_PAREN_CODE = symbol_codes[SymbolType.LEFT_PAREN]
+RIGHT_PAREN_CODE = symbol_codes[SymbolType.RIGHT_PAREN]
+UNKNOWN_CODE = symbol_codes[None]
+
+# operator text -> dense code, keyword text -> dense code
+operator_codes = {}
+for text, st in operator_symbols.items():
+    operator_codes[text] = symbol_codes[st]
+keyword_codes = {}
+for text, (st, val) in keyword_symbols.items():
+    keyword_codes[text] = symbol_codes[st]
+
+# SymbolType -> token text -> native value (as in classify_token_item)
+def value_for_symbol(st, text):
+    if st == SymbolType.LITERAL_INTEGER:
+        return int(text)
+    if st == SymbolType.LITERAL_FLOAT:
+        return float(text)
+    if st == SymbolType.LITERAL_BOOL:
+        return text == 'true'
+    return text
+
+# ----------------------------------------------------------------------
+# TokenBuffer {
+#   kinds    array('B') dense SymbolType code per token
+#   forms    array('B') SpanForm per token
+#   offsets  array('I') offset of the token text in the source text
+#   lengths  array('I') length of the token text
+#   name_ids array('H') index into names of an identifier, NO_NAME
+#            otherwise (array('I') once there are too many names)
+#
+#   names    identifier texts of the buffer, each once, after None
+#   symids   interned name id of each entry of names (None first);
+#            only valid in the process that built the buffer, extend()
+#            interns the names of a buffer built elsewhere again
+#
+#   Line table, one entry per source line that produced tokens:
+#   line_first   array('I') index of the first token of the line
+#   line_starts  array('I') offset of the line in the source text
+#   line_numbers array('I') line number of the line
+# }
+# A token costs 12 bytes instead of a TokenItem plus a SymToken.
+# Indexing yields a TokenView, which the Parser uses like a SymToken.
+# ----------------------------------------------------------------------
+class TokenBuffer:
+    def __init__(self):
+        self.kinds = array('B')
+        self.forms = array('B')
+        self.offsets = array('I')
+        self.lengths = array('I')
+        self.name_ids = array('H')
+        self.names = [None]
+        self.symids = [None]
+        self._name_index = {}
+        self.line_first = array('I')
+        self.line_starts = array('I')
+        self.line_numbers = array('I')
+        self._chunks = []
+        self._text_len = 0
+        self._text = None
+        self._ended = False
+
+    # Appends text to the source text of the buffer -> its offset there
+    def add_text(self, text):
+        base = self._text_len
+        self._chunks.append(text)
+        self._text_len = base + len(text)
+        return base
+
+    # Starts the line table entry of line lno, at offset base of the text
+    def start_line(self, lno, base):
+        self.line_first.append(len(self.kinds))
+        self.line_starts.append(base)
+        self.line_numbers.append(lno)
+
+    def add_token(self, st, form, offset, length, name_idx=NO_NAME):
+        self.kinds.append(symbol_codes[st])
+        self.forms.append(form)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.name_ids.append(name_idx)
+
+    # Packs the tokens of a (non comment, non empty) source line
+    def add_line(self, lno, line):
+        base = self.add_text(line)
+        self.add_text('\n')
+        if line.isascii():
+            self.pack_texts(lno, line, base, scan_line_texts(line))
+        else:
+            self.pack_token_items(lno, line, base, scan_line(lno, line))
+
+    # lno -> line -> offset of the line in the text
+    #   -> [(Token, text, col)] of scan_line_texts(line)
+    # The text and column of each token are all it takes: no TokenItem
+    # is built, and only quoted and hex tokens look at the line again.
+    def pack_texts(self, lno, line, base, texts):
+        self.start_line(lno, base)
+        kinds = self.kinds.append
+        forms = self.forms.append
+        offsets = self.offsets.append
+        lengths = self.lengths.append
+        name_ids = self.name_ids.append
+        name_index = self._name_index
+        for tk, text, col in texts:
+            off = col - 1
+            length = len(text)
+            form = SpanForm.RAW
+            name_idx = NO_NAME
+            if tk == Token.TEXT:
+                code = keyword_codes.get(text, IDENTIFIER_CODE)
+                if code == IDENTIFIER_CODE:
+                    name_idx = name_index.get(text)
+                    if name_idx == None:
+                        name_idx = self.name_index(text)
+                        # (name_ids may have been widened)
+                        name_ids = self.name_ids.append
+            elif tk == Token.SYMBOL:
+                code = operator_codes.get(text, UNKNOWN_CODE)
+            elif tk == Token.NUMERIC:
+                code = symbol_codes[numeric_type(text)]
+                form = SpanForm.DECIMAL
+                if line.startswith('0x', off):
+                    off, length, form = hex_span(line, off, text)
+            elif tk == Token.QTEXT:
+                code = STRING_CODE
+                off, length, form = quoted_span(line, off)
+            elif tk == Token.LIST_BEGIN:
+                code = LEFT_PAREN_CODE
+                length = 1
+            else:
+                code = RIGHT_PAREN_CODE
+                length = 1
+            kinds(code)
+            forms(form)
+            offsets(base + off)
+            lengths(length)
+            name_ids(name_idx)
+        self.add_token(SymbolType.LINE_END, SpanForm.RAW, base + len(line), 0)
+
+    # Same as pack_texts(), from the TokenItems of the line (including
+    # its LINE_END), for lines the Tokenizer lexes (non-ASCII text)
+    def pack_token_items(self, lno, line, base, tokens):
+        self.start_line(lno, base)
+        for tk_item in tokens:
+            st, val = classify_token_item(tk_item)
+            off, length, form = span_in_line(line, tk_item)
+            name_idx = NO_NAME
+            if st == SymbolType.IDENTIFIER:
+                name_idx = self.name_index(val)
+            self.add_token(st, form, base + off, length, name_idx)
+
+    # Drops the tokens from index n on, which must all belong to a
+    # line that is not in the line table yet
+    def truncate(self, n):
+        del self.kinds[n:]
+        del self.forms[n:]
+        del self.offsets[n:]
+        del self.lengths[n:]
+        del self.name_ids[n:]
+
+    # identifier text -> index into names
+    def name_index(self, name):
+        idx = self._name_index.get(name)
+        if idx == None:
+            idx = len(self.names)
+            self._name_index[name] = idx
+            self.names.append(name)
+            self.symids.append(intern_name(name))
+            if idx > 0xFFFF and self.name_ids.typecode == 'H':
+                self.name_ids = array('I', self.name_ids)
+        return idx
+
+    # Append the tokens of a buffer built for the lines that follow
+    # (e.g. by another process); other must not be ended yet
+    def extend(self, other):
+        token_base = len(self.kinds)
+        text_base = self._text_len
+        self.kinds.extend(other.kinds)
+        self.forms.extend(other.forms)
+        self.lengths.extend(other.lengths)
+        self.offsets.extend(array('I', [off + text_base for off in other.offsets]))
+        self.line_starts.extend(array('I', [off + text_base for off in other.line_starts]))
+        self.line_first.extend(array('I', [idx + token_base for idx in other.line_first]))
+        self.line_numbers.extend(other.line_numbers)
+
+        remap = [NO_NAME] + [self.name_index(name) for name in other.names[1:]]
+        self.name_ids.extend(array(self.name_ids.typecode, [remap[idx] for idx in other.name_ids]))
+
+        self._chunks.extend(other._chunks)
+        self._text_len = text_base + other._text_len
+
+    def mark_end_of_input(self):
+        self.add_token(SymbolType.INPUT_END, SpanForm.RAW, self._text_len, 0)
+        self._text = ''.join(self._chunks)
+        self._chunks = []
+        self._ended = True
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx = idx + len(self.kinds)
+        if idx < 0 or idx >= len(self.kinds):
+            raise IndexError('TokenBuffer index out of range')
+        return TokenView(self, idx)
+
+    def __iter__(self):
+        for idx in range(len(self.kinds)):
+            yield TokenView(self, idx)
+
+    def symtype_at(self, idx):
+        return symbol_types[self.kinds[idx]]
+
+    def text_at(self, idx):
+        off = self.offsets[idx]
+        text = self._text[off:off + self.lengths[idx]]
+        form = self.forms[idx]
+        if form == SpanForm.ESCAPED:
+            text = escaped_char_regex.sub(r'\1', text)
+        elif form == SpanForm.DECIMAL:
+            text = text.replace('E', 'e')
+        elif form == SpanForm.HEX:
+            text = '0' + text
+        return text
+
+    def value_at(self, idx):
+        return value_for_symbol(self.symtype_at(idx), self.text_at(idx))
+
+    def symid_at(self, idx):
+        return self.symids[self.name_ids[idx]]
+
+    def is_input_end(self, idx):
+        return self._ended and idx == len(self.kinds) - 1
+
+    # index into the line table for token idx
+    def line_entry(self, idx):
+        return bisect_right(self.line_first, idx) - 1
+
+    def line_at(self, idx):
+        if self.is_input_end(idx):
+            return 0
+        return self.line_numbers[self.line_entry(idx)]
+
+    def col_at(self, idx):
+        if self.is_input_end(idx):
+            return 0
+        entry = self.line_entry(idx)
+        col = self.offsets[idx] - self.line_starts[entry] + 1
+        form = self.forms[idx]
+        if symbol_types[self.kinds[idx]] == SymbolType.LITERAL_STRING:
+            col = col - 1 # the opening quote
+        elif form == SpanForm.HEX:
+            col = self._text.rfind('0', 0, self.offsets[idx]) - self.line_starts[entry] + 1
+        return col
+
+    def nbytes(self):
+        total = 0
+        for arr in (self.kinds, self.forms, self.offsets, self.lengths, self.name_ids, \
+                    self.line_first, self.line_starts, self.line_numbers):
+            total = total + arr.itemsize * len(arr)
+        return total
+
+# ----------------------------------------------------------------------
+# End class TokenBuffer
+# ----------------------------------------------------------------------
+
+# ----------------------------------------------------------------------
+# TokenView {
+#   _buf TokenBuffer
+#   _idx index of the token
+# }
+# Read-only stand-in for a SymToken; everything is read from _buf.
+# ----------------------------------------------------------------------
+class TokenView:
+    __slots__ = ('_buf', '_idx')
+
+    def __init__(self, buf, idx):
+        self._buf = buf
+        self._idx = idx
+
+    def __str__(self):
+        base_name = "SymbolType.%s" % symbol_type_name(self.symtype)
+        loc_info = "[%d:%d]" % (self.line, self.col)
+        val = self.symvalue
+        if val != '':
+            base_name = "%s(%s)" % (base_name, val)
+        return "%s%s" % (base_name, loc_info)
+
+    # Pickled as a plain SymToken rather than along with all of _buf
+    def __reduce__(self):
+        return (restore_symtoken, (self.symtype, self.symvalue, self.line, self.col))
+
+    @property
+    def index(self):
+        return self._idx
+
+    @property
+    def symtype(self):
+        return self._buf.symtype_at(self._idx)
+
+    @property
+    def symvalue(self):
+        return self._buf.value_at(self._idx)
+
+    @property
+    def symcode(self):
+        return self._buf.kinds[self._idx]
+
+    @property
+    def symid(self):
+        return self._buf.symid_at(self._idx)
+
+    @property
+    def line(self):
+        return self._buf.line_at(self._idx)
+
+    @property
+    def col(self):
+        return self._buf.col_at(self._idx)
+
+    def isinteger(self):
+        return self.symtype == SymbolType.LITERAL_INTEGER
+
+    def isfloat(self):
+        return self.symtype == SymbolType.LITERAL_FLOAT
+
+    def isbool(self):
+        return self.symtype == SymbolType.LITERAL_BOOL
+
+    def isstring(self):
+        return self.symtype == SymbolType.LITERAL_STRING
+
+    def isnil(self):
+        return self.symtype == SymbolType.LITERAL_NIL
+
+# source: file path, '-' for stdin, or an open text file
+def pack_program(source):
+    tb = TokenBuffer()
+    fo, should_close = open_source(source)
+    lno = 0
+    try:
+        if fo != None:
+            for line in iter_lines(fo):
+                lno = lno + 1
+                if not line.startswith("//") and len(line) > 0:
+                    tb.add_line(lno, line)
+    finally:
+        if should_close:
+            fo.close()
+
+    if tr.lexer >= INFO:
+        suffix = 's'
+        if lno == 1:
+            suffix = ''
+        tr.log('Packed %d line%s from "%s"' % (lno, suffix, source))
+
+    tb.mark_end_of_input()
+    return tb
+
+# Worker: first_lno -> line[] -> entry ScanContext
+#   -> (TokenBuffer, exit ScanContext)
+# A TokenBuffer pickles as a handful of arrays and strings, so it is
+# cheap to ship back to the parent, unlike one object per token.
+def pack_chunk(first_lno, lines, entry_state):
+    tb = TokenBuffer()
+    lno = first_lno
+    for line in lines:
+        if entry_state != ScanContext.IN_NOTHING:
+            run, entry_state = lex_line(lno, line, entry_state, LexerEngine.REGEX)
+            if len(run) > 0:
+                tb.pack_token_items(lno, line, tb.add_text(line + '\n'), run)
+        elif not line.startswith("//") and len(line) > 0:
+            tb.add_line(lno, line)
+        lno = lno + 1
+    return tb, entry_state
+
+# Same TokenBuffer as pack_program(source), packed on a process pool
+def pack_parallel(source, workers=None):
+    if workers == None:
+        workers = default_workers()
+    lines = read_all_lines(source)
+    parts = run_chunks(pack_chunk, split_into_chunks(lines, workers), workers)
+    tb = TokenBuffer()
+    for part in parts:
+        tb.extend(part)
+    tb.mark_end_of_input()
+    if tr.lexer >= INFO:
+        tr.log('Packed %d line(s) from "%s" on %d worker(s)' % (len(lines), source, workers))
+    return tb
@@ -2,7 +2,16 @@
 # Parsing rules
 from enum import Enum
 
-from parser.symbols import SymbolType
+from parser.symbols import (
+    SymbolType,
+    symbol_types,
+    symbol_codes,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+)
 
 class BindingPower(Enum):
 	DEFAULT_BP = 0
@@ -17,6 +26,10 @@ class BindingPower(Enum):
 	MEMBER = 90
 	PRIMARY = 100
 
+# Plain-int binding powers for the Pratt loop (see RuleTable.bps)
+DEFAULT_BP = BindingPower.DEFAULT_BP.value
+NO_BP = -1 # the token ends an expression
+
 class HandlerType(Enum):
     NULL_DENOTED = 0
     LEFT_DENOTED = 1
@@ -80,7 +93,7 @@ class StatementRule(Rule):
 # NodeType Handlers
 # ----------------------------------------------------------------------
 # null_handler: Parser -> ast.Expr
-# left_handler  Parser -> ast.Expr -> bp BindingPower -> ast.Expr
+# left_handler  Parser -> ast.Expr -> int bp -> ast.Expr
 # statement_handler Parser -> ast.Stmt
 # ----------------------------------------------------------------------
 class RuleProvider:
@@ -99,7 +112,8 @@ class RuleProvider:
         elif isinstance(rule, StatementRule):
             self.stmt_rules[ntype] = rule
         else:
-            print("Unknown rule type: ", rule)
+            if tr.rules >= ERROR:
+                tr.log("Unknown rule type: %s" % rule)
             return
         self.all_bps[ntype] = rule.bp
    
@@ -138,3 +152,43 @@ class RuleProvider:
     def bp_for_token_type(self, ntype):
         result = self.all_bps.get(ntype) 
         return result
+
+    def freeze(self):
+        return RuleTable(self)
+
+# ----------------------------------------------------------------------
+# RuleTable {
+#   null_handlers symbol code -> null_handler or None
+#   left_handlers symbol code -> left_handler or None
+#   stmt_handlers symbol code -> statement_handler or None
+#   bps           symbol code -> int binding power, NO_BP if none
+#   provider      RuleProvider the table was frozen from
+# }
+# A RuleProvider compiled into tuples indexed by SymToken.symcode, so
+# the Pratt loop needs no hashing and no Enum comparisons per token.
+# ----------------------------------------------------------------------
+class RuleTable:
+    __slots__ = ('null_handlers', 'left_handlers', 'stmt_handlers', 'bps', 'provider')
+
+    def __init__(self, provider):
+        n = len(symbol_types)
+        null_handlers = [None] * n
+        left_handlers = [None] * n
+        stmt_handlers = [None] * n
+        bps = [NO_BP] * n
+        for ntype, rule in provider.null_rules.items():
+            null_handlers[symbol_codes[ntype]] = rule.handler
+        for ntype, rule in provider.left_rules.items():
+            left_handlers[symbol_codes[ntype]] = rule.handler
+        for ntype, rule in provider.stmt_rules.items():
+            stmt_handlers[symbol_codes[ntype]] = rule.handler
+        for ntype, bp in provider.all_bps.items():
+            bps[symbol_codes[ntype]] = bp.value
+        self.null_handlers = tuple(null_handlers)
+        self.left_handlers = tuple(left_handlers)
+        self.stmt_handlers = tuple(stmt_handlers)
+        self.bps = tuple(bps)
+        self.provider = provider
+
+    def show_all_rules(self):
+        self.provider.show_all_rules()
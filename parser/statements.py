@@ -1,6 +1,6 @@
 # statement.py
 from parser.rules import (
-    BindingPower,
+    DEFAULT_BP,
 )
 
 from parser.expressions import (
@@ -16,11 +16,10 @@ from parser.symbols import SymbolType
 # Parser -> ast.Stmt
 def parse_statement(p):
     symtok = p.current_token()
-    rp = p.rule_provider
-    statement_rule = rp.statement_rule_for_token_type(symtok.symtype)
+    statement_rule = p.rules.stmt_handlers[symtok.symcode]
     if statement_rule != None:
         return statement_rule(p)
 
-    expression = parse_expr(p, BindingPower.DEFAULT_BP)
+    expression = parse_expr(p, DEFAULT_BP)
     p.skip_one(SymbolType.LINE_END)    
     return ExpressionStmt(expression)
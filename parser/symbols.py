@@ -1,12 +1,36 @@
 from enum import(Enum)
 
 from tokenizer.tokens import (
+    Token,
+    Tokenizer,
+    tokenize_line,
+    scan_line_texts,
     tokenitem_for_numeric,
     tokenitem_for_text,
     tokenitem_for_identifier,
     nil_token_item,
 )
 
+from tokenizer.tools import (
+    open_source,
+    iter_lines,
+)
+
+from tokenizer.operators import (
+    all_operators,
+)
+
+from tokenizer.names import (
+    intern_name,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    INFO,
+    DEBUG,
+)
+
 class SymbolType(Enum):
 
     # Literals
@@ -33,6 +57,34 @@ class SymbolType(Enum):
 
     # Assignment
     OP_ASSIGN       = 40 # '='
+    OP_PLUS_ASSIGN  = 41 # '+='
+    OP_MINUS_ASSIGN = 42 # '-='
+    OP_NULLISH_ASSIGN = 43 # '??='
+
+    # Conditional
+    OP_EQUALS       = 50 # '=='
+    OP_NOT_EQUALS   = 51 # '!='
+    OP_LESS         = 52 # '<'
+    OP_LESS_EQUALS  = 53 # '<='
+    OP_GREATER      = 54 # '>'
+    OP_GREATER_EQUALS = 55 # '>='
+
+    # Logical
+    OP_NOT          = 60 # '!'
+    OP_OR           = 61 # '||'
+    OP_AND          = 62 # '&&'
+
+    # Increment / decrement
+    OP_PLUS_PLUS    = 70 # '++'
+    OP_MINUS_MINUS  = 71 # '--'
+
+    # Symbolic
+    DOT             = 80 # '.'
+    DOT_DOT         = 81 # '..'
+    SEMI_COLON      = 82 # ';'
+    COLON           = 83 # ':'
+    QUESTION        = 84 # '?'
+    COMMA           = 85 # ','
 
     # Meta Info
     LINE_END        = 1002
@@ -40,102 +92,168 @@ class SymbolType(Enum):
 
     LITERAL_NIL     = 2000
 
+# numeric text -> SymbolType of its literal
+def numeric_type(text):
+    if text.find('0x') == 0:
+        return SymbolType.LITERAL_INTEGER # (or FLOAT)
+    elif (text.find('.') >= 0) or (text.find('e') > 0):
+        return SymbolType.LITERAL_FLOAT
+    return SymbolType.LITERAL_INTEGER # (or FLOAT)
+
+# numeric text -> (SymbolType, int or float)
+def numeric_symbol(text):
+    typ = numeric_type(text)
+    if text.find('0x') == 0:
+        return typ, hex2int(text)
+    elif typ == SymbolType.LITERAL_FLOAT:
+        return typ, float(text)
+    return typ, int(text)
+
+# operator text -> SymbolType, one entry per spelling in all_operators
+operator_symbols = {
+    '+': SymbolType.OP_ADD,
+    '-': SymbolType.OP_SUBTRACT,
+    '*': SymbolType.OP_MULTIPLY,
+    '/': SymbolType.OP_DIVIDE,
+    '%': SymbolType.OP_MODULO,
+    '=': SymbolType.OP_ASSIGN,
+    '+=': SymbolType.OP_PLUS_ASSIGN,
+    '-=': SymbolType.OP_MINUS_ASSIGN,
+    '??=': SymbolType.OP_NULLISH_ASSIGN,
+    '==': SymbolType.OP_EQUALS,
+    '!=': SymbolType.OP_NOT_EQUALS,
+    '<': SymbolType.OP_LESS,
+    '<=': SymbolType.OP_LESS_EQUALS,
+    '>': SymbolType.OP_GREATER,
+    '>=': SymbolType.OP_GREATER_EQUALS,
+    '!': SymbolType.OP_NOT,
+    '||': SymbolType.OP_OR,
+    '&&': SymbolType.OP_AND,
+    '++': SymbolType.OP_PLUS_PLUS,
+    '--': SymbolType.OP_MINUS_MINUS,
+    '.': SymbolType.DOT,
+    '..': SymbolType.DOT_DOT,
+    ';': SymbolType.SEMI_COLON,
+    ':': SymbolType.COLON,
+    '?': SymbolType.QUESTION,
+    ',': SymbolType.COMMA,
+    '(': SymbolType.LEFT_PAREN,
+    ')': SymbolType.RIGHT_PAREN,
+    '[': SymbolType.LEFT_BRACKET,
+    ']': SymbolType.RIGHT_BRACKET,
+    '{': SymbolType.LEFT_BRACE,
+    '}': SymbolType.RIGHT_BRACE,
+}
+
+for op in all_operators:
+    if op not in operator_symbols:
+        raise Exception('No SymbolType for operator "%s"' % op)
+
+# SymbolType -> operator text, e.g. when printing a BinaryExpr
+operator_texts = {}
+for text, st in operator_symbols.items():
+    operator_texts[st] = text
+
+# Dense codes for the SymbolTypes, in definition order, so that tables
+# can be lists indexed by code. The last code stands for None, the
+# type of a symbol that is no known operator.
+symbol_types = list(SymbolType) + [None]
+symbol_codes = {}
+for code, st in enumerate(symbol_types):
+    symbol_codes[st] = code
+
+# SymbolType or None -> name shown in messages
+def symbol_type_name(st):
+    if st == None:
+        return 'UNKNOWN'
+    return st.name
+
+# symbol text -> SymbolType (None when not an operator)
+def operator_symbol(text):
+    typ = operator_symbols.get(text)
+    if typ == None and text == '':
+        if tr.symbols >= DEBUG:
+            tr.log("created a nil SymToken")
+        return SymbolType.LITERAL_NIL
+    return typ
+
+# TokenItem -> (SymbolType, native value)
+def classify_token_item(token_item):
+    typ = None
+    token_val = token_item.value
+    if token_item.is_text():
+        if token_val == 'true':
+            typ = SymbolType.LITERAL_BOOL
+            val = True
+        elif token_val == 'false':
+            typ = SymbolType.LITERAL_BOOL
+            val = False
+        # elif other builtin reserved or keywords 
+        else:
+            typ = SymbolType.IDENTIFIER
+            val = token_val
+
+    elif token_item.is_literal_text():
+        typ = SymbolType.LITERAL_STRING
+        val = token_val
+
+    elif token_item.is_numeric():
+        typ, val = numeric_symbol(token_val)
+
+    elif token_item.is_list_begin():
+        typ = SymbolType.LEFT_PAREN
+        val = '('
+
+    elif token_item.is_list_end():
+        typ = SymbolType.RIGHT_PAREN
+        val = ')'
+
+    elif token_item.is_symbol():
+        val = token_val
+        typ = operator_symbol(token_val)
+
+    elif token_item.is_line_end():
+        typ = SymbolType.LINE_END
+        val = ''
+    elif token_item.is_input_end():
+        typ = SymbolType.INPUT_END
+        val = ''
+    else:
+        if tr.symbols >= ERROR:
+            tr.log("UNABLE to determine what SymToken to create")
+        typ = SymbolType.LITERAL_NIL
+        val = ''
+    return typ, val
+
 # _typ : SymbolType
 # _val : native repr
 # _lno : source line number
 # _col : source column number
+# _nid : interned name id (IDENTIFIER only, else None)
+# _code: dense code of _typ (see symbol_codes)
 class SymToken:
+    __slots__ = ('_typ', '_val', '_lno', '_col', '_nid', '_code')
+
     def __init__(self, token_item):
-        token_val = token_item.value
-        if token_item.is_text():
-            if token_val == 'true':
-                self._typ = SymbolType.LITERAL_BOOL
-                self._val = True
-            elif token_val == 'false':
-                self._typ = SymbolType.LITERAL_BOOL
-                self._val = False
-            # elif other builtin reserved or keywords 
-            else:
-                self._typ = SymbolType.IDENTIFIER
-                self._val = token_val
-
-        elif token_item.is_literal_text():
-            self._typ = SymbolType.LITERAL_STRING
-            self._val = token_val
-
-        elif token_item.is_numeric():
-            if token_val.find('0x') == 0:
-                self._typ = SymbolType.LITERAL_INTEGER # (or FLOAT)
-                self._val = hex2int(token_val)
-            elif (token_val.find('.') >= 0) or (token_val.find('e') > 0):
-                self._typ = SymbolType.LITERAL_FLOAT
-                self._val = float(token_val)
-            else:
-                self._typ = SymbolType.LITERAL_INTEGER # (or FLOAT)
-                self._val = int(token_val)
-
-        elif token_item.is_list_begin():
-            self._typ = SymbolType.LEFT_PAREN
-            self._val = '('
-
-        elif token_item.is_list_end():
-            self._typ = SymbolType.RIGHT_PAREN
-            self._val = ')'
-
-        elif token_item.is_symbol():
-            self._val = token_val
-            if token_val == '+':
-                self._typ = SymbolType.OP_ADD
-            elif token_val == '-':
-                self._typ = SymbolType.OP_SUBTRACT
-            elif token_val == '*':
-                self._typ = SymbolType.OP_MULTIPLY
-            elif token_val == '/':
-                self._typ = SymbolType.OP_DIVIDE
-            elif token_val == '%':
-                self._typ = SymbolType.OP_MODULO
-            elif token_val == '=':
-                self._typ = SymbolType.OP_ASSIGN
-            elif token_val == '(':
-                self._typ = SymbolType.LEFT_PAREN
-            elif token_val == ')':
-                self._typ = SymbolType.RIGHT_PAREN
-            elif token_val == '[':
-                self._typ = SymbolType.LEFT_BRACKET
-            elif token_val == ']':
-                self._typ = SymbolType.RIGHT_BRACKET
-            elif token_val == '{':
-                self._typ = SymbolType.LEFT_BRACE
-            elif token_val == '}':
-                self._typ = SymbolType.RIGHT_BRACE
-            elif token_val == '':
-                print("created a nil SymToken")
-                self._typ = SymbolType.LITERAL_NIL
-            #----------------------------------------------------------------------
-            # elif other symbols from this list of 16:
-            # ! @ # $ ^ & ; : | \\ ? > < , .
-            #----------------------------------------------------------------------
-
-        elif token_item.is_line_end():
-            self._typ = SymbolType.LINE_END
-            self._val = ''
-        elif token_item.is_input_end():
-            self._typ = SymbolType.INPUT_END
-            self._val = ''
-        else:
-            print("UNABLE to determine what SymToken to create")
-            self._typ = SymbolType.LITERAL_NIL
-            self._val = ''
+        self._typ, self._val = classify_token_item(token_item)
+        self._code = symbol_codes[self._typ]
         self._lno = token_item.line
         self._col = token_item.col
+        self._nid = None
+        if self._typ == SymbolType.IDENTIFIER:
+            self._nid = intern_name(self._val)
 
     def __str__(self):
-        base_name = "SymbolType.%s" % self._typ.name
+        base_name = "SymbolType.%s" % symbol_type_name(self._typ)
         loc_info = "[%d:%d]" % (self._lno, self._col)
         if self._val != '':
             base_name = "%s(%s)" % (base_name, self._val) 
         return "%s%s" % (base_name, loc_info)
 
+    # Pickled without the name id, which is only valid in this process
+    def __reduce__(self):
+        return (restore_symtoken, (self._typ, self._val, self._lno, self._col))
+
     @property
     def symtype(self):
         return self._typ
@@ -144,6 +262,14 @@ class SymToken:
     def symvalue(self):
         return self._val
 
+    @property
+    def symcode(self):
+        return self._code
+
+    @property
+    def symid(self):
+        return self._nid
+
     @property
     def line(self):
         return self._lno
@@ -152,6 +278,14 @@ class SymToken:
     def col(self):
         return self._col
 
+    def set_meta(self, line, col):
+        self._lno = line
+        self._col = col
+        return self
+
+    def shift_line(self, line_delta):
+        self._lno = self._lno + line_delta
+
     def is_meta_info():
         return self._typ == SymbolType.LINE_INFO
 
@@ -176,6 +310,11 @@ def symbolized(tokens):
         sym_tokens.append(SymToken(tk_item))
     return sym_tokens
 
+# Lazy counterpart of symbolized(), e.g. over iter_tokens()
+def iter_symbolized(tokens):
+    for tk_item in tokens:
+        yield SymToken(tk_item)
+
 nil_symtoken = SymToken(nil_token_item)
 
 def symtoken_for_numeric(val):
@@ -190,3 +329,88 @@ def symtoken_for_identifier(val):
     token_item = tokenitem_for_identifier(val)
     return SymToken(token_item)
 
+# ----------------------------------------------------------------------
+# Fused front end: the master regex of the lexer classified straight
+# into SymTokens, with no TokenItem in between
+# ----------------------------------------------------------------------
+
+keyword_symbols = {
+    'true': (SymbolType.LITERAL_BOOL, True),
+    'false': (SymbolType.LITERAL_BOOL, False),
+}
+
+# SymbolType -> native value -> lno -> col -> name id -> SymToken
+def make_symtoken(typ, val, lno, col, nid=None):
+    symtok = SymToken.__new__(SymToken)
+    symtok._typ = typ
+    symtok._code = symbol_codes[typ]
+    symtok._val = val
+    symtok._lno = lno
+    symtok._col = col
+    symtok._nid = nid
+    return symtok
+
+# make_symtoken(), interning the name of an IDENTIFIER again
+def restore_symtoken(typ, val, lno, col):
+    nid = None
+    if typ == SymbolType.IDENTIFIER:
+        nid = intern_name(val)
+    return make_symtoken(typ, val, lno, col, nid)
+
+# lno -> line -> SymToken[] (including the LINE_END), the same
+# SymTokens that symbolized(scan_line(lno, line)) would return
+def scan_symbols_line(lno, line):
+    if not line.isascii():
+        tk = Tokenizer()
+        tokenize_line(tk, lno, line)
+        return symbolized(tk.get_tokens())
+
+    symtokens = []
+    for tk, text, col in scan_line_texts(line):
+        if tk == Token.TEXT:
+            found = keyword_symbols.get(text)
+            if found == None:
+                symtokens.append(make_symtoken(SymbolType.IDENTIFIER, text, lno, col, intern_name(text)))
+                continue
+            typ, val = found
+        elif tk == Token.SYMBOL:
+            typ, val = operator_symbols.get(text), text
+        elif tk == Token.NUMERIC:
+            typ, val = numeric_symbol(text)
+        elif tk == Token.QTEXT:
+            typ, val = SymbolType.LITERAL_STRING, text
+        elif tk == Token.LIST_BEGIN:
+            typ, val = SymbolType.LEFT_PAREN, '('
+        else:
+            typ, val = SymbolType.RIGHT_PAREN, ')'
+        symtokens.append(make_symtoken(typ, val, lno, col))
+    symtokens.append(make_symtoken(SymbolType.LINE_END, '', lno, len(line) + 1))
+    return symtokens
+
+# source: file path, '-' for stdin, or an open text file
+# Yields SymTokens line by line, ending with INPUT_END
+def iter_symbol_tokens(source, chunk_size=65536):
+    fo, should_close = open_source(source)
+    lno = 0
+    try:
+        if fo != None:
+            for line in iter_lines(fo, chunk_size):
+                lno = lno + 1
+                if tr.lexer >= DEBUG:
+                    tr.log("[%4d] %s" % (lno, line))
+                if not line.startswith("//") and len(line) > 0:
+                    yield from scan_symbols_line(lno, line)
+    finally:
+        if should_close:
+            fo.close()
+
+    if tr.lexer >= INFO:
+        suffix = 's'
+        if lno == 1:
+            suffix = ''
+        tr.log('Processed %d line%s from "%s"' % (lno, suffix, source))
+
+    yield make_symtoken(SymbolType.INPUT_END, '', 0, 0)
+
+def symbolize_program(source):
+    return list(iter_symbol_tokens(source))
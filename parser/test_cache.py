@@ -0,0 +1,153 @@
+import os
+import pickle
+import pytest
+
+from parser.symbols import (
+    SymbolType,
+    symbolize_program,
+)
+
+from parser.packed import (
+    pack_program,
+)
+
+from parser.cache import (
+    AstCache,
+    cache_dir_for,
+    user_cache_root,
+)
+
+from parser.driver import (
+    pratt_parse_program,
+)
+
+from ast.printer import (
+    format_tree,
+)
+
+from tokenizer.names import (
+    intern_name,
+)
+
+# Entries of another kind, sharing the bound of the AstCache entries
+class OtherCache(AstCache):
+    suffix = '.other'
+
+def symtoken_fields(symtok):
+    return (symtok.symtype, symtok.symvalue, symtok.line, symtok.col, symtok.symid)
+
+#  Test the on-disk AST cache
+class TestAstCache:
+    def test_round_trip(self, tmp_path):
+        cache = AstCache(str(tmp_path / "cache"), "V0_2_0")
+        source = b"a = 1\n"
+        assert cache.load("a.goji", source) == None
+        path = cache.store("a.goji", source, ["stmt", 1])
+        assert os.path.exists(path)
+        assert cache.load("a.goji", source) == ["stmt", 1]
+        assert cache.load("b.goji", source) == None
+        assert AstCache(str(tmp_path / "cache"), "V0_3_0").load("a.goji", source) == None
+
+    def test_edit_drops_stale_entry(self, tmp_path):
+        cache = AstCache(str(tmp_path), "V0_2_0")
+        old_path = cache.store("a.goji", b"a = 1\n", ["old"])
+        cache.store("ab.goji", b"a = 1\n", ["other"])
+        new_path = cache.store("a.goji", b"a = 2\n", ["new"])
+        assert not os.path.exists(old_path)
+        assert os.path.exists(new_path)
+        assert cache.load("a.goji", b"a = 1\n") == None
+        assert cache.load("ab.goji", b"a = 1\n") == ["other"]
+
+    def test_size_bounded_eviction(self, tmp_path):
+        paths = []
+        for idx in range(4):
+            paths.append(AstCache(str(tmp_path), "V0_2_0").store("f%d.goji" % idx, b"x", ["y" * 1000]))
+            os.utime(paths[-1], (idx, idx))
+        cache = AstCache(str(tmp_path), "V0_2_0", max_bytes=2500)
+        cache.load("f0.goji", b"x")
+        assert cache.evict() == 2
+        assert [os.path.exists(p) for p in paths] == [True, False, False, True]
+
+    def test_one_bound_for_all_cache_dirs(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        root = user_cache_root()
+        paths = []
+        for idx, kind in enumerate((AstCache, OtherCache, AstCache, OtherCache)):
+            source = tmp_path / ("src%d" % idx) / "a.goji"
+            source.parent.mkdir()
+            source.write_bytes(b"x")
+            cache = kind(cache_dir_for(str(source)), "V0_2_0", max_bytes=2500, root=root)
+            paths.append(cache.store(str(source), b"x", ["y" * 1000]))
+            os.utime(paths[-1], (idx, idx))
+        assert len(os.listdir(root)) == 4
+        assert [os.path.exists(p) for p in paths] == [False, False, True, True]
+
+    def test_deleted_programs_are_evicted(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        sources = []
+        for name in ("one/a.goji", "one/b.goji", "two/a.goji"):
+            source = tmp_path / name
+            source.parent.mkdir(exist_ok=True)
+            source.write_bytes(b"x")
+            sources.append(source)
+        paths = []
+        for source in sources:
+            cache = AstCache(cache_dir_for(str(source)), "V0_2_0", root=user_cache_root())
+            paths.append(cache.store(str(source), b"x", ["y"]))
+        sources[1].unlink()
+        sources[2].unlink()
+        sources[2].parent.rmdir()
+        assert cache.evict() == 2
+        assert [os.path.exists(p) for p in paths] == [True, False, False]
+        assert not os.path.exists(cache_dir_for(str(sources[2])))
+
+    def test_unreadable_entry(self, tmp_path):
+        cache = AstCache(str(tmp_path), "V0_2_0")
+        path = cache.store("a.goji", b"x", ["y"])
+        with open(path, "wb") as fo:
+            fo.write(b"not a pickle")
+        assert cache.load("a.goji", b"x") == None
+        assert not os.path.exists(path)
+
+    def test_writable_by_others_is_not_loaded(self, tmp_path):
+        cache_dir = tmp_path / "shared"
+        cache = AstCache(str(cache_dir), "V0_2_0")
+        path = cache.store("a.goji", b"x", ["y"])
+        os.chmod(str(cache_dir), 0o777)
+        assert cache.load("a.goji", b"x") == None
+        assert cache.store("a.goji", b"x", ["z"]) == None
+        assert os.path.exists(path)
+        os.chmod(str(cache_dir), 0o700)
+        os.chmod(path, 0o666)
+        assert cache.load("a.goji", b"x") == None
+        os.chmod(path, 0o600)
+        assert cache.load("a.goji", b"x") == ["y"]
+
+    def test_read_only_cache_still_loads(self, tmp_path, monkeypatch):
+        cache = AstCache(str(tmp_path), "V0_2_0")
+        cache.store("a.goji", b"x", ["y"])
+        def refuse_utime(path, times=None):
+            raise PermissionError(path)
+        monkeypatch.setattr(os, "utime", refuse_utime)
+        assert cache.load("a.goji", b"x") == ["y"]
+
+    def test_cache_dir_per_user_and_directory(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        first = cache_dir_for("/src/one/a.goji")
+        assert first.startswith(os.path.join(str(tmp_path), "goji", "one-"))
+        assert cache_dir_for("/src/one/b.goji") == first
+        assert cache_dir_for("/src/two/one/a.goji") != first
+
+    def test_symtokens_pickle_without_buffers(self):
+        symtoks = symbolize_program("testdata/simple2.goji")
+        views = list(pack_program("testdata/simple2.goji"))
+        for restored in (pickle.loads(pickle.dumps(symtoks)), pickle.loads(pickle.dumps(views))):
+            assert [symtoken_fields(s) for s in restored] == [symtoken_fields(s) for s in symtoks]
+        assert any(s.symtype == SymbolType.IDENTIFIER for s in symtoks)
+
+    def test_statements_pickle(self):
+        statements = pratt_parse_program("testdata/simple2.goji")
+        restored = pickle.loads(pickle.dumps(statements, pickle.HIGHEST_PROTOCOL))
+        assert [format_tree(st) for st in restored] == [format_tree(st) for st in statements]
+        ident = restored[0].expression.ident
+        assert ident.name_id == intern_name(ident.name)
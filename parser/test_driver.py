@@ -0,0 +1,118 @@
+import io
+import random
+import pytest
+
+from tokenizer.tokens import (
+    LexerEngine,
+    iter_tokens,
+)
+
+from tokenizer.incremental import (
+    IncrementalTokenizer,
+)
+
+from parser.symbols import (
+    iter_symbolized,
+)
+
+from parser.driver import (
+    FileParser,
+    StreamParser,
+    frozen_rule_table,
+    iter_pratt_program,
+    parse_program_file,
+)
+
+from ast.printer import (
+    format_tree,
+)
+
+def tree_texts(statements):
+    return [format_tree(st) for st in statements]
+
+#  Test the streaming parser
+class TestStreamParser:
+    @pytest.mark.parametrize("engine", [LexerEngine.CLASSIC, LexerEngine.REGEX, LexerEngine.FUSED])
+    def test_same_statements_as_batch(self, engine):
+        streamed = list(iter_pratt_program("testdata/simple2.goji", engine))
+        parsed, diagnostics = parse_program_file("testdata/simple2.goji", engine)
+        assert len(streamed) > 0
+        assert tree_texts(streamed) == tree_texts(parsed)
+
+    def test_bounded_window(self, tmp_path):
+        source = tmp_path / "long.goji"
+        source.write_text("\n".join(["x%d = (%d + 1.5) * x%d" % (idx, idx, idx) for idx in range(2000)]), encoding="utf-8")
+        parseInfo = FileParser(str(source), [])
+        p = StreamParser(iter_symbolized(iter_tokens(str(source))), frozen_rule_table())
+        count = 0
+        most = 0
+        while p.has_tokens():
+            assert parseInfo.parse_one(p) != None
+            p.release()
+            most = max(most, p.buffered)
+            count = count + 1
+        assert count == 2000
+        # the LINE_END before the current token, and the current token
+        assert most == 2
+
+bad_lines = [
+    "a = 1",
+    "e = 1 ~ 2",
+    "b = * 2",
+    "c = (1 + 2",
+    "g = 4 4",
+    "__builtins__ = 5",
+    "z = 3",
+]
+
+@pytest.fixture
+def bad_source(tmp_path):
+    source = tmp_path / "bad.goji"
+    source.write_text("\n".join(bad_lines), encoding="utf-8")
+    return str(source)
+
+#  Test error recovery: one Diagnostic per bad statement, and the
+#  statements around them still parse
+class TestRecovery:
+    @pytest.mark.parametrize("engine", [LexerEngine.CLASSIC, LexerEngine.PACKED, LexerEngine.FUSED])
+    def test_every_error_reported(self, bad_source, engine):
+        statements, diagnostics = parse_program_file(bad_source, engine)
+        assert [st.line for st in statements] == [1, 7]
+        assert [(d.line, d.col) for d in diagnostics] == [(2, 7), (3, 5), (4, 11), (5, 7), (6, 1)]
+        assert "SymbolType.UNKNOWN(~)" in diagnostics[0].message
+
+    def test_stream_reports_every_error(self, bad_source):
+        parseInfo = FileParser(bad_source, iter_tokens(bad_source))
+        statements = list(parseInfo.iter_statements())
+        assert [st.line for st in statements] == [1, 7]
+        assert [d.line for d in parseInfo.diagnostics] == [2, 3, 4, 5, 6]
+
+    def test_unknown_symbol_text(self):
+        symtok = list(iter_symbolized(iter_tokens(io.StringIO("x = ~"))))[2]
+        assert symtok.symtype == None
+        assert str(symtok) == "SymbolType.UNKNOWN(~)[1:5]"
+
+#  Test reparse() after random edits, against parsing the edited text
+#  from scratch
+class TestReparse:
+    def test_random_edits(self):
+        rng = random.Random(16)
+        pieces = ["a = 1", "b = a + 2 * 3.5", "", "// note", "c = (a + b", "d = * 2", "e = 'text' + a", "f = 4 4"]
+        lines = [rng.choice(pieces) for idx in range(30)]
+        itk = IncrementalTokenizer()
+        itk.set_lines(lines)
+        parseInfo = FileParser("edited.goji", itk.tokens())
+        parseInfo.parse()
+        for step in range(300):
+            first = rng.randrange(len(lines) + 1)
+            last = min(len(lines), first + rng.randrange(3))
+            new_lines = [rng.choice(pieces) for idx in range(rng.randrange(3))]
+            lines[first:last] = new_lines
+            edit = itk.edit(first, last, new_lines)
+            parseInfo.reparse(edit, itk.edited_tokens(edit))
+            # several edits pile up between two checks
+            if step % 5 == 4:
+                assert itk.edited_tokens(edit) == itk.tokens()[edit.start:edit.new_end]
+                fresh = FileParser("edited.goji", itk.tokens())
+                assert tree_texts(parseInfo.statements()) == tree_texts(fresh.parse())
+                assert [str(d) for d in parseInfo.diagnostics] == [str(d) for d in fresh.diagnostics]
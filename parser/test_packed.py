@@ -0,0 +1,84 @@
+from tokenizer.tokens import (
+    TokenItem,
+    tokenize_program,
+)
+
+from tokenizer.names import (
+    intern_name,
+)
+
+import tokenizer.parallel
+
+from parser.symbols import (
+    SymbolType,
+    symbolized,
+)
+
+from parser.packed import (
+    pack_program,
+    pack_parallel,
+)
+
+def same_symbols(views, symtokens):
+    assert len(views) == len(symtokens)
+    for view, symtok in zip(views, symtokens):
+        assert str(view) == str(symtok)
+        assert view.symtype == symtok.symtype
+        assert view.symvalue == symtok.symvalue
+        assert (view.line, view.col) == (symtok.line, symtok.col)
+
+#  Test the packed TokenBuffer
+class TestTokenBuffer:
+    def test_packed_program(self):
+        tb = pack_program("testdata/simple2.goji")
+        symtokens = symbolized(tokenize_program("testdata/simple2.goji"))
+        same_symbols(list(tb), symtokens)
+        assert tb[-1].symtype == SymbolType.INPUT_END
+
+    def test_packed_quirks(self, tmp_path):
+        source = tmp_path / "quirks.goji"
+        lines = [
+            "y2 = 1.02E3 + 0x1 + 1e5 + true",
+            "s = 'it\\'s' + \"a\\\\b\" + 'unterminated  ",
+            "été = 3 + x\t",
+        ]
+        # blank lines between token lines leave gaps in the line table
+        for idx in range(800):
+            lines.append("")
+            lines.append("x%d = %d" % (idx, idx))
+        source.write_text("\n".join(lines), encoding="utf-8")
+        tb = pack_program(str(source))
+        symtokens = symbolized(tokenize_program(str(source)))
+        same_symbols(list(tb), symtokens)
+
+    def test_packed_without_token_items(self, monkeypatch):
+        symtokens = symbolized(tokenize_program("testdata/simple2.goji"))
+        def no_token_item(self, tk, ch=''):
+            raise AssertionError("TokenItem built while packing")
+        monkeypatch.setattr(TokenItem, "__init__", no_token_item)
+        same_symbols(list(pack_program("testdata/simple2.goji")), symtokens)
+
+    def test_packed_size(self):
+        tb = pack_program("testdata/simple2.goji")
+        assert tb.nbytes() < 16 * len(tb)
+
+    def test_packed_name_ids(self, tmp_path):
+        source = tmp_path / "names.goji"
+        source.write_text("a1 = 2\nb2 = a1 + 3\na1 = b2 * a1\n", encoding="utf-8")
+        tb = pack_program(str(source))
+        symtokens = symbolized(tokenize_program(str(source)))
+        assert [view.symid for view in tb] == [symtok.symid for symtok in symtokens]
+        assert len(tb.names) == 3
+
+    def test_extended_name_ids(self, tmp_path, monkeypatch):
+        # more names than a 16-bit name id holds, over two buffers
+        monkeypatch.setattr(tokenizer.parallel, "MIN_CHUNK_LINES", 40000)
+        source = tmp_path / "many.goji"
+        source.write_text("\n".join(["n%d = m" % idx for idx in range(70000)]), encoding="utf-8")
+        tb = pack_parallel(str(source), 2)
+        assert tb.name_ids.typecode == 'I'
+        assert tb[0].symid == intern_name("n0")
+        # n69999 = m LINE_END INPUT_END
+        assert tb[-5].symid == intern_name("n69999")
+        assert tb[-3].symid == tb[2].symid == intern_name("m")
+        assert tb[-4].symid == None
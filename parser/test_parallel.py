@@ -0,0 +1,66 @@
+import pytest
+
+from tokenizer.tokens import (
+    LexerEngine,
+    tokenize_program,
+)
+
+import tokenizer.parallel
+
+from parser.symbols import (
+    symbolized,
+)
+
+from parser.packed import (
+    pack_program,
+    pack_parallel,
+)
+
+from parser.driver import (
+    parse_program_file,
+    parse_parallel,
+)
+
+from ast.printer import (
+    format_tree,
+)
+
+@pytest.fixture
+def big_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(tokenizer.parallel, "MIN_CHUNK_LINES", 7)
+    lines = []
+    for idx in range(512):
+        lines.append("x%d = (%d + 1.5) * y" % (idx, idx))
+        if idx % 5 == 0:
+            lines.append("// comment %d" % idx)
+        if idx % 3 == 0:
+            lines.append("s = 'text %d" % idx)
+        if idx % 50 == 7:
+            lines.append("b%d = * %d" % (idx, idx))
+    source = tmp_path / "big.goji"
+    source.write_text("\n".join(lines), encoding="utf-8")
+    return str(source)
+
+#  Test the parallel front end
+class TestParallel:
+    def test_pack_parallel(self, big_source):
+        tb = pack_parallel(big_source, 2)
+        expected = pack_program(big_source)
+        assert tb.line_numbers == expected.line_numbers
+        assert tb.line_starts == expected.line_starts
+        symtokens = symbolized(tokenize_program(big_source))
+        assert [str(view) for view in tb] == [str(symtok) for symtok in symtokens]
+
+    def test_parse_parallel(self, big_source):
+        statements, diagnostics = parse_parallel(big_source, 2)
+        expected, expected_diagnostics = parse_program_file(big_source, LexerEngine.REGEX)
+        assert len(statements) > 512
+        assert [format_tree(st) for st in statements] == [format_tree(st) for st in expected]
+        assert len(diagnostics) == 11
+        assert diagnostics == expected_diagnostics
+
+    def test_diagnostics_reported_by_parent(self, big_source, capfd):
+        statements, diagnostics = parse_program_file(big_source, LexerEngine.REGEX, 2)
+        out_lines = capfd.readouterr().out.splitlines()
+        assert out_lines[:-1] == [d.format(big_source) for d in diagnostics]
+        assert out_lines[-1] == '11 syntax error(s) in "%s"' % big_source
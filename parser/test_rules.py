@@ -0,0 +1,47 @@
+import pytest
+
+from parser.symbols import (
+    SymbolType,
+    symbol_codes,
+    symtoken_for_identifier,
+    nil_symtoken,
+)
+
+from parser.rules import (
+    BindingPower,
+    RuleProvider,
+    NullRule,
+    LeftRule,
+    NO_BP,
+)
+
+def null_handler(p):
+    return 'null'
+
+def left_handler(p, left, bp):
+    return 'left'
+
+#  Test freezing a RuleProvider into a RuleTable
+class TestRuleTable:
+    def test_frozen_table(self):
+        rp = RuleProvider()
+        rp.register_rule(NullRule(BindingPower.PRIMARY, SymbolType.IDENTIFIER, null_handler))
+        rp.register_rule(LeftRule(BindingPower.ADDITIVE, SymbolType.OP_ADD, left_handler))
+        rt = rp.freeze()
+
+        ident = symtoken_for_identifier('x')
+        assert ident.symcode == symbol_codes[SymbolType.IDENTIFIER]
+        assert rt.null_handlers[ident.symcode] == null_handler
+        assert rt.left_handlers[ident.symcode] == None
+        assert rt.bps[ident.symcode] == BindingPower.PRIMARY.value
+
+        add = symbol_codes[SymbolType.OP_ADD]
+        assert rt.left_handlers[add] == left_handler
+        assert rt.bps[add] == BindingPower.ADDITIVE.value
+        assert rt.bps[symbol_codes[SymbolType.LINE_END]] == NO_BP
+        # Symbols that are no known operator have a code too
+        assert rt.bps[symbol_codes[None]] == NO_BP
+        assert nil_symtoken.symcode == symbol_codes[SymbolType.LITERAL_NIL]
+
+        with pytest.raises(AttributeError):
+            rt.extra = {}
@@ -0,0 +1,70 @@
+import pytest
+
+from tokenizer.tokens import (
+    tokenize_program,
+)
+
+from parser.symbols import (
+    SymbolType,
+    symbolized,
+    symbolize_program,
+)
+
+from tokenizer.names import (
+    name_for_id,
+)
+
+def symtoken_fields(symtok):
+    return (symtok.symtype, symtok.symvalue, type(symtok.symvalue), symtok.line, symtok.col)
+
+#  Test the fused lexer + symbolizer
+class TestFusedSymbols:
+    def test_fused_program(self):
+        got = symbolize_program("testdata/simple2.goji")
+        want = symbolized(tokenize_program("testdata/simple2.goji"))
+        assert [symtoken_fields(s) for s in got] == [symtoken_fields(s) for s in want]
+        assert got[-1].symtype == SymbolType.INPUT_END
+
+    def test_fused_literals(self, tmp_path):
+        source = tmp_path / "literals.goji"
+        source.write_text("\n".join([
+            "b = true + false + truth",
+            "n = 1.02E3 + 0x1 + 12 + .5 + 7.",
+            "s = 'it\\'s' + (\"x\" * [2]) ~ 'open",
+            "été = 3 + x",
+        ]), encoding="utf-8")
+        got = symbolize_program(str(source))
+        want = symbolized(tokenize_program(str(source)))
+        assert [symtoken_fields(s) for s in got] == [symtoken_fields(s) for s in want]
+
+    def test_multi_char_operators(self, tmp_path):
+        source = tmp_path / "operators.goji"
+        source.write_text("a ??= b <= c != d++", encoding="utf-8")
+        got = [s.symtype for s in symbolize_program(str(source))]
+        assert got == [
+            SymbolType.IDENTIFIER,
+            SymbolType.OP_NULLISH_ASSIGN,
+            SymbolType.IDENTIFIER,
+            SymbolType.OP_LESS_EQUALS,
+            SymbolType.IDENTIFIER,
+            SymbolType.OP_NOT_EQUALS,
+            SymbolType.IDENTIFIER,
+            SymbolType.OP_PLUS_PLUS,
+            SymbolType.LINE_END,
+            SymbolType.INPUT_END,
+        ]
+
+#  Test identifier interning
+class TestNameIds:
+    def test_same_name_same_id(self):
+        symtoks = symbolize_program("testdata/simple2.goji")
+        classic = symbolized(tokenize_program("testdata/simple2.goji"))
+        ids = {}
+        for symtok, other in zip(symtoks, classic):
+            assert symtok.symid == other.symid
+            if symtok.symtype == SymbolType.IDENTIFIER:
+                assert name_for_id(symtok.symid) == symtok.symvalue
+                assert ids.setdefault(symtok.symvalue, symtok.symid) == symtok.symid
+            else:
+                assert symtok.symid == None
+        assert len(ids) > 0
@@ -0,0 +1,48 @@
+import pytest
+
+from tokenizer.tokens import (
+    TokenItem,
+    tokenize_program,
+)
+
+from parser.symbols import (
+    SymbolType,
+    symbolized,
+)
+
+from parser.vectorized import (
+    pack_vectorized,
+)
+
+from parser.test_packed import (
+    same_symbols,
+)
+
+#  Test the byte-class front end of the TokenBuffer
+class TestVectorized:
+    @pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+    def test_same_tokens_as_tokenizer(self, tmp_path, newline):
+        source = tmp_path / "quirks.goji"
+        lines = [
+            "// a comment with 'quotes' and été",
+            "y2 = 1.02E3 + 0x1 + 1e5 + 2.e3 + .5 + 2x + true",
+            "a.b = nil >>= (c_1*-d) ~ `",
+            "s = 'it\\'s' + \"a\\\\b\" + 'unterminated  ",
+            "",
+            "été = 3 + x\t",
+            "   ",
+            "z = y2 // not a comment",
+            "last = 1",
+        ]
+        source.write_bytes(newline.join(lines).encode("utf-8"))
+        tb = pack_vectorized(str(source))
+        symtokens = symbolized(tokenize_program(str(source)))
+        same_symbols(list(tb), symtokens)
+        assert tb[-1].symtype == SymbolType.INPUT_END
+
+    def test_plain_lines_without_token_items(self, monkeypatch):
+        symtokens = symbolized(tokenize_program("testdata/simple2.goji"))
+        def no_token_item(self, tk, ch=''):
+            raise AssertionError("TokenItem built while packing")
+        monkeypatch.setattr(TokenItem, "__init__", no_token_item)
+        same_symbols(list(pack_vectorized("testdata/simple2.goji")), symtokens)
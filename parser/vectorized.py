@@ -0,0 +1,266 @@
+import os
+import re
+
+from tokenizer.tokens import (
+    Tokenizer,
+    scan_line,
+    scan_line_texts,
+)
+
+from tokenizer.spans import (
+    SpanForm,
+)
+
+from tokenizer.operators import (
+    operator_trie,
+)
+
+from parser.symbols import (
+    SymbolType,
+    symbol_codes,
+)
+
+from parser.packed import (
+    NO_NAME,
+    IDENTIFIER_CODE,
+    LEFT_PAREN_CODE,
+    RIGHT_PAREN_CODE,
+    UNKNOWN_CODE,
+    operator_codes,
+    keyword_codes,
+    TokenBuffer,
+    pack_program,
+)
+
+from tracing import (
+    tr,
+    INFO,
+)
+
+# ------------------------------------------------------------
+# Byte classes, one character standing for each class so that a
+# whole file is classified by a single translate() call and the
+# class string can be matched with a (much simpler) regex.
+# ------------------------------------------------------------
+class ByteClass:
+    SPACE = ' '    # separates tokens, never part of one
+    NEWLINE = 'n'
+    LETTER = 'a'
+    EXPONENT = 'e' # e and E, letters that also end a decimal
+    DIGIT = 'd'
+    UNDERSCORE = 'u'
+    DOT = 'p'      # part of numbers, else a symbol
+    SYMBOL = 's'   # runs split into operators by operator_trie
+    OPEN = '('
+    CLOSE = ')'
+    OTHER = 'o'    # any other ASCII character, a one-character SYMBOL
+    QUOTE = 'q'    # lines with quotes are left to scan_line_texts()
+
+# ASCII code -> ByteClass, following master_regex
+def make_class_map():
+    classes = {}
+    for b in range(128):
+        char = chr(b)
+        if char.isalpha():
+            classes[b] = ByteClass.LETTER
+        elif char.isdigit():
+            classes[b] = ByteClass.DIGIT
+        else:
+            classes[b] = ByteClass.OTHER
+    for char in '\t\x0b\x0c\r\x1c\x1d\x1e\x1f ':
+        classes[ord(char)] = ByteClass.SPACE
+    for char in Tokenizer().valid_symbols:
+        classes[ord(char)] = ByteClass.SYMBOL
+    classes[ord('e')] = ByteClass.EXPONENT
+    classes[ord('E')] = ByteClass.EXPONENT
+    classes[ord('\n')] = ByteClass.NEWLINE
+    classes[ord('_')] = ByteClass.UNDERSCORE
+    classes[ord('.')] = ByteClass.DOT
+    classes[ord('(')] = ByteClass.OPEN
+    classes[ord(')')] = ByteClass.CLOSE
+    classes[ord('"')] = ByteClass.QUOTE
+    classes[ord("'")] = ByteClass.QUOTE
+    return classes
+
+# for str.translate(), which leaves non-ASCII characters as they are
+class_map = make_class_map()
+# for bytes.translate() of ASCII input
+class_table = bytes(ord(class_map[b]) for b in range(128)) + b'o' * 128
+
+# One match per token over the class string. A run of LETTER,
+# EXPONENT, DIGIT, UNDERSCORE and DOT is a plain identifier, integer
+# or decimal, or else a word (e.g. 0x1F, 2x, a.b) that is left to
+# master_regex with the rest of its line. SPACE matches nothing and
+# is skipped by finditer().
+IDENT_RUN = 1
+INTEGER_RUN = 2
+DECIMAL_RUN = 3
+SYMBOL_RUN = 4
+OPEN_RUN = 5
+CLOSE_RUN = 6
+OTHER_RUN = 7
+NEWLINE_RUN = 8
+SCALAR_RUN = 9
+
+run_regex = re.compile(r'''
+      ([ae][aedu]*)(?![aedup])
+    | (d+)(?![aedup])
+    | (d+(?:pd*)?(?:e(?:d+(?:pd*)?|pd*))?)(?![aedup])
+    | (s+)
+    | (\()
+    | (\))
+    | (o)
+    | (n)
+    | ([aedup]+|q|[^\x00-\x7f])
+''', re.VERBOSE)
+
+# How the tokens of the current line are being collected
+class LineMode:
+    TOKENS = 0  # by the run_regex matches
+    SCALAR = 1  # by scan_line_texts(), once the line is complete
+    COMMENT = 2 # not at all
+
+# file path -> its bytes with '\n' line ends and a final '\n',
+# None when it is not a readable file
+def read_source_bytes(source):
+    if not isinstance(source, str) or source == '-' or not os.access(source, os.R_OK):
+        return None
+    with open(source, "rb") as fo:
+        data = fo.read()
+    if data.find(b'\r') >= 0:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    if len(data) > 0 and not data.endswith(b'\n'):
+        data = data + b'\n'
+    return data
+
+# source -> TokenBuffer, the same tokens as pack_program(source).
+# The file is read whole and every character is classified by one
+# translate() call, after which Python only runs once per token and
+# writes its kind, offset and length straight into the buffer arrays.
+# Lines with quotes, words or non-ASCII text are packed again from
+# scan_line_texts() (scan_line() if non-ASCII) once they are complete.
+# Input that is not a readable file is packed by pack_program().
+def pack_vectorized(source):
+    data = read_source_bytes(source)
+    if data == None:
+        return pack_program(source)
+    text = data.decode('utf-8')
+    if len(text) == len(data):
+        classes = data.translate(class_table).decode('ascii')
+    else:
+        classes = text.translate(class_map)
+
+    tb = TokenBuffer()
+    tb.add_text(text)
+    kinds = tb.kinds
+    offsets = tb.offsets
+    lengths = tb.lengths
+    add_kind = kinds.append
+    add_form = tb.forms.append
+    add_offset = offsets.append
+    add_length = lengths.append
+    add_name_id = tb.name_ids.append
+    name_index = tb._name_index
+    raw = SpanForm.RAW
+    decimal = SpanForm.DECIMAL
+    integer_code = symbol_codes[SymbolType.LITERAL_INTEGER]
+    float_code = symbol_codes[SymbolType.LITERAL_FLOAT]
+    line_end_code = symbol_codes[SymbolType.LINE_END]
+    split_run = operator_trie.split
+
+    lno = 1
+    line_start = 0
+    first = 0
+    line_mode = LineMode.COMMENT if text.startswith("//") else LineMode.TOKENS
+    for m in run_regex.finditer(classes):
+        run = m.lastindex
+        start, end = m.span()
+        if run == NEWLINE_RUN:
+            if line_mode == LineMode.SCALAR:
+                line = text[line_start:start].rstrip()
+                if line.isascii():
+                    tb.pack_texts(lno, line, line_start, scan_line_texts(line))
+                else:
+                    tb.pack_token_items(lno, line, line_start, scan_line(lno, line))
+                # (name_ids may have been widened)
+                add_name_id = tb.name_ids.append
+            elif len(kinds) > first:
+                tb.line_first.append(first)
+                tb.line_starts.append(line_start)
+                tb.line_numbers.append(lno)
+                add_kind(line_end_code)
+                add_form(raw)
+                add_offset(offsets[-1] + lengths[-1])
+                add_length(0)
+                add_name_id(NO_NAME)
+            lno = lno + 1
+            line_start = end
+            first = len(kinds)
+            line_mode = LineMode.COMMENT if text.startswith("//", line_start) else LineMode.TOKENS
+            continue
+        if line_mode != LineMode.TOKENS:
+            continue
+
+        if run == IDENT_RUN:
+            word = text[start:end]
+            name_idx = name_index.get(word)
+            if name_idx != None:
+                add_kind(IDENTIFIER_CODE)
+            else:
+                code = keyword_codes.get(word, IDENTIFIER_CODE)
+                name_idx = NO_NAME
+                if code == IDENTIFIER_CODE:
+                    name_idx = tb.name_index(word)
+                    add_name_id = tb.name_ids.append
+                add_kind(code)
+            add_form(raw)
+            add_name_id(name_idx)
+        elif run == INTEGER_RUN:
+            add_kind(integer_code)
+            add_form(decimal)
+            add_name_id(NO_NAME)
+        elif run == DECIMAL_RUN:
+            add_kind(float_code)
+            add_form(decimal)
+            add_name_id(NO_NAME)
+        elif run == SYMBOL_RUN:
+            if end - start > 1:
+                for offset, piece in split_run(text[start:end]):
+                    add_kind(operator_codes.get(piece, UNKNOWN_CODE))
+                    add_form(raw)
+                    add_offset(start + offset)
+                    add_length(len(piece))
+                    add_name_id(NO_NAME)
+                continue
+            add_kind(operator_codes.get(text[start], UNKNOWN_CODE))
+            add_form(raw)
+            add_name_id(NO_NAME)
+        elif run == OPEN_RUN:
+            add_kind(LEFT_PAREN_CODE)
+            add_form(raw)
+            add_name_id(NO_NAME)
+        elif run == CLOSE_RUN:
+            add_kind(RIGHT_PAREN_CODE)
+            add_form(raw)
+            add_name_id(NO_NAME)
+        elif run == OTHER_RUN:
+            add_kind(operator_codes.get(text[start], UNKNOWN_CODE))
+            add_form(raw)
+            add_name_id(NO_NAME)
+        else:
+            # Drop what the line packed so far, scan_line_texts() redoes it
+            tb.truncate(first)
+            line_mode = LineMode.SCALAR
+            continue
+        add_offset(start)
+        add_length(end - start)
+
+    if tr.lexer >= INFO:
+        lno = lno - 1
+        suffix = 's'
+        if lno == 1:
+            suffix = ''
+        tr.log('Packed %d line%s from "%s"' % (lno, suffix, source))
+
+    tb.mark_end_of_input()
+    return tb
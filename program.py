@@ -1,13 +1,20 @@
 from enum import Enum
 
+from tokenizer.tokens import (
+    LexerEngine,
+)
+
 from parser.driver import (
-    pratt_parse_program,
+    FileParser,
+    parse_program_file,
+    token_stream_for_program,
 )
 
-from ast.expressions import (
-    StringExpr,
-    IntegerExpr,
-    BoolExpr,
+from parser.cache import (
+    AstCache,
+    cache_dir_for,
+    user_cache_root,
+    read_program_bytes,
 )
 
 from runtime.env import (
@@ -16,56 +23,208 @@ from runtime.env import (
 )
 
 from runtime.eval import (
+    EvalEngine,
     eval_stmt,
 )
 
-from parser.symbols import (
-    symtoken_for_numeric,
-    symtoken_for_text,
-    symtoken_for_identifier,
+from runtime.vm import (
+    exec_stmt,
+)
+
+from runtime.closures import (
+    exec_closure,
+)
+
+from runtime.pycompile import (
+    CodeCache,
+    PythonRunner,
+    compile_program,
+)
+
+from runtime.values import (
+    format_value,
+)
+
+from ast.printer import (
+    format_tree,
+)
+
+from runtime.fold import (
+    ConstantFolder,
+    fold_constants,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    INFO,
+    DEBUG,
+    TRACE,
 )
 
 class EngineVersion(Enum):
     V0_2_0 = 10
 
-def run_program(program_file):
+# Exit status of run_program()
+EXIT_OK = 0
+EXIT_SYNTAX_ERROR = 1
+
+# (statements, diagnostics) of program_file, from its cache entry when
+# the source (and the engine version) did not change since last time
+def cached_parse_program(program_file, engine=LexerEngine.CLASSIC, jobs=1):
+    source_bytes = read_program_bytes(program_file)
+    if source_bytes == None:
+        return parse_program_file(program_file, engine, jobs)
+    cache = AstCache(cache_dir_for(program_file), EngineVersion.V0_2_0.name, root=user_cache_root())
+    all_statements = cache.load(program_file, source_bytes)
+    if all_statements != None:
+        return all_statements, []
+    all_statements, diagnostics = parse_program_file(program_file, engine, jobs)
+    # Not cached with syntax errors, which would go unreported next time
+    if len(diagnostics) == 0:
+        cache.store(program_file, source_bytes, all_statements)
+    return all_statements, diagnostics
+
+# (code object, diagnostics) of program_file for EvalEngine.PYTHON, from
+# its cache entry when the source (and fold) did not change since last time
+def cached_python_program(program_file, engine=LexerEngine.CLASSIC, jobs=1, use_cache=True, fold=True):
+    source_bytes = None
+    if use_cache:
+        source_bytes = read_program_bytes(program_file)
+    cache = None
+    if source_bytes != None:
+        cache = CodeCache(cache_dir_for(program_file), EngineVersion.V0_2_0.name, fold, root=user_cache_root())
+        code = cache.load(program_file, source_bytes)
+        if code != None:
+            return code, []
+    all_statements, diagnostics = parse_program_file(program_file, engine, jobs)
+    if fold:
+        all_statements, removed = fold_constants(all_statements)
+    code = compile_program(all_statements, program_file)
+    if tr.program >= INFO:
+        tr.log("%d statements were compiled to Python bytecode" % len(all_statements))
+    # Not cached with syntax errors, which would go unreported next time
+    if cache != None and len(diagnostics) == 0:
+        cache.store(program_file, source_bytes, code)
+    return code, diagnostics
+
+# EvalEngine -> EnvTable -> program file
+#   -> (EnvTable -> ast.Stmt -> value of the statement)
+def statement_runner(eval_engine, program_env, program_file):
+    if eval_engine == EvalEngine.VM:
+        return exec_stmt
+    if eval_engine == EvalEngine.CLOSURE:
+        return exec_closure
+    if eval_engine == EvalEngine.PYTHON:
+        return PythonRunner(program_env, program_file).run_stmt
+    return eval_stmt
+
+# Evaluates each statement as soon as it is parsed (see stream), up
+# to the first syntax error -> diagnostics
+def eval_program_stream(program_env, program_file, engine=LexerEngine.CLASSIC, jobs=1, fold=True, eval_engine=EvalEngine.TREE):
+    count = 0
+    run_stmt = statement_runner(eval_engine, program_env, program_file)
+    folder = ConstantFolder()
+    parseInfo = FileParser(program_file, token_stream_for_program(program_file, engine, jobs))
+    for stmt in parseInfo.iter_statements():
+        if len(parseInfo.diagnostics) > 0:
+            break
+        if fold:
+            stmt = folder.fold_stmt(stmt)
+        if tr.program >= TRACE:
+            tr.log(format_tree(stmt))
+        elif tr.program >= DEBUG:
+            tr.log("[%2d] %s" % (stmt.line, stmt))
+        result = run_stmt(program_env, stmt)
+        print("==> %s" % format_value(result))
+        count = count + 1
+    if tr.program >= INFO:
+        if fold:
+            tr.log("Constant folding removed %d node(s)" % folder.removed)
+        tr.log("%d statements were evaluated" % count)
+    return parseInfo.diagnostics
+
+# Reports that program_file is not run -> EXIT_SYNTAX_ERROR
+def syntax_error_exit(program_file, diagnostics):
+    if tr.program >= ERROR:
+        tr.log('Not evaluating "%s": %d syntax error(s)' % (program_file, len(diagnostics)))
+    return EXIT_SYNTAX_ERROR
+
+# stream: parse and evaluate one statement at a time instead of
+# parsing the whole program first (this bypasses the AST cache)
+# fold: evaluate constant subexpressions before running (runtime.fold)
+# -> EXIT_OK, or EXIT_SYNTAX_ERROR when nothing (streaming: nothing
+# after the first syntax error) was evaluated
+def run_program(program_file, engine=LexerEngine.CLASSIC, jobs=1, use_cache=True, stream=False, fold=True, eval_engine=EvalEngine.TREE):
     # Setup the root environment
     program_env = EnvTable()
 
     # Add the engine version
     name_val = EngineVersion.V0_2_0.name
     # builtin = EnvItem('engineVersion-name', make_atom_node(Token.QTEXT, EngineVersion.V0_2_0.name))
-    builtin = EnvItem('engineVersion-name', StringExpr(symtoken_for_text(EngineVersion.V0_2_0.name)))
+    builtin = EnvItem('engineVersion-name', EngineVersion.V0_2_0.name)
     program_env.set_item(builtin)
 
     this_val = EngineVersion.V0_2_0.value
-    builtin = EnvItem('engineVersion-id', IntegerExpr(symtoken_for_numeric(str(EngineVersion.V0_2_0.value))))
+    builtin = EnvItem('engineVersion-id', EngineVersion.V0_2_0.value)
     program_env.set_item(builtin)
 
-    builtin = EnvItem('seven_eleven', IntegerExpr(symtoken_for_numeric(str(711))))
+    builtin = EnvItem('seven_eleven', 711)
     program_env.set_item(builtin)
 
-    builtin = EnvItem('true', BoolExpr(symtoken_for_identifier('true')))
+    builtin = EnvItem('true', True)
     program_env.set_item(builtin)
     
-    builtin = EnvItem('false', BoolExpr(symtoken_for_identifier('false')))
+    builtin = EnvItem('false', False)
     program_env.set_item(builtin)
 
+    if stream:
+        diagnostics = eval_program_stream(program_env, program_file, engine, jobs, fold, eval_engine)
+        if len(diagnostics) > 0:
+            if tr.program >= ERROR:
+                tr.log('Stopped evaluating "%s" at its first syntax error' % program_file)
+            return EXIT_SYNTAX_ERROR
+        print("\nGoji Ending Environment:")
+        program_env.show()
+        return EXIT_OK
+
+    if eval_engine == EvalEngine.PYTHON:
+        code, diagnostics = cached_python_program(program_file, engine, jobs, use_cache, fold)
+        if len(diagnostics) > 0:
+            return syntax_error_exit(program_file, diagnostics)
+        PythonRunner(program_env, program_file).run_program(code)
+        print("\nGoji Ending Environment:")
+        program_env.show()
+        return EXIT_OK
+
     # parse and show/eval AST
-    all_statements = pratt_parse_program(program_file)
+    if use_cache:
+        all_statements, diagnostics = cached_parse_program(program_file, engine, jobs)
+    else:
+        all_statements, diagnostics = parse_program_file(program_file, engine, jobs)
+    if len(diagnostics) > 0:
+        return syntax_error_exit(program_file, diagnostics)
+    if fold and all_statements != None:
+        all_statements, removed = fold_constants(all_statements)
 
     # Time to evaluate
     if all_statements == None:
-        print("Nothing to evaluate")
+        if tr.program >= INFO:
+            tr.log("Nothing to evaluate")
     else:
-        print("%d statements will be evaluated" % len(all_statements))
+        if tr.program >= INFO:
+            tr.log("%d statements will be evaluated" % len(all_statements))
+        run_stmt = statement_runner(eval_engine, program_env, program_file)
         for stmt in all_statements:
-            print("[%2d] %s" % (stmt.line, stmt))
-            result = eval_stmt(program_env, stmt) 
-            print("==> %s" % result)
-            print("")
+            if tr.program >= TRACE:
+                tr.log(format_tree(stmt))
+            elif tr.program >= DEBUG:
+                tr.log("[%2d] %s" % (stmt.line, stmt))
+            result = run_stmt(program_env, stmt)
+            print("==> %s" % format_value(result))
 
     # show ending environment
     print("\nGoji Ending Environment:")
     program_env.show()
+    return EXIT_OK
 
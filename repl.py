@@ -1,32 +1,68 @@
 import argparse
+import sys
 
 from aug2024.old_program import (
     old_run_program,
 )
 
+from tokenizer.tokens import (
+    LexerEngine,
+)
+
+from runtime.eval import (
+    EvalEngine,
+)
+
 from program import (
     run_program,
 )
 
+import tracing
+
+# -t argument -> ['lexer', ...]
+def trace_categories(text):
+    names = [name for name in text.split(',') if name != '']
+    for name in names:
+        if name not in tracing.all_categories:
+            raise argparse.ArgumentTypeError('unknown category "%s" (choose from %s)' % (name, ','.join(tracing.all_categories)))
+    return names
+
 def exec_main():
     repl_parser = argparse.ArgumentParser("Goji repl")
     repl_parser.add_argument("program_file", help="Path to Goji program to be run")
 
     repl_parser.add_argument('-n', '--new-parser', default=False, action='store_true', help='Use the new parser')
     repl_parser.add_argument('-P', '--pratt-parser', default=False, action='store_true', help='Use the Pratt parser')
+    repl_parser.add_argument('-L', '--lexer', default='classic', choices=['classic', 'regex', 'mapped', 'packed', 'fused', 'vector'], help='Lexer engine for the Pratt parser')
+    repl_parser.add_argument('-E', '--eval', default='tree', choices=['tree', 'vm', 'closure', 'python'], help='How the Pratt parser\'s statements are executed')
+    repl_parser.add_argument('-j', '--jobs', default=1, type=int, help='Processes used by the packed lexer (-L packed), and by the regex lexer and parser (-L regex, without -S)')
+    repl_parser.add_argument('-S', '--stream', default=False, action='store_true', help='Evaluate each statement as soon as it is parsed')
+    repl_parser.add_argument('--no-fold', default=False, action='store_true', help='Evaluate constant expressions at run time instead of folding them first')
+    repl_parser.add_argument('--no-cache', default=False, action='store_true', help='Parse again instead of using the cache in ~/.cache/goji')
+    repl_parser.add_argument('-v', '--verbose', default=0, action='count', help='More tracing output (repeat up to -vvv)')
+    repl_parser.add_argument('-q', '--quiet', default=False, action='store_true', help='No tracing output, not even errors')
+    repl_parser.add_argument('-t', '--trace', default='', type=trace_categories, help='Comma separated categories to trace in full: %s' % ','.join(tracing.all_categories))
     args = repl_parser.parse_args()
+    if args.jobs < 1:
+        repl_parser.error('argument -j/--jobs: must be at least 1')
+    if args.jobs > 1 and args.lexer != 'packed' and (args.lexer != 'regex' or args.stream):
+        repl_parser.error('argument -j/--jobs: only used with -L packed, or -L regex without -S')
  
     program_file = args.program_file
-    print(args)
+    tracer = tracing.configure(args.verbose, args.trace, args.quiet)
+    if tracer.program >= tracing.DEBUG:
+        tracer.log(str(args))
     wants_new_parser = args.new_parser
     wants_pratt_parser = args.pratt_parser
+    lexer_engine = LexerEngine[args.lexer.upper()]
+    eval_engine = EvalEngine[args.eval.upper()]
     which_parser = 'old'
     if wants_new_parser:
         which_parser = 'new'
   
     # wants_pratt_parser
     if wants_pratt_parser:
-        run_program(program_file)
+        sys.exit(run_program(program_file, lexer_engine, args.jobs, not args.no_cache, args.stream, not args.no_fold, eval_engine))
     else:
         old_run_program(program_file, which_parser)
 
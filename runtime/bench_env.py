@@ -0,0 +1,74 @@
+import argparse
+import time
+
+from runtime.env import (
+    EnvItem,
+    EnvTable,
+)
+
+from tokenizer.names import (
+    intern_name,
+)
+
+# ----------------------------------------------------------------------
+# Scaling benchmark of EnvTable: binds n names, binds them all again,
+# then looks each one up from the table itself and from a child scope.
+# With O(1) operations the time per operation stays flat as n grows.
+#
+#     python -m runtime.bench_env -n 100000
+# ----------------------------------------------------------------------
+
+# -> seconds per operation
+def time_per_op(fn, ops):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) / ops
+
+def bench_env(n):
+    names = ["v%d" % idx for idx in range(n)]
+    ids = [intern_name(name) for name in names]
+    env = EnvTable()
+    env.version = 1
+    child = EnvTable(env)
+
+    def bind():
+        for idx in range(n):
+            env.set_item(EnvItem(names[idx], idx, ids[idx]))
+
+    def rebind():
+        for idx in range(n):
+            env.set_item(EnvItem(names[idx], -idx, ids[idx]))
+
+    def lookup():
+        for name_id in ids:
+            env.get_item_by_id(name_id)
+
+    def lookup_parent():
+        for name_id in ids:
+            child.get_item_by_id(name_id)
+
+    def lookup_name():
+        for name in names:
+            env.get_item(name)
+
+    results = []
+    for label, fn in (("bind", bind), ("rebind", rebind), ("lookup", lookup),
+                      ("lookup in parent", lookup_parent), ("lookup by name", lookup_name)):
+        results.append((label, time_per_op(fn, n)))
+    assert env.size == n
+    assert child.get_item_by_id(ids[-1]).value == 1 - n
+    return results
+
+def main():
+    bench_parser = argparse.ArgumentParser("EnvTable benchmark")
+    bench_parser.add_argument('-n', '--bindings', default=100000, type=int, help='Largest number of bindings')
+    args = bench_parser.parse_args()
+
+    n = 1000
+    while n <= args.bindings:
+        for label, seconds in bench_env(n):
+            print("%8d bindings  %-16s %8.0f ns/op" % (n, label, seconds * 1e9))
+        n = n * 10
+
+if __name__ == "__main__":
+    main()
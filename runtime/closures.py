@@ -0,0 +1,104 @@
+from ast.expressions import (
+    AssignmentExpr,
+    IdentifierExpr,
+    BinaryExpr,
+    IntegerExpr,
+    FloatExpr,
+    BoolExpr,
+    StringExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from ast.dispatch import (
+    DispatchTable,
+)
+
+from runtime.env import (
+    EnvItem,
+)
+
+from runtime.eval import (
+    eval_expr,
+    eval_stmt,
+)
+
+from runtime.values import (
+    binary_operations,
+)
+
+# ----------------------------------------------------------------------
+# Closure compilation: each node becomes a Python closure, env -> value,
+# built once. The node type and the operator are looked at while
+# compiling only; running a closure calls its operands' closures and
+# the operation directly.
+# ----------------------------------------------------------------------
+
+# Closure handlers: compiler state (unused) -> node -> (env -> value)
+
+# Nodes without a closure of their own are evaluated by the tree walker
+def close_other(state, expr):
+    def run_other(env):
+        return eval_expr(env, expr)
+    return run_other
+
+closure_table = DispatchTable("closure", close_other)
+
+def close_expr(expr):
+    handler = closure_table.handlers.get(expr.__class__) or closure_table.resolve(expr)
+    return handler(None, expr)
+
+@closure_table.handles(IntegerExpr, FloatExpr, StringExpr, BoolExpr)
+def close_literal(state, expr):
+    value = expr.exprvalue
+    def run_literal(env):
+        return value
+    return run_literal
+
+@closure_table.handles(IdentifierExpr)
+def close_identifier(state, expr):
+    name_id = expr.name_id
+    def run_identifier(env):
+        return env.get_item_by_id(name_id).value
+    return run_identifier
+
+@closure_table.handles(AssignmentExpr)
+def close_assignment(state, expr):
+    run_rhs = close_expr(expr.rhs)
+    ident_expr = expr.ident
+    name = ident_expr.name
+    name_id = ident_expr.name_id
+    def run_assignment(env):
+        value = run_rhs(env)
+        env.set_item(EnvItem(name, value, name_id))
+        return value
+    return run_assignment
+
+@closure_table.handles(BinaryExpr)
+def close_binary(state, expr):
+    run_lhs = close_expr(expr.lhs)
+    run_rhs = close_expr(expr.rhs)
+    operation = binary_operations.get(expr.operator)
+    if operation == None:
+        def run_unknown(env):
+            run_lhs(env)
+            run_rhs(env)
+            return None
+        return run_unknown
+    def run_binary(env):
+        return operation(run_lhs(env), run_rhs(env))
+    return run_binary
+
+# ast.Stmt -> (env -> value of the statement)
+def close_stmt(stmt):
+    if isinstance(stmt, ExpressionStmt):
+        return close_expr(stmt.expression)
+    def run_stmt(env):
+        return eval_stmt(env, stmt)
+    return run_stmt
+
+# Same as eval_stmt(env, stmt), through a compiled closure
+def exec_closure(env, stmt):
+    return close_stmt(stmt)(env)
@@ -1,58 +1,62 @@
-from ast.expressions import (
-    BaseExpr,
-    NilExpr,
+from tokenizer.names import (
+    name_table,
+    intern_name,
 )
 
-from parser.symbols import (
-    nil_symtoken,
+from tracing import (
+    tr,
+    DEBUG,
 )
 
-# EnvItem is a name + BaseExpr
+# EnvItem is a name + value (see runtime.values; None is nil)
+# (name_id is the interned name, looked up when not given)
 class EnvItem:
-    def __init__(self, name, expr):
+    def __init__(self, name, value, name_id=None):
         self._name = name
-        self._expr = expr
+        self._value = value
+        if name_id == None:
+            name_id = intern_name(name)
+        self._nid = name_id
 
 
     @property
     def name(self):
         return self._name
 
+    @property
+    def name_id(self):
+        return self._nid
+
     @property
     def value(self):
-        return self._expr
+        return self._value
 
     @property
     def old_value(self):
-        return self._expr.exprvalue
+        return self._value
 
     def isstring(self):
-        item_sym = self._expr.exprsym
-        return item_sym.isstring()
+        return type(self._value) is str
 
     def isinteger(self):
-        item_sym = self._expr.exprsym
-        return item_sym.isinteger()
+        return type(self._value) is int
 
     def isfloat(self):
-        item_sym = self._expr.exprsym
-        return item_sym.isfloat()
+        return type(self._value) is float
 
     def isbool(self):
-        item_sym = self._expr.exprsym
-        return item_sym.isbool()
+        return type(self._value) is bool
 
     def isfunction(self):
         pass
 
     def clone(self):
-        new_item = EnvItem(self._name, self._expr)
+        new_item = EnvItem(self._name, self._value, self._nid)
         return new_item
 
     # Equivalent method isnil() for Atom
     def isnil(self):
-        item_sym = self._expr.exprsym
-        return item_sym.isnil()
+        return self._value == None
 
     @property
     def value_repr(self):
@@ -61,20 +65,30 @@ class EnvItem:
         # elif self.islist():
         #     return str(self.value)
         else:
-            return str(self.value.exprvalue)
+            return str(self._value)
 
     def __str__(self):
         if self.isnil():
             return 'nil'
         return '%s: %s' % (self.name, self.value_repr)
 
-nil_expr = NilExpr(nil_symtoken)
-nil = EnvItem('nil', nil_expr)
-
+nil = EnvItem('nil', None)
+nil_id = nil.name_id
+
+# ----------------------------------------------------------------------
+# EnvTable {
+#   parent  enclosing EnvTable, or None
+#   table   EnvItem[] of this level, in the order first bound
+#   _slots  name id -> index of its EnvItem in table
+# }
+# Binding, rebinding and lookup are one dict operation per level, and
+# a name keeps its place in table when it is bound again.
+# ----------------------------------------------------------------------
 class EnvTable:
     def __init__(self, parent_env=None):
         self.parent = parent_env
-        self.table = [] # could be a HashMap soon
+        self.table = []
+        self._slots = {}
         if self.parent != None:
             self.version = self.parent.version
 
@@ -90,34 +104,49 @@ class EnvTable:
         # otherwise, the item should be cloned
         # new_item = item.clone()
         new_item = item
-        for idx, old_item in enumerate(self.table):
-            if old_item.name == new_item.name:
-                print("Replacing %s with %s" % (new_item.name, new_item))
-                self.table[idx] = new_item
-                return
-        print("Creating item: %s" % new_item)
+        name_id = new_item.name_id
+        idx = self._slots.get(name_id)
+        if idx != None:
+            if tr.env >= DEBUG:
+                tr.log("Replacing %s with %s" % (new_item.name, new_item))
+            self.table[idx] = new_item
+            return
+        if tr.env >= DEBUG:
+            tr.log("Creating item: %s" % new_item)
+        self._slots[name_id] = len(self.table)
         self.table.append(new_item)
 
+    # Names are compared by their interned ids; a name that was
+    # never interned cannot be bound anywhere
     def hasTopLevelValue(self, item_name):
-        if item_name == 'nil':
+        name_id = name_table.lookup(item_name)
+        if name_id == None:
+            return False
+        return self.hasTopLevelId(name_id)
+
+    def hasTopLevelId(self, name_id):
+        if name_id == nil_id:
             return True
-        for old_item in self.table:
-            if old_item.name == item_name:
-                return True
-        return False
+        return name_id in self._slots
 
     def get_item(self, item_name):
-        if item_name == 'nil':
+        name_id = name_table.lookup(item_name)
+        if name_id == None:
+            return None
+        return self.get_item_by_id(name_id)
+
+    def get_item_by_id(self, name_id):
+        if name_id == nil_id:
             return nil
-        for old_item in self.table:
-            if old_item.name == item_name:
+        env = self
+        while env != None:
+            idx = env._slots.get(name_id)
+            if idx != None:
                 # trust the caller
-                return old_item
+                return env.table[idx]
                 # return old_item.clone if the caller is untrusted
-        if self.parent != None:
-            return self.parent.get_item(item_name)
-        else:
-            return None
+            env = env.parent
+        return None
 
     def get_integer(self, item_name):
         env_item = self.get_item(item_name)
@@ -143,6 +172,10 @@ class EnvTable:
             return env_item.value
         return "" 
 
+    # EnvItem[] bound at this level, in the order they were first bound
+    def items(self):
+        return list(self.table)
+
     def show(self):
         for item in self.table:
             print(str(item))
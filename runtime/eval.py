@@ -1,3 +1,5 @@
+from enum import Enum
+
 from ast.expressions import (
     AssignmentExpr,
     IdentifierExpr,
@@ -8,73 +10,84 @@ from ast.expressions import (
     StringExpr,
 )
 
-from parser.symbols import (
-    SymbolType,
-    SymToken,
-    symtoken_for_numeric,
-)
-
 from ast.statements import (
     ExpressionStmt,
 )
 
+from ast.dispatch import (
+    DispatchTable,
+)
+
 from runtime.env import (
     EnvItem,
 )
 
-def eval_expr(env, expr):
-    if isinstance(expr, AssignmentExpr):
-        result = eval_expr(env, expr.rhs)
-        ident_expr = expr.ident
-        item_name = ident_expr.name.symvalue
-        item = EnvItem(item_name, result)
-        env.set_item(item)
-        return result
-    elif isinstance(expr, IntegerExpr):
-        return expr
-    elif isinstance(expr, FloatExpr):
-        return expr
-    elif isinstance(expr, StringExpr):
-        return expr
-    elif isinstance(expr, BoolExpr):
-        return expr
-    elif isinstance(expr, IdentifierExpr):
-        maybe_item = env.get_item(expr.name.symvalue)
-        return maybe_item.value
-    elif isinstance(expr, BinaryExpr):
-        operator = expr.operator
-        opsym = operator.symtype
-        lhs = eval_expr(env, expr.lhs)
-        rhs = eval_expr(env, expr.rhs)
-        leftval = lhs.exprvalue
-        rightval = rhs.exprvalue
-        lefttype = lhs.exprtype
-        righttype = rhs.exprtype
-        if opsym == SymbolType.OP_ADD:
-            print("Add values: %g + %g" % (float(leftval), float(rightval)))
-            result = leftval + rightval
-            if (lefttype == SymbolType.LITERAL_INTEGER) and (righttype == SymbolType.LITERAL_INTEGER):
-                return IntegerExpr(symtoken_for_numeric(result))
-            else:
-                return FloatExpr(symtoken_for_numeric(result))
-        elif opsym == SymbolType.OP_MULTIPLY:
-            print("Multiply values: %g * %g" % (float(leftval), float(rightval)))
-            result = leftval * rightval
-            if (lefttype == SymbolType.LITERAL_INTEGER) and (righttype == SymbolType.LITERAL_INTEGER):
-                return IntegerExpr(symtoken_for_numeric(result))
-            else:
-                return FloatExpr(symtoken_for_numeric(result))
-    else:
-        print("Another expr named: %s" % type(expr))
+from runtime.values import (
+    binary_value,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    DEBUG,
+)
+
+# How run_program() executes the statements
+class EvalEngine(Enum):
+    TREE = 0    # eval_stmt() walks the AST
+    VM = 1      # compiled to bytecode for the stack machine in runtime.vm
+    CLOSURE = 2 # compiled to nested Python closures by runtime.closures
+    PYTHON = 3  # compiled to a Python code object by runtime.pycompile
+
+# ----------------------------------------------------------------------
+# Evaluation handlers: EnvTable -> ast.Expr -> value (see runtime.values)
+# ----------------------------------------------------------------------
+
+def eval_unknown(env, expr):
+    if tr.eval >= ERROR:
+        tr.log("Another expr named: %s" % type(expr))
     return None
 
+eval_table = DispatchTable("eval", eval_unknown)
+
+def eval_expr(env, expr):
+    handler = eval_table.handlers.get(expr.__class__) or eval_table.resolve(expr)
+    return handler(env, expr)
+
+@eval_table.handles(AssignmentExpr)
+def eval_assignment(env, expr):
+    result = eval_expr(env, expr.rhs)
+    ident_expr = expr.ident
+    item_name = ident_expr.name
+    item = EnvItem(item_name, result, ident_expr.name_id)
+    env.set_item(item)
+    return result
+
+@eval_table.handles(IntegerExpr, FloatExpr, StringExpr, BoolExpr)
+def eval_literal(env, expr):
+    return expr.exprvalue
+
+@eval_table.handles(IdentifierExpr)
+def eval_identifier(env, expr):
+    maybe_item = env.get_item_by_id(expr.name_id)
+    return maybe_item.value
+
+@eval_table.handles(BinaryExpr)
+def eval_binary_expr(env, expr):
+    lhs = eval_expr(env, expr.lhs)
+    rhs = eval_expr(env, expr.rhs)
+    return binary_value(expr.operator, lhs, rhs)
+
 def eval_other(env, other):
-    print("Evaluating [%2d] %s" % (stmt.line, other))
+    if tr.eval >= DEBUG:
+        tr.log("Evaluating [%2d] %s" % (other.line, other))
     return None
 
+stmt_eval_table = DispatchTable("statement eval", eval_other)
+
+@stmt_eval_table.handles(ExpressionStmt)
+def eval_expression_stmt(env, stmt):
+    return eval_expr(env, stmt.expression)
 
 def eval_stmt(env, stmt):
-    if isinstance(stmt, ExpressionStmt):
-        return eval_expr(env, stmt.expression)
-    else:
-        return eval_other(env, stmt)
+    return stmt_eval_table.dispatch(env, stmt)
@@ -0,0 +1,105 @@
+from ast.expressions import (
+    AssignmentExpr,
+    BinaryExpr,
+    IntegerExpr,
+    FloatExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from ast.dispatch import (
+    DispatchTable,
+)
+
+from runtime.values import (
+    binary_value,
+    literal_for_value,
+)
+
+from tracing import (
+    tr,
+    INFO,
+    DEBUG,
+)
+
+# ----------------------------------------------------------------------
+# ConstantFolder {
+#   _removed number of nodes folded away so far
+# }
+# Replaces each BinaryExpr whose operands are (or fold into) numeric
+# literals by a literal of the value binary_value() computes, at the place
+# of the operator. Nodes that do not change are kept as they are.
+# ----------------------------------------------------------------------
+class ConstantFolder:
+    def __init__(self):
+        self._removed = 0
+
+    @property
+    def removed(self):
+        return self._removed
+
+    # ast.Expr -> ast.Expr
+    def fold_expr(self, expr):
+        handler = fold_table.handlers.get(expr.__class__) or fold_table.resolve(expr)
+        return handler(self, expr)
+
+    # ast.Stmt -> ast.Stmt
+    def fold_stmt(self, stmt):
+        return stmt_fold_table.dispatch(self, stmt)
+
+    def count_removed(self, n):
+        self._removed = self._removed + n
+
+# ----------------------------------------------------------------------
+# Folding handlers: ConstantFolder -> node -> node
+# ----------------------------------------------------------------------
+
+def keep_node(folder, node):
+    return node
+
+fold_table = DispatchTable("fold", keep_node)
+stmt_fold_table = DispatchTable("statement fold", keep_node)
+
+@fold_table.handles(BinaryExpr)
+def fold_binary(folder, expr):
+    lhs = folder.fold_expr(expr.lhs)
+    rhs = folder.fold_expr(expr.rhs)
+    if is_numeric_literal(lhs) and is_numeric_literal(rhs):
+        value = binary_value(expr.operator, lhs.exprvalue, rhs.exprvalue)
+        result = literal_for_value(value, expr.line, expr.col)
+        if result != None:
+            if tr.eval >= DEBUG:
+                tr.log("[%2d] Folded %s into %s" % (expr.line, expr, result))
+            # The operator node and both operands become one literal
+            folder.count_removed(2)
+            return result
+    if lhs is expr.lhs and rhs is expr.rhs:
+        return expr
+    return BinaryExpr(expr.operator, lhs, rhs, expr.line, expr.col)
+
+@fold_table.handles(AssignmentExpr)
+def fold_assignment(folder, expr):
+    rhs = folder.fold_expr(expr.rhs)
+    if rhs is expr.rhs:
+        return expr
+    return AssignmentExpr(expr.ident, rhs)
+
+@stmt_fold_table.handles(ExpressionStmt)
+def fold_expression_stmt(folder, stmt):
+    expr = folder.fold_expr(stmt.expression)
+    if expr is stmt.expression:
+        return stmt
+    return ExpressionStmt(expr)
+
+def is_numeric_literal(expr):
+    return isinstance(expr, IntegerExpr) or isinstance(expr, FloatExpr)
+
+# statement[] -> (statement[], number of nodes removed)
+def fold_constants(statements):
+    folder = ConstantFolder()
+    folded = [folder.fold_stmt(stmt) for stmt in statements]
+    if tr.program >= INFO:
+        tr.log("Constant folding removed %d node(s)" % folder.removed)
+    return folded, folder.removed
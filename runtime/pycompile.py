@@ -0,0 +1,299 @@
+# The stdlib ast module is shadowed by this repo's ast package, so the
+# Python AST is built from the classes of its C half, _ast
+import _ast
+import gc
+import marshal
+import sys
+
+from ast.expressions import (
+    AssignmentExpr,
+    IdentifierExpr,
+    BinaryExpr,
+    IntegerExpr,
+    FloatExpr,
+    BoolExpr,
+    StringExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from ast.dispatch import (
+    DispatchTable,
+)
+
+from parser.symbols import (
+    SymbolType,
+)
+
+from parser.cache import (
+    AstCache,
+    MAX_CACHE_BYTES,
+)
+
+from runtime.env import (
+    EnvItem,
+)
+
+from runtime.values import (
+    add_values,
+    multiply_values,
+    format_value,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    DEBUG,
+)
+
+# Names of the helpers in the globals of compiled code; a '.' is never
+# part of a Goji name, so they cannot be rebound by a program
+EMIT_NAME = 'goji.emit'
+ADD_NAME = 'goji.add'
+MULTIPLY_NAME = 'goji.multiply'
+
+# Goji names are prefixed in compiled code: a Goji name can be a Python
+# keyword or constant (None, True, ...) that compile() would reject as
+# an identifier, and it never clashes with the helpers or __builtins__
+NAME_PREFIX = '$'
+
+# Goji name -> its name in compiled code
+def py_name(name):
+    return NAME_PREFIX + name
+
+# name in compiled code -> Goji name, or None for another global
+def goji_name(name):
+    if name.startswith(NAME_PREFIX):
+        return name[len(NAME_PREFIX):]
+    return None
+
+CODE_SUFFIX = '.pyc'
+
+# ----------------------------------------------------------------------
+# Goji AST -> Python AST. Every node carries the Goji position of its
+# token (Python columns count from 0), so that tracebacks and
+# co_positions() lead back to the Goji source.
+#
+# Handlers: None -> Goji node -> (Python expr node, is numeric)
+# "Numeric" nodes always evaluate to an int or a float, for which the
+# int/float rules of runtime.values are Python's own: their + and *
+# become a plain BinOp. Anything else goes through add_values() and
+# multiply_values().
+# ----------------------------------------------------------------------
+
+# Python node -> Goji node -> text of the node's token -> Python node
+def at_token(node, expr, text):
+    line = max(expr.line, 1)
+    col = max(expr.col - 1, 0)
+    node.lineno = line
+    node.col_offset = col
+    node.end_lineno = line
+    node.end_col_offset = col + max(len(text), 1)
+    return node
+
+def at_line(node, line):
+    node.lineno = max(line, 1)
+    node.col_offset = 0
+    node.end_lineno = node.lineno
+    node.end_col_offset = 0
+    return node
+
+def load_name(name, expr, text):
+    return at_token(_ast.Name(id=name, ctx=_ast.Load()), expr, text)
+
+# Nodes the tree walker could not evaluate either evaluate to nil
+def py_other(state, expr):
+    if tr.eval >= ERROR:
+        tr.log("Cannot compile %s, it evaluates to nil" % type(expr))
+    return at_line(_ast.Constant(value=None), expr.line), False
+
+py_table = DispatchTable("python", py_other)
+
+def py_expr(expr):
+    handler = py_table.handlers.get(expr.__class__) or py_table.resolve(expr)
+    return handler(None, expr)
+
+@py_table.handles(IntegerExpr, FloatExpr, StringExpr, BoolExpr)
+def py_literal(state, expr):
+    value = expr.exprvalue
+    return at_token(_ast.Constant(value=value), expr, str(value)), type(value) is int or type(value) is float
+
+@py_table.handles(IdentifierExpr)
+def py_identifier(state, expr):
+    name = expr.name
+    return load_name(py_name(name), expr, name), False
+
+@py_table.handles(AssignmentExpr)
+def py_assignment(state, expr):
+    value, numeric = py_expr(expr.rhs)
+    ident = expr.ident
+    name = ident.name
+    target = at_token(_ast.Name(id=py_name(name), ctx=_ast.Store()), ident, name)
+    return at_token(_ast.NamedExpr(target=target, value=value), ident, name), numeric
+
+binary_helpers = {
+    SymbolType.OP_ADD: (ADD_NAME, _ast.Add),
+    SymbolType.OP_MULTIPLY: (MULTIPLY_NAME, _ast.Mult),
+}
+
+@py_table.handles(BinaryExpr)
+def py_binary(state, expr):
+    entry = binary_helpers.get(expr.operator)
+    if entry == None:
+        return py_other(state, expr)
+    helper_name, op_class = entry
+    lhs, lhs_numeric = py_expr(expr.lhs)
+    rhs, rhs_numeric = py_expr(expr.rhs)
+    text = expr.operator_text
+    if lhs_numeric and rhs_numeric:
+        return at_token(_ast.BinOp(left=lhs, op=op_class(), right=rhs), expr, text), True
+    call = _ast.Call(func=load_name(helper_name, expr, text), args=[lhs, rhs], keywords=[])
+    return at_token(call, expr, text), True
+
+# ast.Stmt -> Python expr node of its value
+def py_stmt_value(stmt):
+    if isinstance(stmt, ExpressionStmt):
+        value, numeric = py_expr(stmt.expression)
+        return value
+    if tr.eval >= ERROR:
+        tr.log("[%2d] Cannot compile %s, it evaluates to nil" % (stmt.line, stmt))
+    return at_line(_ast.Constant(value=None), stmt.line)
+
+# statement[] -> file name -> code object printing the value of each
+# statement as it runs, like run_program() does
+def compile_program(statements, filename):
+    # Python AST nodes all live until compile(): the cyclic collector
+    # would keep scanning them for nothing
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return compile_module(statements, filename)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def compile_module(statements, filename):
+    body = []
+    for stmt in statements:
+        value = py_stmt_value(stmt)
+        call = _ast.Call(func=_ast.Name(id=EMIT_NAME, ctx=_ast.Load()), args=[value], keywords=[])
+        expr_stmt = _ast.Expr(value=call)
+        for node in (call, call.func, expr_stmt):
+            node.lineno = value.lineno
+            node.col_offset = value.col_offset
+            node.end_lineno = value.end_lineno
+            node.end_col_offset = value.end_col_offset
+        body.append(expr_stmt)
+    module = _ast.Module(body=body, type_ignores=[])
+    return compile(module, filename, 'exec')
+
+# ast.Stmt -> file name -> code object evaluating to the statement's value
+def compile_stmt_code(stmt, filename):
+    return compile(_ast.Expression(body=py_stmt_value(stmt)), filename, 'eval')
+
+def emit_value(value):
+    print("==> %s" % format_value(value))
+
+# ----------------------------------------------------------------------
+# CodeCache: the compiled program next to its AST cache entries, in
+# marshal format (which is specific to the Python version)
+# ----------------------------------------------------------------------
+# Constant folding changes the code, so it is part of the key
+class CodeCache(AstCache):
+    suffix = CODE_SUFFIX
+
+    def __init__(self, cache_dir, engine_version, fold=True, max_bytes=MAX_CACHE_BYTES, root=None):
+        version = "%s:%s:fold=%s" % (engine_version, sys.implementation.cache_tag, fold)
+        super().__init__(cache_dir, version, max_bytes, root)
+
+    def read_entry(self, fo):
+        return marshal.load(fo)
+
+    def write_entry(self, fo, code):
+        marshal.dump(code, fo)
+
+    def describe(self, code):
+        return "compiled code"
+
+# code object -> exception -> (line, col) in the Goji source, or None
+def goji_position(code, e):
+    position = None
+    tb = e.__traceback__
+    while tb != None:
+        if tb.tb_frame.f_code is code:
+            positions = list(code.co_positions())
+            line, end_line, col, end_col = positions[tb.tb_lasti // 2]
+            if line != None and col != None:
+                position = (line, col + 1)
+        tb = tb.tb_next
+    return position
+
+# ----------------------------------------------------------------------
+# PythonRunner {
+#   _env      EnvTable the bindings are written back to
+#   _filename program file, for the positions of runtime errors
+#   _globals  the bindings as seen by the compiled code
+# }
+# Goji names are keys of the globals dict (as py_name() spells them);
+# builtins are left empty so that an unbound name raises NameError
+# instead of finding a builtin.
+# ----------------------------------------------------------------------
+class PythonRunner:
+    def __init__(self, env, filename):
+        self._env = env
+        self._filename = filename
+        self._globals = {
+            '__builtins__': {},
+            py_name('nil'): None,
+            EMIT_NAME: emit_value,
+            ADD_NAME: add_values,
+            MULTIPLY_NAME: multiply_values,
+        }
+        for item in env.items():
+            self._globals[py_name(item.name)] = item.value
+
+    def report(self, code, e):
+        position = goji_position(code, e)
+        if position == None:
+            position = (0, 0)
+        message = str(e)
+        if isinstance(e, NameError) and e.name != None and goji_name(e.name) != None:
+            message = "name '%s' is not defined" % goji_name(e.name)
+        if tr.eval >= ERROR:
+            tr.log("%s:%d:%d: %s: %s" % (self._filename, position[0], position[1], type(e).__name__, message))
+
+    # Runs a compile_program() code object, then binds its names in the
+    # EnvTable. A runtime error is reported at its Goji position and
+    # raised again, as the other engines raise it, once the names bound
+    # before the failing statement are in the EnvTable.
+    def run_program(self, code):
+        try:
+            exec(code, self._globals)
+        except Exception as e:
+            self.report(code, e)
+            raise
+        finally:
+            self.write_back()
+
+    def write_back(self):
+        for name, value in self._globals.items():
+            name = goji_name(name)
+            if name != None:
+                self._env.set_item(EnvItem(name, value))
+
+    # Same as eval_stmt(env, stmt) (for the env given to the runner)
+    def run_stmt(self, env, stmt):
+        code = compile_stmt_code(stmt, self._filename)
+        if tr.eval >= DEBUG:
+            tr.log("[%2d] compiled %d byte(s) of Python bytecode" % (stmt.line, len(code.co_code)))
+        try:
+            value = eval(code, self._globals)
+        except Exception as e:
+            self.report(code, e)
+            raise
+        if isinstance(stmt, ExpressionStmt) and isinstance(stmt.expression, AssignmentExpr):
+            ident_expr = stmt.expression.ident
+            env.set_item(EnvItem(ident_expr.name, value, ident_expr.name_id))
+        return value
@@ -0,0 +1,59 @@
+from tokenizer.names import (
+    intern_name,
+)
+
+from parser.symbols import (
+    SymbolType,
+)
+
+from parser.driver import (
+    pratt_parse_program,
+)
+
+from ast.expressions import (
+    IntegerExpr,
+    IdentifierExpr,
+    AssignmentExpr,
+    BinaryExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from runtime.env import (
+    EnvItem,
+    EnvTable,
+)
+
+from runtime.eval import (
+    eval_stmt,
+)
+
+from runtime.closures import (
+    close_stmt,
+    exec_closure,
+)
+
+#  Test closure compilation
+class TestClosures:
+    def test_unknown_operator(self, bindings):
+        # (a = 3) - 1: no value, but the operands still run
+        assign = AssignmentExpr(IdentifierExpr(intern_name("a"), 1, 2), IntegerExpr(3, 1, 6))
+        stmt = ExpressionStmt(BinaryExpr(SymbolType.OP_SUBTRACT, assign, IntegerExpr(1, 1, 11), 1, 9))
+        tree_env = EnvTable()
+        closure_env = EnvTable()
+        assert exec_closure(closure_env, stmt) == eval_stmt(tree_env, stmt) == None
+        assert bindings(closure_env) == bindings(tree_env) == [("a", 3)]
+
+    def test_closure_runs_again(self):
+        statements = pratt_parse_program("testdata/simple2.goji")
+        # y5 = y4 + y1
+        run_y5 = close_stmt(statements[-1])
+        env = EnvTable()
+        env.set_item(EnvItem("y4", 1))
+        env.set_item(EnvItem("y1", 2))
+        assert run_y5(env) == 3
+        env.set_item(EnvItem("y4", 1.5))
+        assert run_y5(env) == 3.5
+        assert env.get_item("y5").value == 3.5
@@ -0,0 +1,59 @@
+from tokenizer.names import (
+    intern_name,
+)
+
+from runtime.env import (
+    EnvItem,
+    EnvTable,
+    nil,
+    nil_id,
+)
+
+# A root EnvTable with a child scope, set up as runtime.bench_env does
+def scopes():
+    root = EnvTable()
+    root.version = 1
+    return root, EnvTable(root)
+
+#  Test the EnvTable of the runtime
+class TestEnvTable:
+    def test_rebind_keeps_position(self, bindings):
+        env = EnvTable()
+        for name, value in (("a", 1), ("b", 2), ("c", 3)):
+            env.set_item(EnvItem(name, value))
+        env.set_item(EnvItem("b", 'two', intern_name("b")))
+        env.set_item(EnvItem("a", 1.5))
+        assert bindings(env) == [("a", 1.5), ("b", 'two'), ("c", 3)]
+        assert env.size == 3
+        assert env.get_item("b").value == 'two'
+        assert env.get_item_by_id(intern_name("a")).value == 1.5
+
+    def test_parent_chain(self, bindings):
+        root, child = scopes()
+        grandchild = EnvTable(child)
+        root.set_item(EnvItem("x", 1))
+        root.set_item(EnvItem("y", 2))
+        child.set_item(EnvItem("y", 20))
+        assert grandchild.get_item("x").value == 1
+        # the closest binding wins, the parent keeps its own
+        assert grandchild.get_item("y").value == 20
+        assert root.get_item("y").value == 2
+        assert not child.hasTopLevelValue("x")
+        assert child.hasTopLevelValue("y")
+        assert grandchild.get_item_by_id(intern_name("not_bound_anywhere")) == None
+        assert child.get_item("never_interned_name") == None
+        assert bindings(child) == [("y", 20)]
+
+    def test_nil(self):
+        root, child = scopes()
+        # nil is found without being bound
+        assert child.get_item_by_id(nil_id) is nil
+        assert root.get_item("nil") is nil
+        assert root.hasTopLevelValue("nil")
+        assert root.hasTopLevelId(nil_id)
+        # nil values are not bound
+        root.set_item(EnvItem("nil", None))
+        root.set_item(EnvItem("n", None))
+        assert root.size == 0
+        assert root.get_item("n") == None
+        assert str(nil) == "nil"
@@ -0,0 +1,63 @@
+import pytest
+
+from ast.expressions import (
+    IntegerExpr,
+    FloatExpr,
+    IdentifierExpr,
+    BinaryExpr,
+)
+
+from runtime.fold import (
+    fold_constants,
+)
+
+# -> (text of one statement -> (folded right-hand side, nodes removed))
+@pytest.fixture
+def folded_rhs(parse_text):
+    def fold(text):
+        statements, removed = fold_constants(parse_text(text))
+        return statements[0].expression.rhs, removed
+    return fold
+
+#  Test constant folding
+class TestFold:
+    def test_int_times_int(self, folded_rhs):
+        rhs, removed = folded_rhs("a = 6 * 7")
+        assert isinstance(rhs, IntegerExpr)
+        assert rhs.exprvalue == 42
+        # at the operator
+        assert (rhs.line, rhs.col) == (1, 7)
+        assert removed == 2
+
+    def test_int_plus_float(self, folded_rhs):
+        rhs, removed = folded_rhs("a = 1 + 2.5")
+        assert isinstance(rhs, FloatExpr)
+        assert rhs.exprvalue == 3.5
+        assert (rhs.line, rhs.col) == (1, 7)
+
+    def test_float_plus_float(self, folded_rhs):
+        rhs, removed = folded_rhs("\n\nb = 1.25 +  0.5")
+        assert isinstance(rhs, FloatExpr)
+        assert rhs.exprvalue == 1.75
+        assert (rhs.line, rhs.col) == (3, 10)
+
+    def test_identifier_stops_folding(self, folded_rhs):
+        rhs, removed = folded_rhs("a = x + 2 * 3")
+        assert isinstance(rhs, BinaryExpr)
+        assert isinstance(rhs.lhs, IdentifierExpr)
+        assert isinstance(rhs.rhs, IntegerExpr)
+        assert rhs.rhs.exprvalue == 6
+        assert removed == 2
+
+        rhs, removed = folded_rhs("a = 2 * x * 3")
+        assert str(rhs) == "BinaryExpr(OP:'*', Left: BinaryExpr(OP:'*', Left: IntegerLiteral(2), Right: Identifier(x)), Right: IntegerLiteral(3))"
+        assert removed == 0
+
+    def test_removed_count(self, parse_text):
+        statements = parse_text("a = 1 + 2 * 3\nb = a\nc = (1 + 2) * (3 + 4.5) + a\n")
+        folded, removed = fold_constants(statements)
+        # two BinaryExprs in a, three in c
+        assert removed == 4 + 6
+        assert str(folded[0]) == "AssignmentExpr(IDENT: Identifier(a), Value: IntegerLiteral(7))"
+        assert folded[1] is statements[1]
+
@@ -0,0 +1,93 @@
+import pytest
+
+from runtime.env import (
+    EnvTable,
+)
+
+from runtime.eval import (
+    EvalEngine,
+)
+
+from runtime.values import (
+    multiply_values,
+)
+
+from runtime.pycompile import (
+    EMIT_NAME,
+    ADD_NAME,
+    MULTIPLY_NAME,
+    CodeCache,
+    PythonRunner,
+    compile_program,
+    goji_position,
+    py_name,
+)
+
+import program
+
+def emit_nothing(value):
+    pass
+
+#  Test the compiler to Python code objects
+class TestPythonCompiler:
+    def test_python_constants_as_names(self, program_output, tmp_path):
+        source = tmp_path / "names.goji"
+        source.write_text("None = 3\nTrue = None + 1\nFalse = True * 2\n", encoding="utf-8")
+        tree = program_output(str(source))
+        compiled = program_output(str(source), eval_engine=EvalEngine.PYTHON)
+        assert "None: 3\nTrue: 4\nFalse: 8\n" in compiled
+        assert compiled == tree
+
+    def test_numeric_operands_use_binop(self, parse_text):
+        code = compile_program(parse_text("a = 1 + x\nb = 2 * 3.5\n"), "compiled.goji")
+        assert ADD_NAME in code.co_names
+        assert MULTIPLY_NAME not in code.co_names
+        assert py_name("x") in code.co_names
+        assert "x" not in code.co_names
+
+    def test_error_position(self, parse_text):
+        code = compile_program(parse_text("a = 1\nb = 'x' * 1.5\n"), "compiled.goji")
+        names = {'__builtins__': {}, EMIT_NAME: emit_nothing, MULTIPLY_NAME: multiply_values}
+        with pytest.raises(TypeError) as info:
+            exec(code, names)
+        # at the '*'
+        assert goji_position(code, info.value) == (2, 9)
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_runtime_error_raised(self, capsys, parse_text, bindings, stream):
+        statements = parse_text("a = 1\nb = a + 1\nq = zz + 1\nc = 3\n")
+        env = EnvTable()
+        runner = PythonRunner(env, "errors.goji")
+        with pytest.raises(NameError):
+            if stream:
+                for stmt in statements:
+                    runner.run_stmt(env, stmt)
+            else:
+                runner.run_program(compile_program(statements, "errors.goji"))
+        assert "errors.goji:3:5: NameError: name 'zz' is not defined" in capsys.readouterr().out
+        # bound up to the failing statement
+        assert bindings(env) == [("a", 1), ("b", 2)]
+
+#  Test the cache of compiled code
+class TestCodeCache:
+    def test_round_trip(self, tmp_path, parse_text):
+        code = compile_program(parse_text("a = 1 + x\n"), "compiled.goji")
+        cache = CodeCache(str(tmp_path), "V0_2_0", True)
+        cache.store("compiled.goji", b"a = 1 + x\n", code)
+        assert cache.load("compiled.goji", b"a = 1 + x\n") == code
+        assert CodeCache(str(tmp_path), "V0_2_0", False).load("compiled.goji", b"a = 1 + x\n") == None
+
+    def test_fold_in_key(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        source = tmp_path / "fold.goji"
+        source.write_text("a = 2 * 3\n", encoding="utf-8")
+        compiled = []
+        def counting_compile(statements, filename):
+            compiled.append(filename)
+            return compile_program(statements, filename)
+        monkeypatch.setattr(program, "compile_program", counting_compile)
+        counts = []
+        for fold in (True, True, False, False):
+            program.cached_python_program(str(source), fold=fold)
+            counts.append(len(compiled))
+        assert counts == [1, 1, 2, 2]
@@ -0,0 +1,70 @@
+import pytest
+
+from parser.symbols import (
+    SymbolType,
+)
+
+from ast.expressions import (
+    NilExpr,
+    IntegerExpr,
+    FloatExpr,
+    BoolExpr,
+    StringExpr,
+)
+
+from runtime.values import (
+    add_values,
+    multiply_values,
+    binary_value,
+    format_value,
+    literal_for_value,
+)
+
+# value -> (value, its type), so that 3 and 3.0 compare different
+def typed(value):
+    return (value, type(value))
+
+#  Test the native runtime values
+class TestValues:
+    def test_int_only_from_ints(self):
+        assert typed(add_values(2, 3)) == typed(5)
+        assert typed(multiply_values(4, 5)) == typed(20)
+        assert typed(add_values(2, 1.5)) == typed(3.5)
+        assert typed(add_values(1.5, 2)) == typed(3.5)
+        assert typed(multiply_values(4, 0.5)) == typed(2.0)
+        assert typed(multiply_values(0.5, 4)) == typed(2.0)
+        assert typed(add_values(1.25, 0.5)) == typed(1.75)
+        # 2.0 * 3.0 is a whole number, still a float
+        assert typed(multiply_values(2.0, 3.0)) == typed(6.0)
+
+    def test_binary_value(self):
+        assert typed(binary_value(SymbolType.OP_ADD, 2, 3)) == typed(5)
+        assert typed(binary_value(SymbolType.OP_MULTIPLY, 3, 1.5)) == typed(4.5)
+        assert binary_value(SymbolType.OP_SUBTRACT, 3, 1) == None
+        assert binary_value(None, 3, 1) == None
+
+    @pytest.mark.parametrize("value", [0, 17, -3, 1020.0, 164.7, 1e-7, 'abc', ''])
+    def test_format_value_as_literal(self, value):
+        assert format_value(value) == str(literal_for_value(value))
+
+    def test_format_nil_and_bool(self):
+        assert format_value(None) == str(NilExpr(0, 0)) == "NilLiteral"
+        assert format_value(True) == "BoolLiteral(True)"
+        assert format_value(False) == "BoolLiteral(False)"
+        assert str(BoolExpr(True, 1, 5)) == "BoolLiteral(True)"
+
+    def test_literal_for_value(self):
+        literal = literal_for_value(7, 3, 9)
+        assert isinstance(literal, IntegerExpr)
+        assert (literal.exprvalue, literal.line, literal.col) == (7, 3, 9)
+        assert isinstance(literal_for_value(7.0), FloatExpr)
+        assert isinstance(literal_for_value('s'), StringExpr)
+        # a bool is not an IntegerExpr
+        assert isinstance(literal_for_value(True), BoolExpr)
+        assert literal_for_value(None) == None
+
+    def test_bool_prints(self, program_output, tmp_path):
+        source = tmp_path / "bool.goji"
+        source.write_text("t = true\nfalse\n", encoding="utf-8")
+        output = program_output(str(source))
+        assert "==> BoolLiteral(True)\n==> BoolLiteral(False)\n" in output
@@ -0,0 +1,102 @@
+from tokenizer.names import (
+    intern_name,
+)
+
+from parser.symbols import (
+    SymbolType,
+)
+
+from ast.expressions import (
+    IntegerExpr,
+    BinaryExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from runtime.env import (
+    EnvItem,
+    EnvTable,
+)
+
+from runtime.eval import (
+    eval_table,
+    stmt_eval_table,
+    eval_stmt,
+)
+
+from runtime.vm import (
+    LOAD_CONST,
+    LOAD_NAME,
+    STORE_NAME,
+    ADD,
+    MULTIPLY,
+    BINARY,
+    EVAL_NODE,
+    EVAL_STMT,
+    compile_stmt,
+    run_block,
+)
+
+# A node neither the compiler nor the tree walker knows of
+class Answer:
+    def __init__(self, line):
+        self.line = line
+
+def eval_answer(env, node):
+    return 42
+
+#  Test the bytecode compiler and the VM
+class TestVm:
+    def test_compile_assignment(self, parse_text):
+        stmt = parse_text("a = x + 2 * 3.5")[0]
+        block = compile_stmt(stmt)
+        assert block.code == [
+            LOAD_NAME, intern_name("x"),
+            LOAD_CONST, 0,
+            LOAD_CONST, 1,
+            MULTIPLY, 0,
+            ADD, 0,
+            STORE_NAME, 0,
+        ]
+        assert block.consts == [2, 3.5]
+        assert block.names == [("a", intern_name("a"))]
+        assert block.line == 1
+
+    def test_run_block(self, parse_text, bindings):
+        env = EnvTable()
+        env.set_item(EnvItem("x", 1))
+        block = compile_stmt(parse_text("a = x + 2 * 3.5")[0])
+        assert run_block(env, block) == 8.0
+        assert env.get_item("a").value == 8.0
+        # the block runs again against the new binding
+        env.set_item(EnvItem("x", 2))
+        assert run_block(env, block) == 9.0
+        assert bindings(env) == [("x", 2), ("a", 9.0)]
+
+    def test_other_operator(self):
+        one = IntegerExpr(1, 1, 1)
+        two = IntegerExpr(2, 1, 5)
+        stmt = ExpressionStmt(BinaryExpr(SymbolType.OP_SUBTRACT, one, two, 1, 3))
+        block = compile_stmt(stmt)
+        assert block.code[-2:] == [BINARY, 2]
+        assert block.consts[2] == SymbolType.OP_SUBTRACT
+        assert run_block(EnvTable(), block) == eval_stmt(EnvTable(), stmt)
+
+    def test_eval_node_fallback(self, monkeypatch):
+        monkeypatch.setitem(eval_table.handlers, Answer, eval_answer)
+        answer = Answer(1)
+        stmt = ExpressionStmt(BinaryExpr(SymbolType.OP_ADD, answer, IntegerExpr(1, 1, 5), 1, 3))
+        block = compile_stmt(stmt)
+        assert block.code[:2] == [EVAL_NODE, 0]
+        assert block.consts[0] is answer
+        assert run_block(EnvTable(), block) == 43
+
+    def test_eval_stmt_fallback(self, monkeypatch):
+        monkeypatch.setitem(stmt_eval_table.handlers, Answer, eval_answer)
+        block = compile_stmt(Answer(3))
+        assert block.code == [EVAL_STMT, 0]
+        assert block.line == 3
+        assert run_block(EnvTable(), block) == 42
+
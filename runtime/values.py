@@ -0,0 +1,84 @@
+from ast.expressions import (
+    IntegerExpr,
+    FloatExpr,
+    BoolExpr,
+    StringExpr,
+)
+
+from parser.symbols import (
+    SymbolType,
+)
+
+from tracing import (
+    tr,
+    TRACE,
+)
+
+# ----------------------------------------------------------------------
+# Runtime values are native Python objects: int, float, bool and str,
+# with None for nil. The type of a value is its tag, compared with
+# `type(value) is int` (not isinstance: a bool is an int in Python).
+# AST literals are only built again where a node is needed, e.g. by
+# constant folding.
+# ----------------------------------------------------------------------
+
+# The result of an operation is an int only when both operands are
+# ints, a float otherwise
+def add_values(lhs, rhs):
+    if tr.eval >= TRACE:
+        tr.log("Add values: %g + %g" % (float(lhs), float(rhs)))
+    result = lhs + rhs
+    if type(lhs) is int and type(rhs) is int:
+        return result
+    return float(result)
+
+def multiply_values(lhs, rhs):
+    if tr.eval >= TRACE:
+        tr.log("Multiply values: %g * %g" % (float(lhs), float(rhs)))
+    result = lhs * rhs
+    if type(lhs) is int and type(rhs) is int:
+        return result
+    return float(result)
+
+# operator SymbolType -> (lhs value -> rhs value -> value)
+binary_operations = {
+    SymbolType.OP_ADD: add_values,
+    SymbolType.OP_MULTIPLY: multiply_values,
+}
+
+# Operator SymbolType -> lhs value -> rhs value -> value, or None for
+# an operator that cannot be evaluated (yet)
+def binary_value(opsym, lhs, rhs):
+    operation = binary_operations.get(opsym)
+    if operation == None:
+        return None
+    return operation(lhs, rhs)
+
+# value -> text of the literal node it stands for, as printed by eval
+def format_value(value):
+    value_type = type(value)
+    if value_type is int:
+        return "IntegerLiteral(%d)" % value
+    elif value_type is float:
+        return "FloatLiteral(%g)" % value
+    elif value_type is str:
+        return "StringLiteral('%s')" % value
+    elif value_type is bool:
+        return "BoolLiteral(%s)" % value
+    elif value == None:
+        return "NilLiteral"
+    return str(value)
+
+literal_classes = {
+    int: IntegerExpr,
+    float: FloatExpr,
+    bool: BoolExpr,
+    str: StringExpr,
+}
+
+# value -> line -> col -> literal ast.Expr (None if it has no literal)
+def literal_for_value(value, line=0, col=0):
+    literal_class = literal_classes.get(type(value))
+    if literal_class == None:
+        return None
+    return literal_class(value, line, col)
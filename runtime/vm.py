@@ -0,0 +1,207 @@
+from ast.expressions import (
+    AssignmentExpr,
+    IdentifierExpr,
+    BinaryExpr,
+    IntegerExpr,
+    FloatExpr,
+    BoolExpr,
+    StringExpr,
+)
+
+from ast.statements import (
+    ExpressionStmt,
+)
+
+from ast.dispatch import (
+    DispatchTable,
+)
+
+from parser.symbols import (
+    SymbolType,
+)
+
+from tokenizer.names import (
+    name_for_id,
+)
+
+from runtime.env import (
+    EnvItem,
+)
+
+from runtime.eval import (
+    eval_expr,
+    eval_stmt,
+)
+
+from runtime.values import (
+    binary_value,
+    add_values,
+    multiply_values,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    DEBUG,
+)
+
+# ----------------------------------------------------------------------
+# Instructions are (opcode, argument) pairs, flattened into one list of
+# ints. Opcodes are plain ints so the VM loop compares ints only.
+# ----------------------------------------------------------------------
+LOAD_CONST = 0  # push consts[arg]
+LOAD_NAME = 1   # push the value bound to the name id arg
+STORE_NAME = 2  # bind names[arg] to the top of the stack (not popped)
+ADD = 3         # pop rhs, pop lhs, push lhs + rhs
+MULTIPLY = 4    # pop rhs, pop lhs, push lhs * rhs
+BINARY = 5      # as ADD, for the operator SymbolType consts[arg]
+EVAL_NODE = 6   # push eval_expr() of the node consts[arg]
+EVAL_STMT = 7   # push eval_stmt() of the statement consts[arg]
+
+opcode_names = ('LOAD_CONST', 'LOAD_NAME', 'STORE_NAME', 'ADD', 'MULTIPLY', 'BINARY', 'EVAL_NODE', 'EVAL_STMT')
+
+# ----------------------------------------------------------------------
+# CodeBlock {
+#   code    flattened (opcode, argument) pairs
+#   consts  literal values, operators and nodes left to eval_expr()
+#   names   (name, name id) of the STORE_NAME targets
+#   line    source line of the statement
+# }
+# The bytecode of one statement; running it leaves the value of the
+# statement on the stack.
+# ----------------------------------------------------------------------
+class CodeBlock:
+    __slots__ = ('code', 'consts', 'names', 'line')
+
+    def __init__(self, line):
+        self.code = []
+        self.consts = []
+        self.names = []
+        self.line = line
+
+    def emit(self, opcode, arg=0):
+        self.code.append(opcode)
+        self.code.append(arg)
+
+    def add_const(self, value):
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def add_name(self, name, name_id):
+        self.names.append((name, name_id))
+        return len(self.names) - 1
+
+    def disassemble(self):
+        lines = []
+        code = self.code
+        for pc in range(0, len(code), 2):
+            opcode = code[pc]
+            arg = code[pc + 1]
+            if opcode == LOAD_CONST:
+                detail = repr(self.consts[arg])
+            elif opcode == BINARY or opcode == EVAL_NODE or opcode == EVAL_STMT:
+                detail = str(self.consts[arg])
+            elif opcode == STORE_NAME:
+                detail = self.names[arg][0]
+            elif opcode == LOAD_NAME:
+                detail = name_for_id(arg)
+            else:
+                detail = ''
+            lines.append(("[%2d] %4d %-10s %s" % (self.line, pc // 2, opcode_names[opcode], detail)).rstrip())
+        return "\n".join(lines)
+
+# ----------------------------------------------------------------------
+# Compiler handlers: CodeBlock -> node
+# ----------------------------------------------------------------------
+
+# Nodes without bytecode of their own are evaluated by the tree walker
+def compile_other(block, expr):
+    block.emit(EVAL_NODE, block.add_const(expr))
+
+compile_table = DispatchTable("compile", compile_other)
+
+def compile_expr(block, expr):
+    handler = compile_table.handlers.get(expr.__class__) or compile_table.resolve(expr)
+    handler(block, expr)
+
+@compile_table.handles(IntegerExpr, FloatExpr, StringExpr, BoolExpr)
+def compile_literal(block, expr):
+    block.emit(LOAD_CONST, block.add_const(expr.exprvalue))
+
+@compile_table.handles(IdentifierExpr)
+def compile_identifier(block, expr):
+    block.emit(LOAD_NAME, expr.name_id)
+
+@compile_table.handles(AssignmentExpr)
+def compile_assignment(block, expr):
+    compile_expr(block, expr.rhs)
+    ident_expr = expr.ident
+    block.emit(STORE_NAME, block.add_name(ident_expr.name, ident_expr.name_id))
+
+@compile_table.handles(BinaryExpr)
+def compile_binary(block, expr):
+    compile_expr(block, expr.lhs)
+    compile_expr(block, expr.rhs)
+    opsym = expr.operator
+    if opsym == SymbolType.OP_ADD:
+        block.emit(ADD)
+    elif opsym == SymbolType.OP_MULTIPLY:
+        block.emit(MULTIPLY)
+    else:
+        block.emit(BINARY, block.add_const(opsym))
+
+# ast.Stmt -> CodeBlock
+def compile_stmt(stmt):
+    block = CodeBlock(stmt.line)
+    if isinstance(stmt, ExpressionStmt):
+        compile_expr(block, stmt.expression)
+    else:
+        block.emit(EVAL_STMT, block.add_const(stmt))
+    if tr.eval >= DEBUG:
+        tr.log(block.disassemble())
+    return block
+
+# ----------------------------------------------------------------------
+# The VM: EnvTable -> CodeBlock -> value of the statement
+# ----------------------------------------------------------------------
+def run_block(env, block):
+    code = block.code
+    consts = block.consts
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+    end = len(code)
+    while pc < end:
+        opcode = code[pc]
+        arg = code[pc + 1]
+        pc = pc + 2
+        if opcode == LOAD_NAME:
+            push(env.get_item_by_id(arg).value)
+        elif opcode == LOAD_CONST:
+            push(consts[arg])
+        elif opcode == ADD:
+            rhs = pop()
+            push(add_values(pop(), rhs))
+        elif opcode == MULTIPLY:
+            rhs = pop()
+            push(multiply_values(pop(), rhs))
+        elif opcode == STORE_NAME:
+            name, name_id = block.names[arg]
+            env.set_item(EnvItem(name, stack[-1], name_id))
+        elif opcode == BINARY:
+            rhs = pop()
+            push(binary_value(consts[arg], pop(), rhs))
+        elif opcode == EVAL_NODE:
+            push(eval_expr(env, consts[arg]))
+        elif opcode == EVAL_STMT:
+            push(eval_stmt(env, consts[arg]))
+        elif tr.eval >= ERROR:
+            tr.log("[%2d] Unknown opcode %d" % (block.line, opcode))
+    if len(stack) == 0:
+        return None
+    return stack[-1]
+
+# Same as eval_stmt(env, stmt), through the bytecode
+def exec_stmt(env, stmt):
+    return run_block(env, compile_stmt(stmt))
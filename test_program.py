@@ -0,0 +1,58 @@
+import pytest
+
+from tokenizer.tokens import (
+    LexerEngine,
+)
+
+from runtime.eval import (
+    EvalEngine,
+)
+
+from program import (
+    EXIT_OK,
+    EXIT_SYNTAX_ERROR,
+    run_program,
+)
+
+#  Test whole programs, from source text to printed values
+class TestProgram:
+    @pytest.mark.parametrize("engine", [LexerEngine.CLASSIC, LexerEngine.REGEX, LexerEngine.PACKED, LexerEngine.VECTOR])
+    def test_stream_same_as_batch(self, program_output, engine):
+        batch = program_output("testdata/simple2.goji", engine=engine)
+        streamed = program_output("testdata/simple2.goji", engine=engine, stream=True)
+        assert "y5: 164.7" in batch
+        assert streamed == batch
+
+    # Every engine, folded or not, batch or streamed, prints what the
+    # tree walker prints
+    @pytest.mark.parametrize("eval_engine", list(EvalEngine))
+    @pytest.mark.parametrize("options", [{}, {"fold": False}, {"stream": True}])
+    def test_same_output_as_tree(self, program_output, eval_engine, options):
+        tree = program_output("testdata/simple2.goji")
+        output = program_output("testdata/simple2.goji", eval_engine=eval_engine, **options)
+        assert "y5: 164.7" in output
+        assert output == tree
+
+    @pytest.mark.parametrize("eval_engine", [EvalEngine.TREE, EvalEngine.PYTHON])
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_syntax_error_not_evaluated(self, capsys, tmp_path, eval_engine, stream):
+        source = tmp_path / "bad.goji"
+        source.write_text("a = 1\nb = a +\nc = 3\n", encoding="utf-8")
+        status = run_program(str(source), use_cache=False, stream=stream, eval_engine=eval_engine)
+        output = capsys.readouterr().out
+        assert status == EXIT_SYNTAX_ERROR
+        assert "bad.goji:2:8:" in output
+        assert "IntegerLiteral(3)" not in output
+        assert "Ending Environment" not in output
+        assert run_program("testdata/simple2.goji", use_cache=False, stream=stream, eval_engine=eval_engine) == EXIT_OK
+
+    @pytest.mark.parametrize("eval_engine", list(EvalEngine))
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_runtime_error_raised(self, capsys, tmp_path, eval_engine, stream):
+        source = tmp_path / "runtime.goji"
+        source.write_text("a = 1\nb = 'x' * 1.5\nc = 3\n", encoding="utf-8")
+        with pytest.raises(TypeError):
+            run_program(str(source), use_cache=False, stream=stream, eval_engine=eval_engine)
+        output = capsys.readouterr().out
+        assert "IntegerLiteral(3)" not in output
+        assert "Ending Environment" not in output
@@ -0,0 +1,232 @@
+import io
+
+from tokenizer.tokens import (
+    Token,
+    TokenItem,
+    Tokenizer,
+    ScanContext,
+    LexerEngine,
+    tokenize_line,
+    scan_line,
+)
+
+from tokenizer.tools import (
+    open_source,
+    iter_lines,
+)
+
+# ------------------------------------------------------------
+# TokenEdit {
+#   start      index of the first token that changed
+#   old_end    end (exclusive) of the replaced tokens, old indexes
+#   new_end    end (exclusive) of the replacement, new indexes
+#   first_line first source line that was re-lexed
+#   relexed    number of lines that were re-lexed
+#   line_delta number of lines inserted (negative: removed)
+# }
+# Tokens before start are unchanged; tokens from old_end on are
+# unchanged apart from being shifted by new_end - old_end (and
+# their line numbers by line_delta).
+# ------------------------------------------------------------
+class TokenEdit:
+    def __init__(self, start, old_end, new_end, first_line, relexed, line_delta=0):
+        self.start = start
+        self.old_end = old_end
+        self.new_end = new_end
+        self.first_line = first_line
+        self.relexed = relexed
+        self.line_delta = line_delta
+
+    def __str__(self):
+        return "TokenEdit([%d:%d] -> [%d:%d], lines %d+%d)" % \
+            (self.start, self.old_end, self.start, self.new_end, self.first_line, self.relexed)
+
+    @property
+    def delta(self):
+        return self.new_end - self.old_end
+
+# lno -> line -> entry ScanContext -> engine -> (TokenItem[], exit ScanContext)
+def lex_line(lno, line, entry_state, engine):
+    if line.startswith("//") or len(line) == 0:
+        return [], entry_state
+    if engine == LexerEngine.REGEX and entry_state == ScanContext.IN_NOTHING:
+        return scan_line(lno, line), ScanContext.IN_NOTHING
+    tk = Tokenizer()
+    tk.state = entry_state
+    tokenize_line(tk, lno, line)
+    return tk.take_tokens(), tk.state
+
+# ----------------------------------------------------------------------
+# IncrementalTokenizer {
+#   _lines      source lines (rstripped)
+#   _runs       TokenItem[] per line, including its LINE_END
+#   _run_lines  line number each run was lexed at
+#   _entries    ScanContext the lexer is in when it starts each line
+#   _starts     token index of the first token of each line, and the
+#               token count as the last entry
+#   _shift_from entries of _starts from this index on are short by
+#   _shift      this many tokens
+# }
+# After an edit only the edited lines are lexed again, plus any
+# following line whose entry state is no longer the same. Since
+# tokenize_line() drains the Tokenizer at every line end (an
+# unterminated quote ends with its line), every line is entered
+# IN_NOTHING today and an edit never spreads past its own lines.
+#
+# Nothing past the edited lines is touched by an edit: the token
+# indexes that follow move by one pending shift, settled only between
+# one edit and the next, and runs that moved to another line get
+# their line numbers (as copies) when tokens() is called.
+# ----------------------------------------------------------------------
+class IncrementalTokenizer:
+    def __init__(self, engine=LexerEngine.REGEX):
+        self._engine = engine
+        self._lines = []
+        self._runs = []
+        self._run_lines = []
+        self._entries = []
+        self._starts = [0]
+        self._shift_from = 1
+        self._shift = 0
+
+    @property
+    def line_count(self):
+        return len(self._lines)
+
+    @property
+    def lines(self):
+        return self._lines
+
+    def load(self, source):
+        fo, should_close = open_source(source)
+        lines = []
+        try:
+            if fo != None:
+                lines = list(iter_lines(fo))
+        finally:
+            if should_close:
+                fo.close()
+        return self.set_lines(lines)
+
+    def set_text(self, text):
+        return self.set_lines(list(iter_lines(io.StringIO(text))))
+
+    def set_lines(self, lines):
+        return self.update(lines)
+
+    # Replace the whole buffer, re-lexing only the lines that differ
+    # from the current ones (common leading and trailing lines are kept)
+    def update(self, new_lines):
+        old_lines = self._lines
+        n_old = len(old_lines)
+        n_new = len(new_lines)
+        first = 0
+        while first < n_old and first < n_new and old_lines[first] == new_lines[first]:
+            first = first + 1
+        tail = 0
+        while tail < n_old - first and tail < n_new - first \
+                and old_lines[n_old - 1 - tail] == new_lines[n_new - 1 - tail]:
+            tail = tail + 1
+        return self.edit(first, n_old - tail, new_lines[first:n_new - tail])
+
+    # Replace lines [first, last) (0-based) by new_lines
+    def edit(self, first, last, new_lines):
+        start = self.token_index_of_line(first)
+        old_end = self.token_index_of_line(last)
+        self.move_shift_to(last)
+
+        entry_state = ScanContext.IN_NOTHING
+        if first > 0:
+            entry_state = self.exit_state_of_line(first - 1)
+
+        new_runs = []
+        new_run_lines = []
+        new_entries = []
+        new_starts = []
+        token_idx = start
+        lno = first
+        for line in new_lines:
+            lno = lno + 1
+            tokens, exit_state = lex_line(lno, line, entry_state, self._engine)
+            new_runs.append(tokens)
+            new_run_lines.append(lno)
+            new_entries.append(entry_state)
+            new_starts.append(token_idx)
+            token_idx = token_idx + len(tokens)
+            entry_state = exit_state
+
+        self._lines[first:last] = new_lines
+        self._runs[first:last] = new_runs
+        self._run_lines[first:last] = new_run_lines
+        self._entries[first:last] = new_entries
+        self._starts[first:last] = new_starts
+        relexed = len(new_lines)
+
+        # The lines that were kept follow the new ones
+        idx = first + len(new_lines)
+        self._shift_from = idx
+        self._shift = self._shift + token_idx - old_end
+
+        # Keep going while a following line is entered in another state
+        n = len(self._lines)
+        while idx < n and self._entries[idx] != entry_state:
+            tokens, exit_state = lex_line(idx + 1, self._lines[idx], entry_state, self._engine)
+            old_run = self._runs[idx]
+            old_end = old_end + len(old_run)
+            self._starts[idx] = self._starts[idx] + self._shift
+            self._shift_from = idx + 1
+            self._shift = self._shift + len(tokens) - len(old_run)
+            self._runs[idx] = tokens
+            self._run_lines[idx] = idx + 1
+            self._entries[idx] = entry_state
+            entry_state = exit_state
+            relexed = relexed + 1
+            idx = idx + 1
+
+        new_end = self.token_index_of_line(idx)
+        return TokenEdit(start, old_end, new_end, first + 1, relexed, len(new_lines) - (last - first))
+
+    # Settle the pending shift between _shift_from and idx, so that it
+    # applies from idx on; costs the distance to the previous edit
+    def move_shift_to(self, idx):
+        starts = self._starts
+        shift = self._shift
+        if self._shift_from < idx:
+            for pos in range(self._shift_from, idx):
+                starts[pos] = starts[pos] + shift
+        else:
+            for pos in range(idx, min(self._shift_from, len(starts))):
+                starts[pos] = starts[pos] - shift
+        self._shift_from = idx
+
+    def token_index_of_line(self, idx):
+        if idx >= self._shift_from:
+            return self._starts[idx] + self._shift
+        return self._starts[idx]
+
+    def exit_state_of_line(self, idx):
+        if idx + 1 < len(self._entries):
+            return self._entries[idx + 1]
+        tokens, exit_state = lex_line(idx + 1, self._lines[idx], self._entries[idx], self._engine)
+        return exit_state
+
+    # TokenItem[] of the lines edit re-lexed, which are the tokens
+    # [edit.start, edit.new_end) of tokens(); only valid until the next edit
+    def edited_tokens(self, edit):
+        replaced = []
+        for idx in range(edit.first_line - 1, edit.first_line - 1 + edit.relexed):
+            replaced.extend(self._runs[idx])
+        return replaced
+
+    def tokens(self):
+        all_tokens = []
+        for idx, run in enumerate(self._runs):
+            lno = idx + 1
+            if self._run_lines[idx] != lno:
+                # TokenItems handed out before keep their line
+                run = [TokenItem(tk_item.t, tk_item.v).set_meta(lno, tk_item.col) for tk_item in run]
+                self._runs[idx] = run
+                self._run_lines[idx] = lno
+            all_tokens.extend(run)
+        all_tokens.append(TokenItem(Token.INPUT_END))
+        return all_tokens
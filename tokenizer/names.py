@@ -0,0 +1,39 @@
+# ----------------------------------------------------------------------
+# NameTable {
+#   _ids   name -> id
+#   _names id -> name
+# }
+# Hands out small, dense integer ids for identifiers so that later
+# phases compare (or index by) ints instead of comparing strings.
+# Ids are never reused; a process has one table, name_table.
+# ----------------------------------------------------------------------
+class NameTable:
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, name):
+        name_id = self._ids.get(name)
+        if name_id == None:
+            name_id = len(self._names)
+            self._ids[name] = name_id
+            self._names.append(name)
+        return name_id
+
+    # Id of an already interned name, or None
+    def lookup(self, name):
+        return self._ids.get(name)
+
+    def name_of(self, name_id):
+        return self._names[name_id]
+
+name_table = NameTable()
+
+def intern_name(name):
+    return name_table.intern(name)
+
+def name_for_id(name_id):
+    return name_table.name_of(name_id)
@@ -0,0 +1,70 @@
+# Every operator spelling the lexer knows about. A run of symbol
+# characters is split into the longest of these (maximal munch);
+# characters that start no operator become one-character symbols.
+# parser.symbols maps each spelling to its SymbolType.
+all_operators = (
+    # Math
+    '+', '-', '*', '/', '%',
+    # Assignment
+    '=', '+=', '-=', '??=',
+    # Conditional
+    '==', '!=', '<', '<=', '>', '>=',
+    # Logical
+    '!', '||', '&&',
+    # Increment / decrement
+    '++', '--',
+    # Symbolic
+    '.', '..', ';', ':', '?', ',',
+    # Grouping and scope
+    '(', ')', '[', ']', '{', '}',
+)
+
+# Key of a trie node that marks the end of an operator
+END_OF_OPERATOR = ''
+
+# ----------------------------------------------------------------------
+# OperatorTrie {
+#   _root      char -> node, every node being a dict like _root
+#   _operators set of the spellings, for the one-lookup fast path
+# }
+# ----------------------------------------------------------------------
+class OperatorTrie:
+    def __init__(self, operators):
+        self._root = {}
+        self._operators = frozenset(operators)
+        for op in operators:
+            self.add(op)
+
+    def add(self, op):
+        node = self._root
+        for char in op:
+            node = node.setdefault(char, {})
+        node[END_OF_OPERATOR] = op
+
+    def is_operator(self, text):
+        return text in self._operators
+
+    # symbol run -> [(offset, text)], longest operator first
+    def split(self, run):
+        if len(run) == 1 or run in self._operators:
+            return [(0, run)]
+        pieces = []
+        pos = 0
+        n = len(run)
+        root = self._root
+        while pos < n:
+            best_end = pos + 1
+            node = root
+            idx = pos
+            while idx < n:
+                node = node.get(run[idx])
+                if node == None:
+                    break
+                idx = idx + 1
+                if END_OF_OPERATOR in node:
+                    best_end = idx
+            pieces.append((pos, run[pos:best_end]))
+            pos = best_end
+        return pieces
+
+operator_trie = OperatorTrie(all_operators)
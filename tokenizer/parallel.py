@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from tokenizer.tokens import (
+    ScanContext,
+    LexerEngine,
+)
+
+from tokenizer.tools import (
+    open_source,
+    iter_lines,
+)
+
+from tokenizer.incremental import (
+    lex_line,
+)
+
+from tracing import (
+    tr,
+    INFO,
+)
+
+# Fewer lines than this per chunk cost more to ship than to lex
+MIN_CHUNK_LINES = 2000
+
+# ------------------------------------------------------------
+# Chunks of whole lines, lexed on a process pool. A chunk function
+# runs in a worker and returns (result, exit ScanContext); its result
+# is pickled back to the parent, so it should be compact (e.g. packed
+# arrays, or parsed statements) rather than one object per token.
+# ------------------------------------------------------------
+
+# first_lno -> line[] -> entry ScanContext -> (TokenItem[], exit ScanContext)
+def lex_chunk(first_lno, lines, entry_state):
+    tokens = []
+    lno = first_lno
+    for line in lines:
+        run, entry_state = lex_line(lno, line, entry_state, LexerEngine.REGEX)
+        tokens.extend(run)
+        lno = lno + 1
+    return tokens, entry_state
+
+# ------------------------------------------------------------
+# Parent side
+# ------------------------------------------------------------
+
+def read_all_lines(source):
+    fo, should_close = open_source(source)
+    lines = []
+    try:
+        if fo != None:
+            lines = list(iter_lines(fo))
+    finally:
+        if should_close:
+            fo.close()
+    return lines
+
+# line[] -> workers -> [(first_lno, line[])], split on line boundaries
+def split_into_chunks(lines, workers):
+    n = len(lines)
+    chunk_lines = max(MIN_CHUNK_LINES, (n + 4 * workers - 1) // (4 * workers))
+    chunks = []
+    for first in range(0, n, chunk_lines):
+        chunks.append((first + 1, lines[first:first + chunk_lines]))
+    return chunks
+
+# Lexes the chunks on a process pool, assuming each chunk starts
+# IN_NOTHING. Lines are independent today (the lexer is drained at
+# every line end), but should a chunk end inside a token, the next
+# chunk is lexed again here with the state it is really entered in.
+def run_chunks(chunk_fn, chunks, workers):
+    results = []
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for first_lno, lines in chunks:
+                futures.append(pool.submit(chunk_fn, first_lno, lines, ScanContext.IN_NOTHING))
+            results = [f.result() for f in futures]
+    else:
+        for first_lno, lines in chunks:
+            results.append(chunk_fn(first_lno, lines, ScanContext.IN_NOTHING))
+
+    parts = []
+    exit_state = ScanContext.IN_NOTHING
+    for idx, (part, chunk_exit) in enumerate(results):
+        if exit_state != ScanContext.IN_NOTHING:
+            first_lno, lines = chunks[idx]
+            if tr.lexer >= INFO:
+                tr.log("Chunk at line %d starts %s, lexing it again" % (first_lno, exit_state.name))
+            part, chunk_exit = chunk_fn(first_lno, lines, exit_state)
+        parts.append(part)
+        exit_state = chunk_exit
+    return parts
+
+def default_workers():
+    return os.cpu_count() or 1
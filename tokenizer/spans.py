@@ -0,0 +1,198 @@
+import os
+import mmap
+import re
+
+from tokenizer.tokens import (
+    Token,
+    TokenItem,
+    LexerEngine,
+    master_regex,
+    escaped_char_regex,
+    scan_line,
+    iter_tokens,
+)
+
+from tokenizer.tools import open_source
+
+from tokenizer.operators import (
+    operator_trie,
+)
+
+from tracing import (
+    tr,
+    INFO,
+)
+
+# How the text of a SpanTokenItem is derived from its span
+class SpanForm:
+    RAW = 0     # the bytes as they are
+    ESCAPED = 1 # quoted text containing '\' escapes
+    DECIMAL = 2 # numeric, 'E' normalized to 'e'
+    HEX = 3     # numeric, span covers only the digits after '0x'
+
+# ------------------------------------------------------------
+# SpanTokenItem {
+#   t Token
+#   _buf  buffer holding the source (usually an mmap)
+#   _off  byte offset of the token text in _buf
+#   _len  byte length of the token text
+#   _form SpanForm used to materialize the text
+# }
+# The text is only decoded when .v / .value is first read.
+# ------------------------------------------------------------
+class SpanTokenItem(TokenItem):
+    def __init__(self, tk, buf, off, length, form=SpanForm.RAW):
+        self.t = tk
+        self._buf = buf
+        self._off = off
+        self._len = length
+        self._form = form
+        self._text = None
+        self._lno = 0
+        self._col = 0
+
+    @property
+    def v(self):
+        if self._text == None:
+            self._text = self.materialize()
+        return self._text
+
+    @property
+    def span(self):
+        return (self._off, self._len)
+
+    def materialize(self):
+        text = self._buf[self._off:self._off + self._len].decode('ascii')
+        form = self._form
+        if form == SpanForm.ESCAPED:
+            text = escaped_char_regex.sub(r'\1', text)
+        elif form == SpanForm.DECIMAL:
+            text = text.replace('E', 'e')
+        elif form == SpanForm.HEX:
+            text = '0' + text
+        return text
+
+    def __eq__(self, other):
+        if isinstance(other, TokenItem):
+            return self.t == other.t \
+                and self.v == other.v \
+                and self.line == other.line \
+                and self.col == other.col
+        return False
+
+# Same alternatives as master_regex, matched directly on the bytes
+master_bytes_regex = re.compile(master_regex.pattern.encode('ascii'), master_regex.flags & ~re.UNICODE)
+
+non_ascii_regex = re.compile(rb'[\x80-\xff]')
+lone_cr_regex = re.compile(rb'\r(?!\n)')
+
+# bytes stripped by str.rstrip() on an ASCII line
+trailing_space = frozenset(b'\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f ')
+
+# buf -> lno -> start -> end -> TokenItem[] (including the LINE_END)
+# [start, end) must be an ASCII line without trailing whitespace
+def scan_span_line(buf, lno, start, end):
+    tokens = []
+    pos = start
+    match = master_bytes_regex.match
+    while pos < end:
+        m = match(buf, pos, end)
+        kind = m.lastgroup
+        col = pos - start + 1
+        pos = m.end()
+        if kind == 'space':
+            continue
+        elif kind == 'list_begin':
+            tk_item = TokenItem(Token.LIST_BEGIN)
+        elif kind == 'list_end':
+            tk_item = TokenItem(Token.LIST_END)
+        elif kind == 'symbol':
+            off = m.start(kind)
+            run = buf[off:pos].decode('ascii')
+            for offset, text in operator_trie.split(run):
+                tk_item = SpanTokenItem(Token.SYMBOL, buf, off + offset, len(text))
+                tokens.append(tk_item.set_meta(lno, col + offset))
+            continue
+        else:
+            off = m.start(kind)
+            length = m.end(kind) - off
+            if kind == 'text':
+                tk_item = SpanTokenItem(Token.TEXT, buf, off, length)
+            elif kind == 'other':
+                tk_item = SpanTokenItem(Token.SYMBOL, buf, off, length)
+            elif kind == 'numeric':
+                # a sign right after the 'e' belongs to the NUMERIC too
+                # (and is scanned again as a SYMBOL, like the Tokenizer)
+                if buf[pos - 1] in b'eE' and pos < end and buf[pos] in b'+-':
+                    length = length + 1
+                tk_item = SpanTokenItem(Token.NUMERIC, buf, off, length, SpanForm.DECIMAL)
+            elif kind == 'hex':
+                tk_item = SpanTokenItem(Token.NUMERIC, buf, off, length, SpanForm.HEX)
+            else:
+                form = SpanForm.RAW
+                if buf.find(b'\\', off, off + length) >= 0:
+                    form = SpanForm.ESCAPED
+                tk_item = SpanTokenItem(Token.QTEXT, buf, off, length, form)
+        tokens.append(tk_item.set_meta(lno, col))
+
+    tokens.append(TokenItem(Token.LINE_END).set_meta(lno, end - start + 1))
+    return tokens
+
+def map_source(file_path):
+    fo, should_close = open_source(file_path)
+    if fo == None:
+        return None
+    try:
+        if os.fstat(fo.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(fo.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # pipes, ttys and the like cannot be mapped
+        return None
+    finally:
+        if should_close:
+            fo.close()
+
+# Yields the same tokens as iter_tokens(file_path), but over a
+# memory-mapped copy of the file: TEXT, SYMBOL, NUMERIC and QTEXT
+# tokens only record where their text is, so no token text is
+# copied or decoded while lexing. Lines containing non-ASCII
+# bytes are decoded and lexed with scan_line().
+def iter_mapped_tokens(file_path):
+    buf = map_source(file_path)
+    if buf == None or lone_cr_regex.search(buf) != None:
+        # Not mappable, or old Mac line endings that only the
+        # text layer splits into lines
+        yield from iter_tokens(file_path, LexerEngine.REGEX)
+        return
+
+    lno = 0
+    start = 0
+    size = len(buf)
+    while start < size:
+        nl = buf.find(b'\n', start)
+        if nl < 0:
+            nl = size
+        end = nl
+        lno = lno + 1
+        if non_ascii_regex.search(buf, start, end) != None:
+            line = buf[start:end].decode('utf-8').rstrip()
+            if not line.startswith("//") and len(line) > 0:
+                yield from scan_line(lno, line)
+        else:
+            while end > start and buf[end - 1] in trailing_space:
+                end = end - 1
+            if end > start and buf.find(b'//', start, start + 2) != start:
+                yield from scan_span_line(buf, lno, start, end)
+        start = nl + 1
+
+    if tr.lexer >= INFO:
+        suffix = 's'
+        if lno == 1:
+            suffix = ''
+        tr.log('Processed %d line%s from "%s"' % (lno, suffix, file_path))
+
+    yield TokenItem(Token.INPUT_END)
+
+def tokenize_mapped(file_path):
+    return list(iter_mapped_tokens(file_path))
@@ -0,0 +1,95 @@
+import random
+import pytest
+
+from tokenizer.tokens import (
+    tokenize_program,
+    LexerEngine,
+)
+
+from tokenizer.incremental import (
+    IncrementalTokenizer,
+)
+
+def tokenize_text(tmp_path, lines):
+    source = tmp_path / "edited.goji"
+    source.write_text("\n".join(lines), encoding="utf-8")
+    return tokenize_program(str(source))
+
+@pytest.fixture
+def program_lines():
+    return [
+        "y1 = 17",
+        "// comment",
+        "y3 = 'abc'",
+        "",
+        "y4 = y1 + 3 * 5",
+        "y5 = y4",
+    ]
+
+#  Test the IncrementalTokenizer
+class TestIncrementalTokenizer:
+    @pytest.mark.parametrize("engine", [LexerEngine.CLASSIC, LexerEngine.REGEX])
+    def test_initial_load(self, tmp_path, program_lines, engine):
+        itk = IncrementalTokenizer(engine)
+        itk.set_lines(program_lines)
+        assert itk.tokens() == tokenize_text(tmp_path, program_lines)
+
+    def test_edit_one_line(self, tmp_path, program_lines):
+        itk = IncrementalTokenizer()
+        itk.set_lines(program_lines)
+        new_lines = list(program_lines)
+        new_lines[2] = "y3 = 'unterminated"
+        edit = itk.update(new_lines)
+        assert edit.relexed == 1
+        assert (edit.start, edit.old_end, edit.new_end) == (4, 8, 8)
+        assert itk.tokens() == tokenize_text(tmp_path, new_lines)
+
+    def test_insert_and_delete_lines(self, tmp_path, program_lines):
+        itk = IncrementalTokenizer()
+        itk.set_lines(program_lines)
+        new_lines = program_lines[:1] + ["y2 = (1 + 2)", "y6 = y2"] + program_lines[1:]
+        edit = itk.update(new_lines)
+        assert edit.relexed == 2
+        assert (edit.start, edit.old_end, edit.new_end) == (4, 4, 16)
+        assert itk.tokens() == tokenize_text(tmp_path, new_lines)
+
+        edit = itk.update(program_lines)
+        assert edit.relexed == 0
+        assert (edit.start, edit.old_end, edit.new_end) == (4, 16, 4)
+        assert itk.tokens() == tokenize_text(tmp_path, program_lines)
+
+    def test_set_text_splits_like_files(self, tmp_path):
+        text = "y1 = 17\r\ny2 = 'a\x0bb'\n\ny3 = y1  \n"
+        source = tmp_path / "text.goji"
+        source.write_text(text, encoding="utf-8", newline="")
+        itk = IncrementalTokenizer()
+        itk.set_text(text)
+        assert itk.tokens() == tokenize_program(str(source))
+
+    def test_kept_tokens_are_not_changed(self, program_lines):
+        itk = IncrementalTokenizer()
+        itk.set_lines(program_lines)
+        before = itk.tokens()
+        lines_before = [tk_item.line for tk_item in before]
+        itk.update(["y0 = 1"] + program_lines)
+        assert [tk_item.line for tk_item in before] == lines_before
+        assert itk.tokens()[-2].line == len(program_lines) + 1
+
+    def test_random_edits(self, tmp_path):
+        rng = random.Random(5)
+        pieces = ["y1 = 17", "", "// c", "y3 = 'abc", "y4 = y1 + 3 * 5", "z = (1 + 2.5)"]
+        lines = [rng.choice(pieces) for idx in range(40)]
+        itk = IncrementalTokenizer()
+        itk.set_lines(lines)
+        for step in range(200):
+            first = rng.randrange(len(lines) + 1)
+            last = min(len(lines), first + rng.randrange(4))
+            new_lines = [rng.choice(pieces) for idx in range(rng.randrange(4))]
+            # token counts, without the INPUT_END
+            expected_start = len(tokenize_text(tmp_path, lines[:first])) - 1
+            edit = itk.edit(first, last, new_lines)
+            lines[first:last] = new_lines
+            assert edit.start == expected_start
+            if step % 10 == 0 or step == 199:
+                assert itk.tokens() == tokenize_text(tmp_path, lines)
+            assert edit.new_end == len(tokenize_text(tmp_path, lines[:first + len(new_lines)])) - 1
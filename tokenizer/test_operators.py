@@ -0,0 +1,39 @@
+import pytest
+
+from tokenizer.tokens import (
+    Token,
+    TokenItem,
+    Tokenizer,
+    tokenize_line,
+    scan_line,
+)
+
+from tokenizer.operators import (
+    operator_trie,
+)
+
+#  Test the maximal-munch OperatorTrie
+class TestOperatorTrie:
+    @pytest.mark.parametrize("run,pieces", [
+        ('+', [(0, '+')]),
+        ('??=', [(0, '??=')]),
+        ('??', [(0, '?'), (1, '?')]),
+        ('=+', [(0, '='), (1, '+')]),
+        ('!==>=..', [(0, '!='), (2, '='), (3, '>='), (5, '..')]),
+        ('@+=', [(0, '@'), (1, '+=')]),
+    ])
+    def test_split(self, run, pieces):
+        assert operator_trie.split(run) == pieces
+
+    def test_symbol_run_is_split(self):
+        want = [
+            TokenItem(Token.TEXT, 'x').set_meta(4, 1),
+            TokenItem(Token.SYMBOL, '+=').set_meta(4, 2),
+            TokenItem(Token.SYMBOL, '-').set_meta(4, 4),
+            TokenItem(Token.NUMERIC, '1').set_meta(4, 5),
+            TokenItem(Token.LINE_END).set_meta(4, 6),
+        ]
+        tk = Tokenizer()
+        tokenize_line(tk, 4, 'x+=-1')
+        assert tk.get_tokens() == want
+        assert scan_line(4, 'x+=-1') == want
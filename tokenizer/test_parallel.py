@@ -0,0 +1,35 @@
+from tokenizer.tokens import (
+    Token,
+    TokenItem,
+    ScanContext,
+    tokenize_program,
+)
+
+import tokenizer.parallel
+from tokenizer.parallel import (
+    lex_chunk,
+    split_into_chunks,
+    run_chunks,
+)
+
+#  Test the line-aligned chunks
+class TestChunks:
+    def test_split_into_chunks(self, monkeypatch):
+        monkeypatch.setattr(tokenizer.parallel, "MIN_CHUNK_LINES", 3)
+        lines = ["x%d = %d" % (idx, idx) for idx in range(10)]
+        chunks = split_into_chunks(lines, 1)
+        assert [first_lno for first_lno, part in chunks] == [1, 4, 7, 10]
+        assert sum([part for first_lno, part in chunks], []) == lines
+
+    def test_lexed_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tokenizer.parallel, "MIN_CHUNK_LINES", 4)
+        lines = ["x%d = (%d + 1.5) * y" % (idx, idx) for idx in range(30)]
+        lines[7] = "s = 'unterminated"
+        lines[12] = "// comment"
+        source = tmp_path / "chunks.goji"
+        source.write_text("\n".join(lines), encoding="utf-8")
+
+        parts = run_chunks(lex_chunk, split_into_chunks(lines, 2), 2)
+        tokens = sum(parts, []) + [TokenItem(Token.INPUT_END)]
+        assert tokens == tokenize_program(str(source))
+        assert lex_chunk(1, lines[7:8], ScanContext.IN_NOTHING)[1] == ScanContext.IN_NOTHING
@@ -5,10 +5,24 @@ from tokenizer.tokens import (
     tokenize_program, 
     Token, 
     TokenItem,
+    LexerEngine,
+    iter_tokens,
+)
+
+from tokenizer.spans import (
+    SpanTokenItem,
+    tokenize_mapped,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    DEBUG,
 )
 
 from tokenizer.tools import (
     lines_to_process, 
+    iter_lines,
     show_token_diff,
     # show_tokens,
 )
@@ -97,3 +111,75 @@ class TestTokenizer:
             print('%i failed comparison(s)' % failed)
 
         assert all_tokens == basic_tokens
+
+    def test_regex_tokenizer(self, basic_tokens):
+        all_tokens = tokenize_program("testdata/prog.ph", LexerEngine.REGEX)
+        assert all_tokens == basic_tokens
+
+    def test_regex_matches_classic(self, tmp_path):
+        source = tmp_path / "quirks.goji"
+        source.write_text("\n".join([
+            "y2 = 1.02E3 + 0x1F + 1e-5 + 1.2.3 + 1e.5e2",
+            "s = 'it\\'s' + \"a\\\\b\" + 'unterminated",
+            "  // not a comment, it is indented",
+            "n_1 = _x ~ `q` != ??= 'trailing\\",
+            "été = 3² + x",
+            "",
+            "// a comment",
+        ]), encoding="utf-8")
+        classic_tokens = tokenize_program(str(source), LexerEngine.CLASSIC)
+        regex_tokens = tokenize_program(str(source), LexerEngine.REGEX)
+        if regex_tokens != classic_tokens:
+            failed = show_token_diff(regex_tokens, classic_tokens)
+            print('%i failed comparison(s)' % failed)
+
+        assert regex_tokens == classic_tokens
+
+    def test_streaming_tokenizer(self, basic_tokens):
+        with open("testdata/prog.ph", "r", encoding="utf-8") as fo:
+            token_iter = iter_tokens(fo, LexerEngine.CLASSIC, chunk_size=7)
+            first_token = next(token_iter)
+            assert first_token == basic_tokens[0]
+            all_tokens = [first_token] + list(token_iter)
+        assert all_tokens == basic_tokens
+
+    def test_streaming_lines_match_readlines(self, tmp_path):
+        source = tmp_path / "lines.goji"
+        source.write_text("a = 1  \r\n\n  // x\r\nb = 'c' \nlast", encoding="utf-8")
+        with open(str(source), "r", encoding="utf-8") as fo:
+            got = list(iter_lines(fo, chunk_size=3))
+        assert got == lines_to_process(str(source), False)
+
+    def test_mapped_tokenizer(self, basic_tokens):
+        all_tokens = tokenize_mapped("testdata/prog.ph")
+        assert all_tokens == basic_tokens
+        assert isinstance(all_tokens[3], SpanTokenItem)
+        assert all_tokens[3].span == (len("// define a few functions\n") + 4, 2)
+
+    def test_mapped_matches_classic(self, tmp_path):
+        source = tmp_path / "quirks.goji"
+        source.write_text("\n".join([
+            "y2 = 1.02E3 + 0x1F + 1e-5 + 1.2.3",
+            "s = 'it\\'s' + \"a\\\\b\" + 'unterminated  ",
+            "été = 3² + x\t",
+            "",
+            "// a comment",
+            "last",
+        ]), encoding="utf-8")
+        classic_tokens = tokenize_program(str(source), LexerEngine.CLASSIC)
+        mapped_tokens = tokenize_mapped(str(source))
+        assert mapped_tokens == classic_tokens
+
+    def test_quiet_by_default(self, capsys):
+        tokenize_program("testdata/prog.ph")
+        assert capsys.readouterr().out == ''
+
+    def test_lexer_tracing(self, capsys):
+        tr.set_level(DEBUG, ['lexer'])
+        try:
+            tokenize_program("testdata/prog.ph")
+        finally:
+            tr.set_level(ERROR)
+        out = capsys.readouterr().out
+        assert "[   2] (= (x1 a b) (+ a b))" in out
+        assert 'Processed 9 lines from "testdata/prog.ph"' in out
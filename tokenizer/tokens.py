@@ -1,8 +1,22 @@
 import os
-import itertools
+import re
 from enum import Enum
 
-from tokenizer.tools import lines_to_process
+from tokenizer.tools import (
+    open_source,
+    iter_lines,
+)
+
+from tokenizer.operators import (
+    operator_trie,
+)
+
+from tracing import (
+    tr,
+    ERROR,
+    INFO,
+    DEBUG,
+)
 
 class Token(Enum):
     INPUT_END = 0 # Unexpected lexical finding
@@ -187,6 +201,11 @@ class Tokenizer:
     def get_tokens(self):
         return self.tokens
 
+    def take_tokens(self):
+        tokens = self.tokens
+        self.tokens = []
+        return tokens
+
     def add_token(self, tk, s=''):
         new_tk = TokenItem(tk, s)
         if tk != Token.INPUT_END:
@@ -195,9 +214,19 @@ class Tokenizer:
         self.reset()
 
     def emit_token(self):
-        if self.istoken():
+        if self.tk_type == Token.SYMBOL:
+            self.emit_symbols()
+        elif self.istoken():
             self.add_token(self.tk_type, self.text)
 
+    # A run of symbol characters becomes one SYMBOL per operator
+    def emit_symbols(self):
+        lno = self._lno
+        col = self._col
+        for offset, text in operator_trie.split(self.text):
+            self.set_meta(lno, col + offset)
+            self.add_token(Token.SYMBOL, text)
+
     def did_handle_undetermined(self, char):
         if char == '(':
             self.add_token(Token.LIST_BEGIN)
@@ -323,8 +352,8 @@ class Tokenizer:
             return self.did_handle_text(char)
         elif state == ScanContext.IN_NUMERIC:
             return self.did_handle_numeric(char)
-        else:
-            print('Unknown state: "%s"' % state.name)
+        elif tr.lexer >= ERROR:
+            tr.log('Unknown state: "%s"' % state.name)
         return True
 
 # ----------------------------------------------------------------------
@@ -353,24 +382,128 @@ def tokenize_line(tk, lno, char_iter):
     tk.add_token(Token.LINE_END)
     #return tk.get_tokens()
 
-def tokenize_program(file_path):
-    should_join = False
-    all_lines = lines_to_process(file_path, should_join)
+# ----------------------------------------------------------------------
+# Master regex engine
+# ----------------------------------------------------------------------
+# Each alternative mirrors one ScanContext of the Tokenizer so that a
+# whole token is recognized by a single match instead of one
+# did_handle_char() call per character. Only ASCII lines are scanned
+# this way; str.isalpha()/str.isspace() accept far more than the
+# classes below, so other lines go through the Tokenizer instead.
+#
+# Quirks of the Tokenizer that are reproduced on purpose:
+#   - a quoted text ends at the end of the line, even if unterminated
+#   - '0x' drops the 'x' and then accepts hex digits ('0x1F' -> '01F')
+#   - 'E' is normalized to 'e' in a decimal exponent
+#   - a '+' or '-' right after the 'e' is appended to the NUMERIC
+#     and then scanned again as the start of a SYMBOL
+# ----------------------------------------------------------------------
+class LexerEngine(Enum):
+    CLASSIC = 0 # Tokenizer.did_handle_char, one character at a time
+    REGEX = 1   # master_regex, one match per token
+    MAPPED = 2  # tokenizer.spans, REGEX over an mmap of the file
+    PACKED = 3  # parser.packed, REGEX into a struct-of-arrays TokenBuffer
+    FUSED = 4   # parser.symbols, REGEX straight to SymTokens
+    VECTOR = 5  # parser.vectorized, whole-file byte classes into a TokenBuffer
+
+master_regex = re.compile(r'''
+      (?P<space>[\t\n\x0b\x0c\r\x1c-\x1f ]+)
+    | (?P<list_begin>\()
+    | (?P<list_end>\))
+    | (?P<symbol>[%s]+)
+    | "(?P<dquote>(?:[^"\\]|\\.)*)(?:"|\\?\Z)
+    | '(?P<squote>(?:[^'\\]|\\.)*)(?:'|\\?\Z)
+    | 0x+(?P<hex>[0-9A-Fa-f]*)
+    | (?P<numeric>[0-9]+(?:\.[0-9]*)?(?:[eE][0-9]*(?:\.[0-9]*)?)?)
+    | (?P<text>[A-Za-z][A-Za-z0-9_]*)
+    | (?P<other>.)
+''' % re.escape(Tokenizer().valid_symbols), re.VERBOSE | re.DOTALL)
+
+escaped_char_regex = re.compile(r'\\(.)', re.DOTALL)
+
+# ASCII line -> [(Token, text, col)], the text being what the
+# Tokenizer would have collected ('' for LIST_BEGIN and LIST_END)
+def scan_line_texts(line):
+    found = []
+    pos = 0
+    end = len(line)
+    match = master_regex.match
+    while pos < end:
+        m = match(line, pos)
+        kind = m.lastgroup
+        col = pos + 1
+        pos = m.end()
+        if kind == 'space':
+            continue
+        elif kind == 'text':
+            found.append((Token.TEXT, m.group(kind), col))
+        elif kind == 'symbol':
+            for offset, text in operator_trie.split(m.group(kind)):
+                found.append((Token.SYMBOL, text, col + offset))
+        elif kind == 'other':
+            found.append((Token.SYMBOL, m.group(kind), col))
+        elif kind == 'list_begin':
+            found.append((Token.LIST_BEGIN, '', col))
+        elif kind == 'list_end':
+            found.append((Token.LIST_END, '', col))
+        elif kind == 'numeric':
+            text = m.group(kind).replace('E', 'e')
+            if text.endswith('e') and pos < end and line[pos] in '+-':
+                text = text + line[pos]
+            found.append((Token.NUMERIC, text, col))
+        elif kind == 'hex':
+            found.append((Token.NUMERIC, '0' + m.group(kind), col))
+        else:
+            text = m.group(kind)
+            if text.find('\\') >= 0:
+                text = escaped_char_regex.sub(r'\1', text)
+            found.append((Token.QTEXT, text, col))
+    return found
+
+# lno -> line -> TokenItem[] (including the LINE_END)
+def scan_line(lno, line):
+    if not line.isascii():
+        tk = Tokenizer()
+        tokenize_line(tk, lno, line)
+        return tk.get_tokens()
+
+    tokens = []
+    for tk, text, col in scan_line_texts(line):
+        tokens.append(TokenItem(tk, text).set_meta(lno, col))
+    tokens.append(TokenItem(Token.LINE_END).set_meta(lno, len(line) + 1))
+    return tokens
+
+# source: file path, '-' for stdin, or an open text file
+# Yields the TokenItems of each line as soon as the line is read,
+# ending with INPUT_END, so memory use does not grow with the input
+def iter_tokens(source, engine=LexerEngine.CLASSIC, chunk_size=65536):
+    fo, should_close = open_source(source)
     lno = 0
     tk = Tokenizer()
-    for line in all_lines:
-        lno = lno + 1
-        print("[%4d] %s" % (lno, line))
-        if not line.startswith("//") and len(line) > 0:
-            char_iter = itertools.islice(line, 0, None)
-            more_tokens = tokenize_line(tk, lno, char_iter)
-
-    lx = len(all_lines)
-    suffix = 's'
-    if lx == 1:
-        suffix = ''
-    print('Processed %d line%s from "%s"' % (lx, suffix, file_path))
+    try:
+        if fo != None:
+            for line in iter_lines(fo, chunk_size):
+                lno = lno + 1
+                if tr.lexer >= DEBUG:
+                    tr.log("[%4d] %s" % (lno, line))
+                if not line.startswith("//") and len(line) > 0:
+                    if engine == LexerEngine.REGEX:
+                        yield from scan_line(lno, line)
+                    else:
+                        tokenize_line(tk, lno, line)
+                        yield from tk.take_tokens()
+    finally:
+        if should_close:
+            fo.close()
+
+    if tr.lexer >= INFO:
+        suffix = 's'
+        if lno == 1:
+            suffix = ''
+        tr.log('Processed %d line%s from "%s"' % (lno, suffix, source))
 
     tk.mark_end_of_input()
+    yield from tk.take_tokens()
 
-    return tk.get_tokens()
+def tokenize_program(file_path, engine=LexerEngine.CLASSIC):
+    return list(iter_tokens(file_path, engine))
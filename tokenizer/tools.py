@@ -1,4 +1,5 @@
 import os
+import sys
 # import itertools
 # from enum import Enum
 
@@ -22,6 +23,41 @@ def lines_to_process(filepath, should_join = True):
     return all_lines
 
 
+# source: file path, '-' for stdin, or an already open text file
+# Returns (file object, should_close), or (None, False) when the
+# path is not readable
+def open_source(source):
+    if source == '-':
+        return sys.stdin, False
+    if not isinstance(source, str):
+        return source, False
+    if not os.access(source, os.R_OK):
+        return None, False
+    return open(source, "r", encoding="utf-8"), True
+
+# Same lines as lines_to_process(filepath, False), but read
+# chunk_size characters at a time so that only the current
+# line is ever held in memory. Works for pipes and stdin too.
+def iter_lines(fo, chunk_size=65536):
+    partial = []
+    while True:
+        chunk = fo.read(chunk_size)
+        if chunk == '':
+            break
+        start = 0
+        idx = chunk.find('\n')
+        while idx >= 0:
+            partial.append(chunk[start:idx])
+            yield ''.join(partial).rstrip()
+            partial = []
+            start = idx + 1
+            idx = chunk.find('\n', start)
+        partial.append(chunk[start:])
+    last_line = ''.join(partial)
+    if len(last_line) > 0:
+        yield last_line.rstrip()
+
+
 def show_tokens(heading, tks):
     print(heading + ':')
     for idx, t in enumerate(tks):
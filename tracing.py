@@ -0,0 +1,60 @@
+import sys
+
+# ----------------------------------------------------------------------
+# Trace levels are plain ints so that a disabled trace point costs one
+# attribute load, one int comparison and one branch:
+#
+#     if tr.parser >= TRACE:
+#         tr.log("advanced to: %s" % symtok)
+#
+# The message is only formatted once the branch is taken.
+# ----------------------------------------------------------------------
+QUIET = 0 # nothing but the program's own output
+ERROR = 1 # problems found in the program being run
+INFO  = 2 # one line per phase (lines read, tokens found, ...)
+DEBUG = 3 # one line per source line, statement or binding
+TRACE = 4 # one line per token or per evaluated operation
+
+# One attribute of the Tracer per phase of the front end and runtime
+all_categories = ('lexer', 'symbols', 'rules', 'parser', 'env', 'eval', 'program')
+
+# ----------------------------------------------------------------------
+# Tracer {
+#   lexer, symbols, ... current level of each category
+#   out                 where enabled trace lines are written
+# }
+# ----------------------------------------------------------------------
+class Tracer:
+    __slots__ = all_categories + ('out',)
+
+    def __init__(self, level=ERROR, out=None):
+        self.out = out
+        self.set_level(level)
+
+    # categories: names from all_categories, or None for all of them
+    def set_level(self, level, categories=None):
+        if categories == None:
+            categories = all_categories
+        for name in categories:
+            if name not in all_categories:
+                raise ValueError('Unknown trace category: "%s"' % name)
+            setattr(self, name, level)
+
+    def log(self, text):
+        out = self.out
+        if out == None:
+            out = sys.stdout
+        print(text, file=out)
+
+# The process-wide tracer every module checks
+tr = Tracer()
+
+# verbosity -> ['lexer', ...] -> Tracer (tr), as set from the command line
+def configure(verbosity=0, trace_categories=None, quiet=False):
+    if quiet:
+        tr.set_level(QUIET)
+        return tr
+    tr.set_level(min(ERROR + verbosity, TRACE))
+    if trace_categories:
+        tr.set_level(TRACE, trace_categories)
+    return tr